@@ -93,6 +93,7 @@ class ADAPI:
                 self.logger = user_log
 
         self.constraints = []
+        self.constraint_dependencies = {}
         self.dialogflow_v = 2
 
     @staticmethod
@@ -1731,6 +1732,104 @@ class ADAPI:
             copy=copy,
         )
 
+    @utils.sync_decorator
+    async def query_entities(
+        self,
+        domain: str | None = None,
+        namespace: str | None = None,
+        **attributes: Any,
+    ) -> list[str]:  # fmt: skip
+        """Find entities by their domain and attribute values.
+
+        This uses indexes that AppDaemon keeps up to date as the states change, so it doesn't have to look at every
+        entity in the namespace. The attributes listed in the ``indexed_attributes`` setting are looked up directly,
+        any others are checked on the entities that match the rest of the query.
+
+        Args:
+            domain (str, optional): Only return entities in this domain.
+            namespace (str, optional): Optional namespace to use. Defaults to using the app's current namespace. The
+                current namespace can be changed using ``self.set_namespace``. See the
+                `namespace documentation <APPGUIDE.html#namespaces>`__ for more information.
+            **attributes: Attribute values that the entities need to have.
+
+        Returns:
+            A list of the matching entity IDs.
+
+        Examples:
+            Get all the temperature sensors.
+
+            >>> sensors = self.query_entities("sensor", device_class="temperature")
+
+            Get everything that's measured in watts.
+
+            >>> entities = self.query_entities(unit_of_measurement="W")
+
+        """
+        return self.AD.state.query_entities(namespace or self.namespace, domain, **attributes)
+
+    @utils.sync_decorator
+    async def recent_history(
+        self,
+        entity_id: str,
+        window: str | int | float | timedelta | None = None,
+        namespace: str | None = None,
+    ) -> list[tuple[dt.datetime, float]]:  # fmt: skip
+        """Get the recent numeric states of an entity from AppDaemon's in-memory history.
+
+        AppDaemon only keeps this history when the ``state_history_size`` setting is used, in which case it records the
+        last ``state_history_size`` numeric states of each entity as they change. It doesn't make any requests to the
+        plugin, so it's much faster than ``get_history()``, but it only goes back as far as AppDaemon has been running.
+
+        Args:
+            entity_id (str): Full entity ID.
+            window (str | int | float | timedelta, optional): Only return the states from this far back, for example
+                ``600`` or ``"00:10:00"`` for the last 10 minutes. All the recorded states are returned by default.
+            namespace (str, optional): Optional namespace to use. Defaults to using the app's current namespace. The
+                current namespace can be changed using ``self.set_namespace``. See the
+                `namespace documentation <APPGUIDE.html#namespaces>`__ for more information.
+
+        Returns:
+            A list of ``(datetime, value)`` tuples, oldest first. It is empty if there is no history for the entity.
+
+        Examples:
+            >>> for ts, value in self.recent_history("sensor.power", window="00:10:00"):
+            >>>     self.log(f"{ts}: {value}")
+
+        """
+        window = utils.parse_timedelta(window) if window is not None else None
+        return self.AD.state.recent_history(namespace or self.namespace, entity_id, window)
+
+    @utils.sync_decorator
+    async def history_stats(
+        self,
+        entity_id: str,
+        window: str | int | float | timedelta | None = None,
+        namespace: str | None = None,
+    ) -> dict[str, float | int | None]:  # fmt: skip
+        """Get statistics of the recent numeric states of an entity from AppDaemon's in-memory history.
+
+        See ``recent_history()`` for how the history is recorded.
+
+        Args:
+            entity_id (str): Full entity ID.
+            window (str | int | float | timedelta, optional): Only use the states from this far back. All the recorded
+                states are used by default.
+            namespace (str, optional): Optional namespace to use. Defaults to using the app's current namespace. The
+                current namespace can be changed using ``self.set_namespace``. See the
+                `namespace documentation <APPGUIDE.html#namespaces>`__ for more information.
+
+        Returns:
+            A dict with the ``count``, ``mean``, ``min`` and ``max`` of the values, and the ``rate`` of change per
+            second between the first and the last one. The values are ``None`` if there's no history.
+
+        Examples:
+            >>> stats = self.history_stats("sensor.power", window=600)
+            >>> self.log(f"Average power over 10 minutes: {stats['mean']}")
+
+        """
+        window = utils.parse_timedelta(window) if window is not None else None
+        return self.AD.state.history_stats(namespace or self.namespace, entity_id, window)
+
     @utils.sync_decorator
     async def set_state(
         self,
@@ -1794,6 +1893,88 @@ class ADAPI:
             **kwargs,
         )
 
+    @utils.sync_decorator
+    async def get_states(
+        self,
+        entity_ids: Iterable[str],
+        attribute: str | Literal["all"] | None = None,
+        default: Any | None = None,
+        namespace: str | None = None,
+        copy: bool = True,
+    ) -> dict[str, Any]:  # fmt: skip
+        """Get the states of several entities at once from AppDaemon's internals.
+
+        This is the same as calling ``get_state()`` for each entity, but it only needs a single call into AppDaemon and
+        makes a single copy of the results, so it's much faster for large groups of entities.
+
+        Args:
+            entity_ids (Iterable[str]): Full entity IDs.
+            attribute (str, optional): Optionally specify an attribute to return, the same as for ``get_state()``.
+            default (any, optional): The value to use for entities or attributes that don't exist.
+            namespace (str, optional): Optional namespace to use. Defaults to using the app's current namespace. See
+                the `namespace documentation <APPGUIDE.html#namespaces>`__ for more information.
+            copy (bool, optional): Whether to return a copy of the internal data. Only set this to ``False`` for
+                read-only operations.
+
+        Returns:
+            A dict that maps each entity ID to its state or attribute.
+
+        Examples:
+            >>> temperatures = self.get_states(["sensor.kitchen", "sensor.office"])
+
+            >>> brightness = self.get_states(self.args["lights"], attribute="brightness", default=0)
+
+        """
+        return await self.AD.state.get_states(
+            name=self.name,
+            namespace=namespace or self.namespace,
+            entity_ids=entity_ids,
+            attribute=attribute,
+            default=default,
+            copy=copy,
+        )
+
+    @utils.sync_decorator
+    async def set_states(
+        self,
+        states: Mapping[str, Mapping[str, Any]],
+        namespace: str | None = None,
+        check_existence: bool = True,
+    ) -> dict[str, dict[str, Any]]:  # fmt: skip
+        """Update the states of several entities at once.
+
+        This is the same as calling ``set_state()`` for each entity, but it only needs a single call into AppDaemon and
+        the ``state_changed`` events are fired together. For a Home Assistant namespace, the requests are sent
+        concurrently, up to the ``max_concurrent_requests`` setting of the plugin at a time.
+
+        Args:
+            states (Mapping[str, Mapping[str, Any]]): Maps each entity ID to the keyword arguments that would be used
+                with ``set_state()`` for it, like ``state``, ``attributes`` and ``replace``.
+            namespace (str, optional): Optional namespace to use. Defaults to using the app's current namespace. See
+                the `namespace documentation <APPGUIDE.html#namespaces>`__ for more information.
+            check_existence(bool, optional): Whether to check if the entities exist before setting their states.
+                Defaults to ``True``.
+
+        Returns:
+            A dict that maps each entity ID to its new state.
+
+        Examples:
+            >>> self.set_states({
+            >>>     "sensor.kitchen_occupancy": {"state": "on"},
+            >>>     "sensor.office_occupancy": {"state": "off", "attributes": {"since": "10:00"}},
+            >>> })
+
+        """
+        namespace = namespace or self.namespace
+        if check_existence:
+            for entity_id in states:
+                self._check_entity(namespace, entity_id)
+        return await self.AD.state.set_states(
+            name=self.name,
+            namespace=namespace,
+            states={entity_id: dict(kwargs) for entity_id, kwargs in states.items()},
+        )
+
     #
     # Services
     #
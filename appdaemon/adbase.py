@@ -2,6 +2,7 @@ import threading
 from functools import wraps
 from logging import Logger
 from pathlib import Path
+from collections.abc import Callable, Iterable
 from typing import TYPE_CHECKING, Any
 
 from appdaemon import adapi, utils
@@ -85,6 +86,7 @@ class ADBase:
     lock: threading.RLock
     user_logs: dict
     constraints: list
+    constraint_dependencies: dict[str, Callable[[Any], Iterable[str]]]
 
     entities = Entities()
 
@@ -110,6 +112,7 @@ class ADBase:
         self.lock = threading.RLock()
 
         self.constraints = list()
+        self.constraint_dependencies = dict()
 
     @property
     def namespace(self) -> str:
@@ -188,8 +191,20 @@ class ADBase:
     # Constraints
     #
 
-    def register_constraint(self, name: str) -> None:
+    def register_constraint(self, name: str, depends_on: Callable[[Any], Iterable[str]] | None = None) -> None:
+        """Registers a method of the app to be used as a custom constraint.
+
+        Args:
+            name (str): Name of the method that evaluates the constraint.
+            depends_on (Callable, optional): Function that is given the value of the constraint and returns the
+                entity IDs, or bare domains, that the result depends on. If provided, the result of the constraint is
+                cached until one of those entities changes. Otherwise, or if it returns nothing for a value, the
+                constraint is evaluated every time a callback is dispatched.
+        """
         self.constraints.append(name)
+        if depends_on is not None:
+            self.constraint_dependencies[name] = depends_on
 
     def deregister_constraint(self, name: str) -> None:
         self.constraints.remove(name)
+        self.constraint_dependencies.pop(name, None)
@@ -331,7 +331,10 @@ class AppManagement:
 
             await self.AD.callbacks.clear_callbacks(app_name)
 
-            self.AD.futures.cancel_futures(app_name)
+            await self.AD.futures.cancel_and_wait(app_name)
+
+            self.AD.threading.clear_constraint_cache(app_name)
+            self.AD.threading.clear_async_limits(app_name)
 
             self.AD.services.clear_services(app_name)
 
@@ -555,7 +558,7 @@ class AppManagement:
             del self.objects[name]
 
         await self.AD.callbacks.clear_callbacks(name)
-        self.AD.futures.cancel_futures(name)
+        await self.AD.futures.cancel_and_wait(name)
 
         return True
 
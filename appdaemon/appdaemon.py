@@ -11,6 +11,7 @@ from appdaemon.app_management import AppManagement
 from appdaemon.callbacks import Callbacks
 from appdaemon.events import Events
 from appdaemon.futures import Futures
+from appdaemon.memory import MemoryStats
 from appdaemon.models.config import AppDaemonConfig
 from appdaemon.plugin_management import PluginManagement
 from appdaemon.scheduler import Scheduler
@@ -54,6 +55,8 @@ class AppDaemon(metaclass=Singleton):
           - :class:`~.futures.Futures`
         * - ``http``
           - :class:`~.http.HTTP`
+        * - ``memory``
+          - :class:`~.memory.MemoryStats`
         * - ``plugins``
           - :class:`~.plugin_management.Plugins`
         * - ``scheduler``
@@ -86,6 +89,7 @@ class AppDaemon(metaclass=Singleton):
     events: "Events"
     futures: "Futures"
     logging: "Logging"
+    memory: "MemoryStats"
     plugins: "PluginManagement"
     scheduler: "Scheduler"
     services: "Services"
@@ -147,6 +151,7 @@ class AppDaemon(metaclass=Singleton):
             self.app_management = AppManagement(self)
 
         self.threading = Threading(self)
+        self.memory = MemoryStats(self)
 
         # Create ThreadAsync loop
         self.logger.debug("Starting thread_async loop")
@@ -192,10 +197,18 @@ class AppDaemon(metaclass=Singleton):
     def certpath(self):
         return self.config.cert_verify
 
+    @property
+    def callback_args(self):
+        return self.config.callback_args
+
     @property
     def check_app_updates_profile(self):
         return self.config.check_app_updates_profile
 
+    @property
+    def compact_entities(self):
+        return self.config.compact_entities
+
     @property
     def config_dir(self):
         """Path to the AppDaemon configuration files. Defaults to the first folder that has ``./apps``
@@ -229,6 +242,14 @@ class AppDaemon(metaclass=Singleton):
     def import_paths(self):
         return self.config.import_paths
 
+    @property
+    def fast_async_callbacks(self):
+        return self.config.fast_async_callbacks
+
+    @property
+    def indexed_attributes(self):
+        return self.config.indexed_attributes
+
     @property
     def invalid_config_warnings(self):
         return self.config.invalid_config_warnings
@@ -261,6 +282,14 @@ class AppDaemon(metaclass=Singleton):
     def max_utility_skew(self):
         return self.config.max_utility_skew
 
+    @property
+    def memory_sample_size(self):
+        return self.config.memory_sample_size
+
+    @property
+    def memory_stats_interval(self):
+        return self.config.memory_stats_interval
+
     @property
     def missing_app_warnings(self):
         return self.config.invalid_config_warnings
@@ -273,6 +302,10 @@ class AppDaemon(metaclass=Singleton):
     def namespaces(self):
         return self.config.namespaces
 
+    @property
+    def namespace_save_interval(self):
+        return self.config.namespace_save_interval
+
     @property
     def production_mode(self):
         return self.config.production_mode
@@ -299,6 +332,18 @@ class AppDaemon(metaclass=Singleton):
     def starttime(self):
         return self.config.starttime
 
+    @property
+    def state_history_size(self):
+        return self.config.state_history_size
+
+    @property
+    def state_snapshot(self):
+        return self.config.state_snapshot
+
+    @property
+    def state_snapshot_interval(self):
+        return self.config.state_snapshot_interval
+
     @property
     def stop_function(self):
         return self.config.stop_function or self.stop
@@ -345,6 +390,8 @@ class AppDaemon(metaclass=Singleton):
         - :class:`~.scheduler.Scheduler`
         - :class:`~.utility_loop.Utility`
         - :class:`~.plugin_management.Plugins`
+        - :class:`~.memory.MemoryStats`
+        - :class:`~.state.State`
         """
         self.stopping = True
         if self.admin_loop is not None:
@@ -357,8 +404,14 @@ class AppDaemon(metaclass=Singleton):
             self.utility.stop()
         if self.plugins is not None:
             self.plugins.stop()
+        if self.memory is not None:
+            self.memory.stop()
+        if self.state is not None:
+            self.state.stop()
 
     def terminate(self):
+        if self.memory is not None and not self.loop.is_closed() and not self.loop.is_running():
+            self.loop.run_until_complete(self.memory.terminate())
         if self.state is not None:
             self.state.terminate()
 
@@ -1,5 +1,7 @@
 import asyncio
+from collections import defaultdict
 from logging import Logger
+from collections.abc import Iterable
 from typing import TYPE_CHECKING, Any
 
 import appdaemon.utils as utils
@@ -22,10 +24,15 @@ class Callbacks:
     """
 
     callbacks: dict[str, dict[str, dict[str, Any]]]
+    state_listeners: defaultdict[str, dict[tuple[str, str], None]]
+    """Index of the state callbacks by the attribute they listen to, as ``(name, handle)`` keys. Callbacks without an
+    attribute are under ``state``. Modified along with :attr:`callbacks`, so it's guarded by the same lock.
+    """
 
     def __init__(self, ad: "AppDaemon"):
         self.AD = ad
         self.callbacks = {}
+        self.state_listeners = defaultdict(dict)
         self.callbacks_lock = asyncio.Lock()
         self.logger = ad.logging.get_child("_callbacks")
         self.diag = ad.logging.get_diag()
@@ -89,11 +96,43 @@ class Callbacks:
         self.logger.debug("Clearing callbacks for %s", name)
         async with self.callbacks_lock:
             if name in self.callbacks:
+                had_event_callbacks = False
                 for cid in self.callbacks[name]:
                     if self.callbacks[name][cid]["type"] == "event":
+                        had_event_callbacks = True
                         await self.AD.state.remove_entity("admin", "event_callback.{}".format(cid))
                     if self.callbacks[name][cid]["type"] == "state":
+                        self.remove_state_listener(name, cid, self.callbacks[name][cid]["kwargs"].get("attribute"))
                         await self.AD.state.remove_entity("admin", "state_callback.{}".format(cid))
                     if self.callbacks[name][cid]["type"] == "log":
                         await self.AD.state.remove_entity("admin", "log_callback.{}".format(cid))
                 del self.callbacks[name]
+                if had_event_callbacks:
+                    self.AD.plugins.notify_event_listeners_changed()
+
+    def event_types(self, namespaces: Iterable[str]) -> set[str | None]:
+        """Event types that are listened for in any of the given namespaces, including the global listeners. A ``None``
+        in the result means that something listens for every event."""
+        namespaces = set(namespaces) | {"global"}
+        return {
+            callback["event"]
+            for app_callbacks in list(self.callbacks.values())
+            for callback in list(app_callbacks.values())
+            if callback["type"] == "event"
+            and callback["namespace"] in namespaces
+            and (callback["event"] is None or not callback["event"].startswith("__"))
+        }
+
+    #
+    # State listener index
+    #
+
+    def add_state_listener(self, name: str, handle: str, attribute: str | None) -> None:
+        self.state_listeners["state" if attribute is None else attribute][(name, handle)] = None
+
+    def remove_state_listener(self, name: str, handle: str, attribute: str | None) -> None:
+        attribute = "state" if attribute is None else attribute
+        if (listeners := self.state_listeners.get(attribute)) is not None:
+            listeners.pop((name, handle), None)
+            if not listeners:
+                del self.state_listeners[attribute]
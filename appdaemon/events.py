@@ -89,6 +89,7 @@ class Events:
                 "pin_thread": pin_thread,
                 "kwargs": kwargs,
             }
+        self.AD.plugins.notify_event_listeners_changed()
 
         # Automatically cancel the callback after a timeout
         if timeout is not None:
@@ -142,7 +143,9 @@ class Events:
             if name in self.AD.callbacks.callbacks and self.AD.callbacks.callbacks[name] == {}:
                 del self.AD.callbacks.callbacks[name]
 
-        if not executed and not silent:
+        if executed:
+            self.AD.plugins.notify_event_listeners_changed()
+        elif not silent:
             self.logger.warning(
                 f"Invalid callback handle '{handle}' in cancel_event_callback() from app {name}"
             )
@@ -328,6 +331,7 @@ class Events:
         self.logger.debug("process_event_callbacks() %s %s", namespace, data)
 
         removes = []
+        frozen_data = None
         async with self.AD.callbacks.callbacks_lock:
             for name in self.AD.callbacks.callbacks.keys():
                 for uuid_ in self.AD.callbacks.callbacks[name]:
@@ -365,6 +369,13 @@ class Events:
 
                             if _run:
                                 if name in self.AD.app_management.objects:
+                                    event_data = data["data"]
+                                    if self.AD.threading.frozen_payloads(name):
+                                        # Only freeze the data once per event, it's shared between all the callbacks
+                                        if frozen_data is None:
+                                            frozen_data = utils.freeze(event_data)
+                                        event_data = frozen_data
+
                                     executed = await self.AD.threading.dispatch_worker(
                                         name,
                                         {
@@ -374,7 +385,7 @@ class Events:
                                             "type": "event",
                                             "event": data["event_type"],
                                             "function": callback["function"],
-                                            "data": data["data"],
+                                            "data": event_data,
                                             "pin_app": callback["pin_app"],
                                             "pin_thread": callback["pin_thread"],
                                             "kwargs": callback["kwargs"],
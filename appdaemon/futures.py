@@ -1,34 +1,74 @@
 import asyncio
-from collections import defaultdict
+from collections.abc import Iterator
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from appdaemon.appdaemon import AppDaemon
 
 
+class AppTaskGroup:
+    """The tasks and futures that belong to one app, which are cancelled and waited for together when it stops.
+
+    Unlike :class:`asyncio.TaskGroup`, a task that fails doesn't cancel the others, because the callbacks of an app are
+    independent of each other. Finished tasks remove themselves from the group.
+    """
+
+    name: str
+    tasks: set[asyncio.Future]
+
+    def __init__(self, name: str):
+        self.name = name
+        self.tasks = set()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __iter__(self) -> Iterator[asyncio.Future]:
+        return iter(list(self.tasks))
+
+    def add(self, future: asyncio.Future) -> None:
+        self.tasks.add(future)
+        future.add_done_callback(self.tasks.discard)
+
+    def cancel(self) -> list[asyncio.Future]:
+        """Cancels everything in the group and returns what was cancelled"""
+        cancelled = [f for f in self.tasks if not f.done()]
+        for f in cancelled:
+            f.cancel()
+        return cancelled
+
+    async def wait(self, futures: list[asyncio.Future], timeout: float) -> set[asyncio.Future]:
+        """Waits for the given futures from the group to finish, and returns the ones that didn't"""
+        # A task that stops its own app can't wait for itself
+        futures = [f for f in futures if f is not asyncio.current_task()]
+        if not futures:
+            return set()
+        _, pending = await asyncio.wait(futures, timeout=timeout)
+        return pending
+
+
 class Futures:
     """Subsystem container for managing :class:`~asyncio.Future` objects
     """
 
     AD: "AppDaemon"
     """Reference to the top-level AppDaemon container object"""
-    futures: dict[str , list[asyncio.Future]]
-    """Dictionary of futures registered by app name"""
+    futures: dict[str, AppTaskGroup]
+    """Task group of each app, by app name"""
+
+    CANCEL_TIMEOUT: float = 5.0
+    """How long to wait for the tasks of an app to finish after they're cancelled"""
 
     def __init__(self, ad: "AppDaemon"):
         self.AD = ad
         self.logger = self.AD.logging.get_child("_futures")
-        self.futures = defaultdict(list)
+        self.futures = {}
 
     def add_future(self, app_name: str, future: asyncio.Future):
-        """Add a future to the registry and a callback that removes itself from the registry after it finishes."""
-        self.futures[app_name].append(future)
-        def safe_remove(f):
-            try:
-                self.futures[app_name].remove(f)
-            except ValueError:
-                pass
-        future.add_done_callback(safe_remove)
+        """Add a future to the task group of an app. It removes itself from the group after it finishes."""
+        if (group := self.futures.get(app_name)) is None:
+            group = self.futures[app_name] = AppTaskGroup(app_name)
+        group.add(future)
         if isinstance(future, asyncio.Task):
             self.logger.debug(f"Registered a task for {app_name}: {future.get_name()}")
         else:
@@ -42,6 +82,17 @@ class Futures:
                 self.logger.debug(f"Cancelling future {future}")
             future.cancel()
 
-    def cancel_futures(self, app_name: str):
-        for f in self.futures.pop(app_name, []):
-            self.cancel_future(f)
+    def cancel_futures(self, app_name: str) -> list[asyncio.Future]:
+        """Cancels the task group of an app without waiting for it, and returns what was cancelled"""
+        if (group := self.futures.pop(app_name, None)) is None:
+            return []
+        self.logger.debug(f"Cancelling {len(group)} tasks for {app_name}")
+        return group.cancel()
+
+    async def cancel_and_wait(self, app_name: str) -> None:
+        """Cancels the task group of an app and waits for the tasks to finish, for up to :attr:`CANCEL_TIMEOUT`"""
+        if (group := self.futures.get(app_name)) is None:
+            return
+        cancelled = self.cancel_futures(app_name)
+        if pending := await group.wait(cancelled, self.CANCEL_TIMEOUT):
+            self.logger.warning(f"{len(pending)} tasks for {app_name} didn't finish after being cancelled")
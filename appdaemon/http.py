@@ -20,6 +20,7 @@ import appdaemon.admin as adadmin
 import appdaemon.dashboard as addashboard
 import appdaemon.stream.adstream as stream
 import appdaemon.utils as utils
+from appdaemon import json_codec
 
 from . import exceptions as ade
 
@@ -654,12 +655,28 @@ class HTTP:
             self.logger.warning("-" * 60)
             return self.get_response(request, 500, "Unexpected error in get_logs()")
 
+    @securedata
+    async def get_memory(self, request):
+        try:
+            self.logger.debug("get_memory() called")
+
+            report = await self.AD.memory.report()
+
+            return web.json_response({"memory": report}, dumps=utils.convert_json)
+        except Exception:
+            self.logger.warning("-" * 60)
+            self.logger.warning("Unexpected error in get_memory()")
+            self.logger.warning("-" * 60)
+            self.logger.warning(traceback.format_exc())
+            self.logger.warning("-" * 60)
+            return self.get_response(request, 500, "Unexpected error in get_memory()")
+
     # noinspection PyUnusedLocal
     @securedata
     async def call_service(self, request):
         try:
             try:
-                data = await request.json()
+                data = await request.json(loads=json_codec.loads)
             except json.decoder.JSONDecodeError:
                 return self.get_response(request, 400, "JSON Decode Error")
 
@@ -687,7 +704,7 @@ class HTTP:
                         y = m.group(2)
                         args["xy_color"] = [x, y]
                 elif key == "json_args":
-                    json_args = json.loads(data[key])
+                    json_args = json_codec.loads(data[key])
                     for k in json_args.keys():
                         args[k] = json_args[k]
                 else:
@@ -715,7 +732,7 @@ class HTTP:
     async def fire_event(self, request):
         try:
             try:
-                data = await request.json()
+                data = await request.json(loads=json_codec.loads)
             except json.decoder.JSONDecodeError:
                 return self.get_response(request, 400, "JSON Decode Error")
 
@@ -769,6 +786,7 @@ class HTTP:
         self.app.router.add_get("/api/appdaemon/state/", self.get_namespaces)
         self.app.router.add_get("/api/appdaemon/state", self.get_state)
         self.app.router.add_get("/api/appdaemon/logs", self.get_logs)
+        self.app.router.add_get("/api/appdaemon/memory", self.get_memory)
         self.app.router.add_post("/api/appdaemon/{endpoint}", self.call_app_endpoint)
         self.app.router.add_get("/api/appdaemon/{endpoint}", self.call_app_endpoint)
         self.app.router.add_get("/api/appdaemon", self.get_ad)
@@ -948,7 +966,7 @@ class HTTP:
 
             if request.method == "POST":
                 try:
-                    args = await request.json()
+                    args = await request.json(loads=json_codec.loads)
                 except json.decoder.JSONDecodeError:
                     return self.get_response(request, 400, "JSON Decode Error")
             else:
@@ -0,0 +1,45 @@
+"""JSON encoding and decoding for the websocket, HTTP and stream paths.
+
+``orjson`` is used when it's installed, otherwise everything falls back to the standard library. Both produce the same
+output for the usual data: anything that isn't natively JSON serializable, including ``datetime`` objects and
+dataclasses, is converted with ``str()``.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+backend: str = "json" if orjson is None else "orjson"
+"""Name of the library that's doing the work"""
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def dumpb(data: Any) -> bytes:
+    """Serializes to UTF-8 encoded JSON"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=str, option=_OPTIONS)
+        except TypeError:
+            # Things like integers that are too big for orjson
+            pass
+    return json.dumps(data, default=str).encode()
+
+
+def dumps(data: Any) -> str:
+    """Serializes to a JSON string"""
+    if orjson is not None:
+        return dumpb(data).decode()
+    return json.dumps(data, default=str)
+
+
+def loads(data: str | bytes | bytearray) -> Any:
+    """Deserializes JSON. Invalid JSON raises a ``json.JSONDecodeError`` with either backend."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
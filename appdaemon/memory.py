@@ -0,0 +1,160 @@
+import asyncio
+import itertools
+import sys
+from array import array
+from collections.abc import Mapping
+from logging import Logger
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .appdaemon import AppDaemon
+
+
+def approximate_size(obj: Any, sample_size: int, seen: set[int] | None = None) -> int:
+    """Approximate deep size of an object in bytes.
+
+    Only containers are followed (mappings, lists, tuples, sets and arrays), so references to app objects or AppDaemon
+    internals are counted as a single object instead of pulling in everything they can reach. Containers with more than
+    ``sample_size`` items are extrapolated from an evenly spaced sample of them, which keeps the cost bounded.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, array)) or not isinstance(obj, (Mapping, list, tuple, set, frozenset)):
+        return size
+    if not (count := len(obj)):
+        return size
+
+    sample = list(itertools.islice(obj, 0, None, max(count // sample_size, 1)))
+    sampled = sum(approximate_size(item, sample_size, seen) for item in sample)
+    if isinstance(obj, Mapping):
+        sampled += sum(approximate_size(obj[key], sample_size, seen) for key in sample)
+    return size + sampled * count // len(sample)
+
+
+class MemoryStats:
+    """Subsystem container for reporting approximately where AppDaemon's memory goes.
+
+    Reports are made from the event loop on demand, through the ``/api/appdaemon/memory`` endpoint, and periodically as
+    entities in the ``admin`` namespace if ``memory_stats_interval`` is set. Every container is sampled with up to
+    ``memory_sample_size`` items, so the reports are estimates.
+    """
+
+    AD: "AppDaemon"
+    """Reference to the AppDaemon container object
+    """
+    logger: Logger
+    """Standard python logger named ``AppDaemon._memory``
+    """
+    name: str = "_memory"
+    task: asyncio.Task | None
+    """The task that updates the admin entities periodically, if ``memory_stats_interval`` is set"""
+
+    def __init__(self, ad: "AppDaemon"):
+        self.AD = ad
+        self.logger = ad.logging.get_child(self.name)
+        self.task = None
+        if self.AD.memory_stats_interval is not None:
+            self.task = self.AD.loop.create_task(self.loop())
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+    async def terminate(self) -> None:
+        """Cancels the periodic update and waits for it to finish"""
+        self.stop()
+        if self.task is not None:
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    def size(self, obj: Any) -> int:
+        return approximate_size(obj, self.AD.memory_sample_size)
+
+    def namespaces(self) -> dict[str, dict[str, int]]:
+        return {
+            namespace: {"entities": len(entities), "bytes": self.size(entities)}
+            for namespace, entities in list(self.AD.state.state.items())
+        }
+
+    def apps(self) -> dict[str, dict[str, int]]:
+        callbacks = self.AD.callbacks.callbacks
+        schedule = self.AD.sched.schedule if self.AD.sched is not None else {}
+        futures = self.AD.futures.futures
+        apps = {}
+        for name in set(callbacks) | set(schedule) | set(futures):
+            app_callbacks = callbacks.get(name, {})
+            app_timers = schedule.get(name, {})
+            callbacks_bytes, timers_bytes = self.size(app_callbacks), self.size(app_timers)
+            apps[name] = {
+                "callbacks": len(app_callbacks),
+                "callbacks_bytes": callbacks_bytes,
+                "timers": len(app_timers),
+                "timers_bytes": timers_bytes,
+                "futures": len(futures.get(name, ())),
+                "bytes": callbacks_bytes + timers_bytes,
+            }
+        return apps
+
+    def threads(self) -> dict[str, dict[str, int]]:
+        threads = {}
+        for thread_id, thread in list(self.AD.threading.threads.items()):
+            q = thread["queue"]
+            # The queue is shared with the worker thread, so it's only read while holding its lock
+            with q.mutex:
+                backlog = len(q.queue)
+                sample = list(itertools.islice(q.queue, self.AD.memory_sample_size))
+            size = sum(self.size(item) for item in sample) * backlog // len(sample) if sample else 0
+            threads[thread_id] = {"backlog": backlog, "bytes": size}
+        return threads
+
+    def streams(self) -> dict[str, dict[str, int]]:
+        if self.AD.http is None or (stream := getattr(self.AD.http, "stream", None)) is None:
+            return {}
+
+        streams = {}
+        with stream.handlers_lock:
+            for handle, handler in stream.handlers.items():
+                request = getattr(handler.stream, "request", None)
+                transport = getattr(request, "transport", None)
+                streams[handler.client_name or handle] = {
+                    "subscriptions": sum(len(subs) for subs in handler.subscriptions.values()),
+                    "bytes": transport.get_write_buffer_size() if transport is not None else 0,
+                }
+        return streams
+
+    async def report(self) -> dict[str, dict[str, dict[str, int]]]:
+        """Approximate memory used by each namespace, app, worker thread queue and stream client. Each of them has the
+        number of ``bytes`` it uses, along with some counts. For stream clients, it's the data waiting to be sent."""
+        return {
+            "namespaces": self.namespaces(),
+            "apps": self.apps(),
+            "threads": self.threads(),
+            "streams": self.streams(),
+        }
+
+    async def update_admin_entities(self) -> None:
+        """Sets one entity in the ``admin`` namespace for each part of the report, with the total number of bytes as
+        the state and the details as attributes"""
+        report = await self.report()
+        for part, details in report.items():
+            await self.AD.state.set_state(
+                self.name,
+                "admin",
+                f"memory.{part}",
+                _silent=True,
+                state=sum(item["bytes"] for item in details.values()),
+                attributes=details,
+                replace=True,
+            )
+
+    async def loop(self) -> None:
+        while not self.AD.stopping:
+            await asyncio.sleep(self.AD.memory_stats_interval.total_seconds())
+            try:
+                await self.update_admin_entities()
+            except Exception:
+                self.logger.exception("Unexpected error updating the memory stats")
@@ -58,6 +58,16 @@ class AppConfig(BaseApp, extra="allow"):
     """Pin this app to a particular thread. This is used to ensure that the app is always run on the same thread."""
     pin_thread: int | None = None
     """Which thread ID to pin this app to."""
+    pin_by: Literal["app", "entity"] = "app"
+    """With ``entity``, the callbacks of this app are spread across all the threads by hashing their entity, so the
+    callbacks for each entity still run in order."""
+    callback_args: Literal["copy", "frozen"] | None = None
+    """Overrides the global ``callback_args`` setting for this app."""
+    async_max_concurrency: int | None = Field(default=None, gt=0)
+    """Maximum number of async callbacks of this app that can run at the same time."""
+    async_serialize_by_entity: bool = False
+    """Run the async callbacks of this app for the same entity one at a time and in order, while callbacks for different
+    entities still run concurrently."""
 
 
     log: str | None = None
@@ -90,6 +90,30 @@ class AppDaemonConfig(BaseModel, extra="allow"):
     use_stream: bool = False
     import_paths: list[Path] = Field(default_factory=list)
     namespaces: dict[str, NamespaceConfig] = Field(default_factory=dict)
+    namespace_save_interval: Annotated[
+        timedelta,
+        BeforeValidator(utils.parse_timedelta)
+    ] = Field(default_factory=lambda: timedelta(seconds=1))
+    """How often the entities that have changed in ``hybrid`` namespaces are written to disk"""
+    indexed_attributes: list[str] = Field(default_factory=lambda: ["device_class", "unit_of_measurement"])
+    """Attributes that have an index for ``query_entities``"""
+    memory_stats_interval: Annotated[
+        timedelta,
+        BeforeValidator(utils.parse_timedelta)
+    ] | None = None
+    """How often to update the memory stats entities in the ``admin`` namespace, if at all"""
+    memory_sample_size: int = Field(default=100, gt=0)
+    """Maximum number of items of each container that are looked at to estimate the memory it uses"""
+    compact_entities: bool = False
+    """Whether to store the entities in a compact, read-only form that uses less memory"""
+    state_history_size: int = Field(default=0, ge=0)
+    """Number of recent numeric states kept in memory for each entity, 0 to disable"""
+    state_snapshot: bool = False
+    """Whether to keep a snapshot of the namespaces on disk that is used to start the apps quickly on the next run"""
+    state_snapshot_interval: Annotated[
+        timedelta,
+        BeforeValidator(utils.parse_timedelta)
+    ] = Field(default_factory=lambda: timedelta(minutes=5))
     exclude_dirs: list[str] = Field(default_factory=list)
     cert_verify: bool = True
     disable_apps: bool = False
@@ -119,6 +143,13 @@ class AppDaemonConfig(BaseModel, extra="allow"):
     """Number of threads to use for pinned apps, allowing the user to section off a sub-pool just for pinned apps. By
     default all threads are used for pinned apps."""
     thread_duration_warning_threshold: float = 10
+    fast_async_callbacks: bool = False
+    """If ``True``, coroutine callbacks are run without updating the admin entities of the ``async`` thread before and
+    after each call. Their counts are kept in memory and published by the utility loop instead."""
+    callback_args: Literal["copy", "frozen"] = "copy"
+    """How the payloads of callbacks are passed to the apps. With ``copy``, each callback gets its own deep copy of the
+    state or event data. With ``frozen``, the payload is converted to read-only versions once per event, which are then
+    shared between all the callbacks for it. Can be overridden per app."""
     threadpool_workers: int = 10
     """Number of threads in AppDaemon's internal thread pool, which can be used to execute functions asynchronously in
     worker threads.
@@ -102,10 +102,39 @@ class HASSConfig(PluginConfig):
     """Default timeout for waiting for responses from the websocket connection"""
     suppress_log_messages: bool = False
     retry_secs: int = 5
+    reconnect_mode: Literal["restart", "resync"] = "restart"
+    """What happens when the connection to Home Assistant is lost. With ``restart``, the apps are stopped and started
+    again once it's back. With ``resync``, the apps keep running and the state is brought up to date on reconnect."""
+    retry_max_secs: int = 60
+    """Longest time to wait between connection attempts in ``resync`` mode, where the wait doubles after each one"""
+    reconnect_buffer: Annotated[
+        timedelta,
+        BeforeValidator(utils.parse_timedelta)
+    ] = Field(default_factory=lambda: timedelta(seconds=30))
+    """How long service calls wait for the connection to come back in ``resync`` mode before they fail"""
     services_sleep_time: int = 60
     """The sleep time in the background task that updates the internal list of available services every once in a while"""
     config_sleep_time: int = 60
     """The sleep time in the background task that updates the config metadata every once in a while"""
+    subscribe_all_events: bool = True
+    """If false, the plugin only subscribes to the event types that apps listen for, along with the ones it needs
+    itself, instead of every event from Home Assistant"""
+    subscribe_entities: bool = False
+    """If true, state changes are received through Home Assistant's compressed ``subscribe_entities`` stream instead of
+    ``state_changed`` events. This turns off ``subscribe_all_events`` unless it's set, and it can't be set to true."""
+    cache_registries: bool = False
+    """If true, the area, device, entity and label registries are kept in memory to answer the lookups like
+    ``area_entities()`` instead of rendering templates"""
+    command_websocket: bool = False
+    """If true, a second websocket is opened for commands like service calls, so that they aren't held up by the
+    events on the first one"""
+    max_concurrent_requests: int = Field(default=10, gt=0)
+    """Maximum number of REST requests that are sent to Home Assistant at the same time"""
+    rest_cache_ttl: Annotated[
+        timedelta,
+        BeforeValidator(utils.parse_timedelta)
+    ] = Field(default_factory=lambda: timedelta(0))
+    """How long the responses to GET requests to the REST API are re-used for. Disabled by default"""
 
     @field_validator("ha_key", mode="after")
     @classmethod
@@ -124,6 +153,13 @@ class HASSConfig(PluginConfig):
     def custom_validator(self):
         self = super().custom_validator()
         assert "token" in self.model_fields_set or "ha_key" in self.model_fields_set
+
+        if self.subscribe_entities:
+            # Subscribing to all events would get every state change a second time as a state_changed event
+            if "subscribe_all_events" not in self.model_fields_set:
+                self.subscribe_all_events = False
+            elif self.subscribe_all_events:
+                raise ValueError("subscribe_entities can't be used with subscribe_all_events")
         return self
 
     @property
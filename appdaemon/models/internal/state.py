@@ -1,3 +1,7 @@
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Hashable, Iterable, Mapping
 from datetime import datetime
 from typing import Any, Literal
 from pydantic import BaseModel, RootModel
@@ -25,3 +29,186 @@ class NamespaceState(RootModel):
 
 class AppDaemonState(RootModel):
     root: dict[str, NamespaceState]
+
+
+def is_hashable(value: Any) -> bool:
+    """Whether a value can be used as a key. A tuple is ``Hashable`` even if it has a list in it, so the only way to
+    know is to try."""
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class StateIndex:
+    """Secondary indexes of the entities in a namespace, by domain and by the values of some of their attributes.
+
+    Each index maps to a dict that is used as an ordered set of entity IDs.
+    """
+
+    __slots__ = ("attributes", "domains", "values", "entity_values")
+
+    attributes: tuple[str, ...]
+    """Names of the attributes that are indexed"""
+    domains: defaultdict[str, dict[str, None]]
+    values: defaultdict[tuple[str, Hashable], dict[str, None]]
+    """Entities by ``(attribute, value)``"""
+    entity_values: dict[str, tuple[tuple[str, Hashable], ...]]
+    """The ``(attribute, value)`` keys that each entity is currently indexed under"""
+
+    def __init__(self, attributes: Iterable[str], entities: Mapping[str, Any]):
+        self.attributes = tuple(attributes)
+        self.domains = defaultdict(dict)
+        self.values = defaultdict(dict)
+        self.entity_values = {}
+        for entity_id, state in entities.items():
+            self.update(entity_id, state)
+
+    def update(self, entity_id: str, state: Mapping[str, Any] | None) -> None:
+        """Updates the indexes for an entity. A state of ``None`` removes it."""
+        if state is None:
+            self.remove(entity_id)
+            return
+
+        self.domains[entity_id.split(".", 1)[0]][entity_id] = None
+
+        attributes = state.get("attributes") or {}
+        keys = tuple(
+            (attribute, attributes[attribute])
+            for attribute in self.attributes
+            if attribute in attributes and is_hashable(attributes[attribute])
+        )  # fmt: skip
+        if (old_keys := self.entity_values.get(entity_id, ())) == keys:
+            return
+
+        self._discard_values(entity_id, old_keys)
+        for key in keys:
+            self.values[key][entity_id] = None
+        if keys:
+            self.entity_values[entity_id] = keys
+        else:
+            self.entity_values.pop(entity_id, None)
+
+    def remove(self, entity_id: str) -> None:
+        domain = entity_id.split(".", 1)[0]
+        if (entities := self.domains.get(domain)) is not None:
+            entities.pop(entity_id, None)
+            if not entities:
+                del self.domains[domain]
+        self._discard_values(entity_id, self.entity_values.pop(entity_id, ()))
+
+    def _discard_values(self, entity_id: str, keys: Iterable[tuple[str, Hashable]]) -> None:
+        for key in keys:
+            if (entities := self.values.get(key)) is not None:
+                entities.pop(entity_id, None)
+                if not entities:
+                    del self.values[key]
+
+    def query(self, entities: Mapping[str, Any], domain: str | None = None, **attributes: Any) -> list[str]:
+        """Entity IDs in the given domain that have all the given attribute values.
+
+        Indexed attributes are looked up directly, and the smallest of the matching sets is used as the starting point.
+        Any attributes that aren't indexed are then checked on those entities only.
+
+        Args:
+            entities: The entities of the namespace, used to check the attributes that aren't indexed
+            domain: Optional domain of the entities
+            **attributes: Attribute values the entities need to have
+        """
+        candidates = []
+        if domain is not None:
+            candidates.append(self.domains.get(domain, {}))
+
+        remaining = {}
+        for attribute, value in attributes.items():
+            if attribute in self.attributes and is_hashable(value):
+                candidates.append(self.values.get((attribute, value), {}))
+            else:
+                remaining[attribute] = value
+
+        if candidates:
+            candidates.sort(key=len)
+            first, others = candidates[0], candidates[1:]
+            result = [entity_id for entity_id in first if all(entity_id in other for other in others)]
+        else:
+            result = list(entities)
+
+        if remaining:
+            result = [entity_id for entity_id in result if self._matches(entities[entity_id], remaining)]
+
+        return result
+
+    @staticmethod
+    def _matches(state: Mapping[str, Any], attributes: dict[str, Any]) -> bool:
+        entity_attributes = state.get("attributes") or {}
+        return all(
+            attribute in entity_attributes and entity_attributes[attribute] == value
+            for attribute, value in attributes.items()
+        )  # fmt: skip
+
+
+class EntityHistory:
+    """Ring buffer with the most recent numeric states of an entity and the timestamps of when they were set.
+
+    The values are kept in 2 arrays of doubles, which grow up to ``size`` and are then overwritten from the oldest.
+    """
+
+    __slots__ = ("size", "times", "values", "next")
+
+    size: int
+    times: array
+    values: array
+    next: int
+    """Position of the oldest value once the buffer is full"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.times = array("d")
+        self.values = array("d")
+        self.next = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def last(self) -> float | None:
+        if not self.values:
+            return None
+        return self.values[self.next - 1]
+
+    def append(self, ts: float, value: float) -> None:
+        if len(self.values) < self.size:
+            self.times.append(ts)
+            self.values.append(value)
+        else:
+            self.times[self.next] = ts
+            self.values[self.next] = value
+            self.next = (self.next + 1) % self.size
+
+    def window(self, since: float | None = None) -> tuple[array, array]:
+        """Timestamps and values from oldest to newest, optionally only the ones from ``since`` onwards"""
+        times = self.times[self.next :] + self.times[: self.next]
+        values = self.values[self.next :] + self.values[: self.next]
+        if since is not None:
+            start = bisect_left(times, since)
+            times, values = times[start:], values[start:]
+        return times, values
+
+    def stats(self, since: float | None = None) -> dict[str, float | int | None]:
+        """Statistics of the values, optionally only the ones from ``since`` onwards.
+
+        The ``rate`` is the change per second between the first and the last value.
+        """
+        times, values = self.window(since)
+        if not values:
+            return {"count": 0, "mean": None, "min": None, "max": None, "rate": None}
+        duration = times[-1] - times[0]
+        return {
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "min": min(values),
+            "max": max(values),
+            "rate": (values[-1] - values[0]) / duration if duration > 0 else 0.0,
+        }
+
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Literal
 from collections.abc import Callable
 
@@ -30,3 +30,36 @@ class EventDispatch:
     pin_app: bool
     pin_thread: int
     kwargs: dict[str, Any]
+
+
+@dataclass(slots=True)
+class CallbackMetrics:
+    """In-memory counters for callbacks that are run without updating the admin entities every time.
+
+    They are published to the admin entities by :meth:`~appdaemon.threads.Threading.publish_callback_metrics` and then
+    reset.
+    """
+
+    fired: int = 0
+    executed: int = 0
+    app_executed: dict[str, int] = field(default_factory=dict)
+    """Number of executed callbacks by app name"""
+    callback_fired: dict[str, int] = field(default_factory=dict)
+    """Number of fired callbacks by the name of their admin entity"""
+    callback_executed: dict[str, int] = field(default_factory=dict)
+    """Number of executed callbacks by the name of their admin entity"""
+
+    def record_fired(self, callback_entity: str) -> None:
+        self.fired += 1
+        self.callback_fired[callback_entity] = self.callback_fired.get(callback_entity, 0) + 1
+
+    def record_executed(self, app_name: str, callback_entity: str) -> None:
+        self.executed += 1
+        self.app_executed[app_name] = self.app_executed.get(app_name, 0) + 1
+        self.callback_executed[callback_entity] = self.callback_executed.get(callback_entity, 0) + 1
+
+    def reset(self) -> None:
+        self.fired = self.executed = 0
+        self.app_executed.clear()
+        self.callback_fired.clear()
+        self.callback_executed.clear()
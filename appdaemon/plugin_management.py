@@ -4,6 +4,7 @@ import datetime
 import importlib
 import sys
 import traceback
+from time import perf_counter
 from collections.abc import Generator, Iterable, Mapping
 from logging import Logger
 from pathlib import Path
@@ -71,7 +72,7 @@ class PluginBase(abc.ABC):
         self.bytes_recv = 0
         self.requests_sent = 0
         self.updates_recv = 0
-        self.last_check_ts = 0
+        self.last_check_ts = perf_counter()
 
     @property
     def namespace(self) -> str:
@@ -115,6 +116,21 @@ class PluginBase(abc.ABC):
         self.requests_sent += kwargs.get("requests_sent", 0)
         self.updates_recv += kwargs.get("updates_recv", 0)
 
+    async def perf_data(self) -> dict[str, Any]:
+        """Counters since the last time this was called, along with the ``duration`` they cover. Plugins can add their
+        own entries, which become attributes of the plugin's entity in the ``admin`` namespace."""
+        now = perf_counter()
+        data = {
+            "bytes_sent": self.bytes_sent,
+            "bytes_recv": self.bytes_recv,
+            "requests_sent": self.requests_sent,
+            "updates_recv": self.updates_recv,
+            "duration": now - self.last_check_ts,
+        }
+        self.bytes_sent = self.bytes_recv = self.requests_sent = self.updates_recv = 0
+        self.last_check_ts = now
+        return data
+
     @abc.abstractmethod
     async def get_updates(self):
         raise NotImplementedError
@@ -123,6 +139,10 @@ class PluginBase(abc.ABC):
     async def get_complete_state(self):
         raise NotImplementedError
 
+    def event_listeners_changed(self) -> None:
+        """Called whenever an event callback is added or removed, for plugins that subscribe to specific events"""
+        pass
+
     # @abc.abstractmethod
     async def remove_entity(self, namespace: str, entity: str) -> None:
         pass
@@ -204,6 +224,30 @@ class PluginBase(abc.ABC):
                     mode=UpdateMode.PLUGIN_RESTART
             ))
 
+    @utils.warning_decorator(error_text="Unexpected error during resync_plugin_state()")
+    async def resync_plugin_state(self, meta: dict, state: dict | None):
+        """Brings the AD internals up to date after the plugin reconnects, without restarting the apps
+
+        - updates the metadata
+        - reconciles the namespace state with a fresh copy, which fires ``state_changed`` events for any changes that
+          were missed in the meantime
+
+        Arguments:
+            meta (dict):
+            state (dict):
+        """
+        if self.AD.stopping:
+            return  # return early if stopping
+
+        await self.AD.plugins.refresh_update_time(self.name)
+        self.AD.plugins.process_meta(meta, self.name)
+
+        for ns in self.all_namespaces:
+            self.AD.plugins.plugin_meta[ns] = meta
+            if state is not None:
+                count = await self.AD.state.reconcile_namespace(ns, state)
+                self.logger.info("Resynced namespace '%s' after reconnecting, %s entities changed", ns, count)
+
 
 class PluginManagement:
     """Subsystem container for managing plugins"""
@@ -367,14 +411,15 @@ class PluginManagement:
         for plugin in self.plugin_objs:
             if hasattr(self.plugin_objs[plugin]["object"], "perf_data"):
                 p_data = await self.plugin_objs[plugin]["object"].perf_data()
+                duration = p_data.pop("duration")
+                counters = {key: p_data.pop(key) for key in ("bytes_sent", "bytes_recv", "requests_sent", "updates_recv")}
                 await self.AD.state.set_state(
                     "plugin",
                     "admin",
                     f"plugin.{self.get_plugin_from_namespace(plugin)}",
-                    bytes_sent_ps=round(p_data["bytes_sent"] / p_data["duration"], 1),
-                    bytes_recv_ps=round(p_data["bytes_recv"] / p_data["duration"], 1),
-                    requests_sent_ps=round(p_data["requests_sent"] / p_data["duration"], 1),
-                    updates_recv_ps=round(p_data["updates_recv"] / p_data["duration"], 1),
+                    _silent=True,
+                    **{f"{key}_ps": round(value / duration, 1) for key, value in counters.items()},
+                    **p_data,
                 )
 
     def process_meta(self, meta: dict, name: str):
@@ -426,17 +471,24 @@ class PluginManagement:
                 mode=UpdateMode.PLUGIN_FAILED
         ))
 
+    def notify_event_listeners_changed(self) -> None:
+        for plugin in self.plugin_objs.values():
+            plugin["object"].event_listeners_changed()
+
     def get_plugin_meta(self, namespace: str) -> dict:
         return self.plugin_meta.get(namespace, {})
 
     async def wait_for_plugins(self, timeout: float | None = None):
         """Waits for the user-configured plugin startup conditions.
 
-        Specifically, this waits for each of their ready events
+        Specifically, this waits for each of their ready events. Plugins whose namespaces were restored from the state
+        snapshot aren't waited for, so the apps can start against the snapshot while the plugin connects.
         """
         self.logger.info('Waiting for plugins to be ready')
         events: Generator[asyncio.Event, None, None] = (
-            plugin['object'].ready_event for plugin in self.plugin_objs.values()
+            plugin['object'].ready_event
+            for namespace, plugin in self.plugin_objs.items()
+            if namespace not in self.AD.state.snapshot_namespaces
         )
         tasks = [self.AD.loop.create_task(e.wait()) for e in events]
         if tasks:
@@ -484,13 +536,12 @@ class PluginManagement:
                     )
                 else:
                     if state is not None:
-                        if cfg.namespaces:
-                            ns = [cfg.namespace] + cfg.namespaces
-                        else:
-                            ns = cfg.namespace
-                        self.AD.state.update_namespace_state(ns, state)
+                        for ns in [cfg.namespace] + cfg.namespaces:
+                            count = await self.AD.state.reconcile_namespace(ns, state)
+                            if count:
+                                self.logger.debug("Refresh updated %s entities in namespace '%s'", count, ns)
                 finally:
-                    await self.refresh_update_time(plugin)
+                    await self.refresh_update_time(plugin.name)
 
     def required_meta_check(self):
         OK = True
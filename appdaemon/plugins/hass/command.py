@@ -0,0 +1,99 @@
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from aiohttp import WSMsgType
+
+from ... import json_codec
+from .tracker import RequestTracker
+
+if TYPE_CHECKING:
+    from .hassplugin import HassPlugin
+
+
+class CommandWebsocket:
+    """Second websocket connection to Home Assistant that's only used for commands.
+
+    The primary connection carries all the events, so a burst of them delays the results of anything sent on it.
+    Commands like service calls and registry queries are sent on this connection instead, which only ever receives
+    their results. It's opened after the primary connection is authenticated and uses the same session, so it's closed
+    along with it. Until it's ready, commands are sent on the primary connection.
+    """
+
+    COMMANDS = {"call_service", "fire_event", "get_states", "get_services", "get_config"}
+    """Request types that are sent on this connection, along with the registry queries"""
+
+    plugin: "HassPlugin"
+    ws: aiohttp.ClientWebSocketResponse | None
+    id: int
+    requests: RequestTracker
+    ready_event: asyncio.Event
+    _task: asyncio.Task | None
+
+    def __init__(self, plugin: "HassPlugin"):
+        self.plugin = plugin
+        self.logger = plugin.logger
+        self.ws = None
+        self.id = 0
+        self.requests = RequestTracker(plugin.AD.loop)
+        self.ready_event = asyncio.Event()
+        self._task = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_event.is_set()
+
+    def accepts(self, request: dict[str, Any]) -> bool:
+        """Whether a request should be sent on this connection"""
+        type_ = request.get("type", "")
+        return self.is_ready and (type_ in self.COMMANDS or type_.startswith("config/"))
+
+    def next_id(self) -> int:
+        self.id += 1
+        return self.id
+
+    def start(self) -> None:
+        """Opens the connection, unless it's already open"""
+        if self._task is None or self._task.done():
+            self._task = self.plugin.AD.loop.create_task(self.run())
+
+    async def run(self) -> None:
+        """Keeps the connection open for as long as the primary connection is"""
+        while not self.plugin.stopping and self.plugin.connect_event.is_set():
+            try:
+                await self.connect()
+            except Exception:
+                self.logger.exception("Error on the command websocket")
+            finally:
+                self.ready_event.clear()
+                self.ws = None
+                self.requests.drop_all()
+            if not self.plugin.stopping and self.plugin.connect_event.is_set():
+                self.logger.warning("Command websocket disconnected, retrying in %s seconds", self.plugin.config.retry_secs)
+                await asyncio.sleep(self.plugin.config.retry_secs)
+
+    async def connect(self) -> None:
+        async with self.plugin.session.ws_connect(self.plugin.config.websocket_url) as self.ws:
+            self.id = 0
+            async for msg in self.ws:
+                if msg.type is not WSMsgType.TEXT:
+                    if msg.type is WSMsgType.ERROR:
+                        self.logger.error("Error from the command websocket: %s", msg.data)
+                    continue
+                self.plugin.update_perf(bytes_recv=len(msg.data), updates_recv=1)
+                await self.process_message(json_codec.loads(msg.data))
+
+    async def process_message(self, resp: dict[str, Any]) -> None:
+        match resp:
+            case {"type": "result"}:
+                self.plugin.AD.loop.create_task(self.plugin.receive_result(resp, self.requests))
+            case {"type": "auth_required"}:
+                await self.ws.send_str(json_codec.dumps(self.plugin.config.auth_json))
+            case {"type": "auth_ok"}:
+                self.ready_event.set()
+                self.logger.info("Opened a separate websocket for commands")
+            case {"type": "auth_invalid", "message": msg}:
+                self.logger.error("Failed to authenticate the command websocket: %s", msg)
+                await self.ws.close()
+            case {"type": "pong", "id": resp_id}:
+                self.requests.resolve(resp_id, resp)
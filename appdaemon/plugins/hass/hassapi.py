@@ -1,4 +1,5 @@
 import re
+import threading
 from ast import literal_eval
 from collections.abc import Iterable
 from copy import deepcopy
@@ -52,10 +53,10 @@ class Hass(ADBase, ADAPI):
         #
         # Register specific constraints
         #
-        self.register_constraint("constrain_presence")
-        self.register_constraint("constrain_person")
-        self.register_constraint("constrain_input_boolean")
-        self.register_constraint("constrain_input_select")
+        self.register_constraint("constrain_presence", depends_on=lambda value: ("person", "device_tracker"))
+        self.register_constraint("constrain_person", depends_on=lambda value: ("person",))
+        self.register_constraint("constrain_input_boolean", depends_on=self._constraint_entities)
+        self.register_constraint("constrain_input_select", depends_on=self._constraint_entities)
 
     @utils.sync_decorator
     async def ping(self) -> float | None:
@@ -353,6 +354,12 @@ class Hass(ADBase, ADAPI):
     # Built-in constraints
     #
 
+    @staticmethod
+    def _constraint_entities(value: str | Iterable[str]) -> list[str]:
+        """Returns the entity IDs referenced by the value of an input constraint"""
+        values = [value] if isinstance(value, str) else list(value)
+        return [re.split(r',\s*', v)[0] for v in values]
+
     def constrain_presence(self, value: Literal["everyone", "anyone", "noone"] | None = None) -> bool:
         """Returns True if unconstrained"""
         match value.lower():
@@ -530,6 +537,58 @@ class Hass(ADBase, ADAPI):
         # We just wrap the ADAPI.call_service method here to add some additional arguments and docstrings
         return await super().call_service(*args, **kwargs)
 
+    @utils.sync_decorator
+    async def call_services(
+        self,
+        calls: Iterable[dict[str, Any]],
+        namespace: str | None = None,
+        hass_timeout: str | int | float | None = None,
+        suppress_log_messages: bool = False,
+    ) -> list[Any]:
+        """Calls several services at once.
+
+        With the Hass plugin, all the requests are sent over the websocket before waiting for any of the results, which
+        is much faster than calling the services one after another. Calls to the same service with the same arguments,
+        except for ``entity_id``, are merged into a single call for all of their entities, as long as the service
+        accepts a target. In other namespaces, the services are called one after another.
+
+        Args:
+            calls (Iterable[dict]): The service calls. Each one is a dict with a ``service`` key in the format
+                ``<domain>/<service>``, along with the arguments that would be passed to :meth:`call_service`.
+            namespace (str, optional): Namespace to call the services in. Defaults to the app's namespace.
+            hass_timeout (str | int | float, optional): Only applicable to the Hass plugin. Timeout for each of the
+                service calls, the same as in :meth:`call_service`.
+            suppress_log_messages (bool, optional): Only applicable to the Hass plugin. Applies to each of the service
+                calls, the same as in :meth:`call_service`.
+
+        Returns:
+            The result of each service call, in the same order. Calls that were merged share the same result.
+
+        Examples:
+            >>> self.call_services([
+                    {"service": "light/turn_on", "entity_id": "light.kitchen", "brightness": 255},
+                    {"service": "light/turn_on", "entity_id": "light.office", "brightness": 255},
+                    {"service": "switch/turn_off", "entity_id": "switch.fan"},
+                ])
+
+        """
+        namespace = namespace or self.namespace
+        match self.AD.plugins.get_plugin_object(namespace):
+            case HassPlugin() as plugin:
+                return await plugin.call_plugin_services(
+                    namespace,
+                    calls,
+                    hass_timeout=hass_timeout,
+                    suppress_log_messages=suppress_log_messages,
+                )
+            case _:
+                results = []
+                for call in calls:
+                    data = dict(call)
+                    domain, service = data.pop("service").split("/", 1)
+                    results.append(await self.AD.services.call_service(namespace, domain, service, data))
+                return results
+
     def get_service_info(self, service: str) -> dict | None:
         """Get some information about what kind of data the service expects to receive, which is helpful for debugging.
 
@@ -1383,7 +1442,21 @@ class Hass(ADBase, ADAPI):
             return result
 
     def _template_command(self, command: str, *args: str) -> str | list[str]:
-        """Internal AppDaemon function to format calling a single template command correctly."""
+        """Internal AppDaemon function to format calling a single template command correctly.
+
+        Commands that the plugin's registry cache has a lookup for are answered from it instead of rendering a template.
+        The answer is a copy, so that apps can't change the cache. Like the result of ``render_template``, it's returned
+        directly in the worker threads and as an awaitable in the event loop.
+        """
+        registry = getattr(self._plugin, "registry", None)
+        if registry is not None and registry.available and (lookup := getattr(registry, command, None)) is not None:
+            result = deepcopy(lookup(*args))
+            if self.AD.main_thread_id == threading.current_thread().ident:
+                future = self.AD.loop.create_future()
+                future.set_result(result)
+                return future
+            return result
+
         if len(args) == 0:
             return self.render_template(f'{{{{ {command}() }}}}')
         else:
@@ -1499,6 +1572,8 @@ class Hass(ADBase, ADAPI):
         See `label functions <https://www.home-assistant.io/docs/configuration/templating/#labels>`_ for more
         information.
         """
+        if input is None:
+            return self._template_command('labels')
         return self._template_command('labels', input)
 
     def label_id(self, lookup_value: str) -> str:
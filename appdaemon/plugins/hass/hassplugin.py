@@ -6,40 +6,38 @@ import asyncio
 import datetime
 import functools
 import json
+import logging
 import ssl
 from copy import deepcopy
 from dataclasses import dataclass, field
 from time import perf_counter
-from typing import Any, Literal, Optional
+from collections.abc import Iterable
+from typing import Any, Literal
 
 import aiohttp
 import aiohttp.client_exceptions
 import aiohttp.client_ws
 from aiohttp import ClientResponse, WSMsgType
-from pydantic import BaseModel
 
 import appdaemon.utils as utils
+from appdaemon import json_codec
 from appdaemon.appdaemon import AppDaemon
 from appdaemon.models.config.plugin import HASSConfig, StartupConditions
 from appdaemon.plugin_management import PluginBase
 
+from .command import CommandWebsocket
 from .exceptions import HAEventsSubError
 from .models import HASSMetaData
-from .utils import ServiceCallStatus, hass_check, looped_coro
-
-
-class HASSWebsocketResponse(BaseModel):
-    type: Literal["result", "auth_required", "auth_ok", "auth_invalid", "event"]
-    ha_version: Optional[str] = None
-    message: Optional[str] = None
-    id: Optional[int] = None
-    success: Optional[bool] = None
-    result: Optional[dict] = None
-
-
-class HASSWebsocketEvent(BaseModel):
-    event_type: str
-    data: dict
+from .registry import RegistryCache
+from .tracker import RequestTracker
+from .utils import (
+    ServiceCallStatus,
+    apply_compressed_diff,
+    buffered_hass_check,
+    expand_compressed_state,
+    hass_check,
+    looped_coro,
+)
 
 
 @dataclass
@@ -68,6 +66,8 @@ class HassPlugin(PluginBase):
     """http connection pool for general use"""
     ws: aiohttp.ClientWebSocketResponse
     """websocket dedicated for event loop"""
+    command_ws: CommandWebsocket | None
+    """Second websocket for commands, if ``command_websocket`` is enabled"""
     metadata: dict[str, Any]
     services: dict[
         str,            # Domain
@@ -78,11 +78,32 @@ class HassPlugin(PluginBase):
                 Any     # Field information
     ]]]
 
-    _result_futures: dict[int, asyncio.Future]
-    _silent_results: dict[int, bool]
+    requests: RequestTracker
+    """Websocket requests that are waiting for their results"""
     startup_conditions: list[StartupWaitCondition]
+    event_subscriptions: dict[str | None, int]
+    """IDs of the websocket subscriptions for each event type, where ``None`` is the subscription to all events"""
+    _retired_subscriptions: set[int]
+    _subscriptions_lock: asyncio.Lock
+    _subscriptions_pending: bool
+    registry: RegistryCache | None
+    """Local copies of the Home Assistant registries, if ``cache_registries`` is enabled"""
+    _inflight_gets: dict[tuple[str, str], asyncio.Task]
+    """GET requests that are in progress, keyed by endpoint and parameters, so identical ones can share a response"""
+    _get_cache: dict[tuple[str, str], tuple[float, Any]]
+    """Recent GET responses, along with the time they expire"""
+    entities_subscription: int | None
+    """ID of the ``subscribe_entities`` subscription, if there is one"""
+    _entities_initialized: bool
+    _entities_lock: asyncio.Lock
+    """Processes the ``subscribe_entities`` messages one at a time, because each one is applied to the local state
+    that the ones before it left"""
 
     start: float
+    _reconnect_attempts: int
+    _disconnected_at: float | None
+    """Time the connection was lost, while reconnecting in ``resync`` mode"""
+    _background_started: bool
 
     first_time: bool = True
     stopping: bool = False
@@ -93,9 +114,22 @@ class HassPlugin(PluginBase):
         self.id = 0
         self.metadata = {}
         self.services = {}
-        self._result_futures = {}
-        self._silent_results = {}
+        self.requests = RequestTracker(self.AD.loop)
+        self.command_ws = CommandWebsocket(self) if config.command_websocket else None
         self.startup_conditions = []
+        self.event_subscriptions = {}
+        self._retired_subscriptions = set()
+        self._subscriptions_lock = asyncio.Lock()
+        self._subscriptions_pending = False
+        self.registry = RegistryCache(self) if config.cache_registries else None
+        self._reconnect_attempts = 0
+        self._disconnected_at = None
+        self._background_started = False
+        self._inflight_gets = {}
+        self._get_cache = {}
+        self.entities_subscription = None
+        self._entities_initialized = False
+        self._entities_lock = asyncio.Lock()
 
         # Internal state flags
         self.stopping = False
@@ -113,16 +147,25 @@ class HassPlugin(PluginBase):
     def create_session(self) -> aiohttp.ClientSession:
         """Handles creating an ``aiohttp.ClientSession`` with the cert information from the plugin config
         and the authorization headers for the REST API.
+
+        The connection pool is limited to ``max_concurrent_requests`` REST requests at a time, plus the connections for
+        the websockets. Requests beyond that wait for a connection to be free, and connections are kept alive between
+        requests.
         """
+        websockets = 1 if self.command_ws is None else 2
+        pool = {
+            "limit_per_host": self.config.max_concurrent_requests + websockets,
+            "keepalive_timeout": 60,
+        }
         if self.config.cert_path is not None:
             ssl_context = ssl.create_default_context(capath=self.config.cert_path)
-            conn = aiohttp.TCPConnector(ssl_context=ssl_context, verify_ssl=self.config.cert_verify)
+            conn = aiohttp.TCPConnector(ssl_context=ssl_context, verify_ssl=self.config.cert_verify, **pool)
         else:
-            conn = aiohttp.TCPConnector(ssl=False)
+            conn = aiohttp.TCPConnector(ssl=False, **pool)
         return aiohttp.ClientSession(
             connector=conn,
             headers=self.config.auth_headers,
-            json_serialize=utils.convert_json,
+            json_serialize=json_codec.dumps,
         )
 
     async def websocket_msg_factory(self):
@@ -133,31 +176,47 @@ class HassPlugin(PluginBase):
         self.start = perf_counter()
         async with self.create_session() as self.session:
             async with self.session.ws_connect(self.config.websocket_url) as self.ws:
+                # Nothing from the previous connection will get a result, and the IDs start over
+                self.requests.drop_all()
                 self.id = 0
                 async for msg in self.ws:
                     self.update_perf(bytes_recv=len(msg.data), updates_recv=1)
                     yield msg
         self.connect_event.clear()
 
-    async def match_ws_msg(self, msg: aiohttp.WSMessage) -> dict:
+    async def match_ws_msg(self, msg: aiohttp.WSMessage) -> dict[str, Any] | None:
         """Wraps a match/case statement for the ``msg.type``"""
-        msg_json = msg.json()
+        message = None
         match msg.type:
             case WSMsgType.TEXT:
+                message = json_codec.loads(msg.data)
                 # create a separate task for processing messages to keep the message reading task unblocked
-                self.AD.loop.create_task(self.process_websocket_json(msg_json))
+                self.AD.loop.create_task(self.process_websocket_json(message))
             case WSMsgType.ERROR:
-                self.logger.error("Error from aiohttp websocket: %s", msg_json)
+                self.logger.error("Error from aiohttp websocket: %s", msg.data)
             case WSMsgType.CLOSE:
                 self.logger.debug("Received %s message", msg.type)
             case _:
                 self.logger.error("Unhandled websocket message type: %s", msg.type)
-        return msg_json
+        return message
 
     @utils.warning_decorator(error_text="Error during processing jSON", reraise=True)
     async def process_websocket_json(self, resp: dict[str, Any]) -> None:
-        """Wraps a match/case statement around the JSON received from the websocket"""
+        """Wraps a match/case statement around the JSON received from the websocket.
+
+        Events are by far the most common, so they're matched first.
+        """
         match resp:
+            case {"type": "event", "id": sub_id} if sub_id in self._retired_subscriptions:
+                pass # from a subscription that has been replaced
+            case {"type": "event", "id": sub_id, "event": event} if sub_id == self.entities_subscription:
+                await self.receive_entities(event)
+            case {"type": "event", "event": {"event_type": "state_changed"}} if self.config.subscribe_entities:
+                pass # state changes come from the subscribe_entities stream instead
+            case {"type": "event", "event": event}:
+                await self.receive_event(event)
+            case {"type": "result"}:
+                await self.receive_result(resp)
             case {"type": "auth_required", "ha_version": ha_version}:
                 self.logger.info("Connected to Home Assistant %s with aiohttp websocket", ha_version)
                 # Use await here so that nothing else can happen until the post connection stuff is done
@@ -172,12 +231,7 @@ class HassPlugin(PluginBase):
             case {"type": "ping"}:
                 await self.ping()
             case {"type": "pong", "id": resp_id}:
-                if future := self._result_futures.get(resp_id):
-                    future.set_result(resp)
-            case {"type": "result"}:
-                await self.receive_result(resp)
-            case {"type": "event", "event": event}:
-                await self.receive_event(event)
+                self.requests.resolve(resp_id, resp)
             case {"type": type_}:
                 raise NotImplementedError(type_)
 
@@ -188,24 +242,29 @@ class HassPlugin(PluginBase):
 
     async def __post_auth__(self) -> None:
         """Initialization to do after getting authenticated on the websocket"""
-        res = await self.websocket_send_json(type="subscribe_events")
-        match res:
-            case {"success": True, "ad_duration": ad_duration}:
-                self.logger.debug(
-                    "Subscribed to Home Assistant events from the websocket in %s",
-                    utils.format_timedelta(ad_duration)
-                )
-            case {"success": False, "error": {"code": code, "message": msg}}:
-                raise HAEventsSubError(f'{code}: {msg}')
-            case _:
-                raise HAEventsSubError(f'Unknown response from subscribe_events: {res}')
+        if self.command_ws is not None:
+            self.command_ws.start()
+
+        self.event_subscriptions = {}
+        self._retired_subscriptions = set()
+        async with self._subscriptions_lock:
+            for event_type in self.wanted_event_types():
+                await self.subscribe_events(event_type)
 
-        config_coro = looped_coro(self.get_hass_config, self.config.config_sleep_time)
-        self.AD.loop.create_task(config_coro(self))
+        if self.config.subscribe_entities:
+            await self.subscribe_entities()
 
-        service_coro = looped_coro(self.get_hass_services, self.config.services_sleep_time)
-        self.AD.loop.create_task(service_coro(self))
+        if self.registry is not None:
+            await self.registry.load()
 
+        # These keep running across reconnects, so they're only started once
+        if not self._background_started:
+            self._background_started = True
+            config_coro = looped_coro(self.get_hass_config, self.config.config_sleep_time)
+            self.AD.loop.create_task(config_coro(self))
+
+            service_coro = looped_coro(self.get_hass_services, self.config.services_sleep_time)
+            self.AD.loop.create_task(service_coro(self))
 
         if self.first_time:
             conditions = self.config.appdaemon_startup_conditions
@@ -223,14 +282,160 @@ class HassPlugin(PluginBase):
             self.logger.info("Waiting for Home Assistant to start")
             await self.ready_event.wait()
 
-        await self.notify_plugin_started(
-            meta=await self.get_hass_config(),
-            state=await self.get_complete_state()
-        )
+        if self.first_time or self.config.reconnect_mode == "restart":
+            await self.notify_plugin_started(
+                meta=await self.get_hass_config(),
+                state=await self.get_complete_state()
+            )
+        else:
+            await self.resync_plugin_state(
+                meta=await self.get_hass_config(),
+                state=await self.get_complete_state()
+            )
         self.first_time = False
+        self._reconnect_attempts = 0
+        self._disconnected_at = None
 
         self.logger.info(f"Completed initialization in {self.time_str()}")
 
+    @property
+    def required_events(self) -> set[str]:
+        """Event types the plugin needs for itself, regardless of what the apps listen for"""
+        events = {"state_changed", "homeassistant_started", "service_registered"}
+        for conditions in (self.config.appdaemon_startup_conditions, self.config.plugin_startup_conditions):
+            if conditions is not None and conditions.event is not None:
+                events.add(conditions.event.event_type)
+        if self.config.subscribe_entities:
+            events.discard("state_changed")
+        if self.registry is not None:
+            events.update(RegistryCache.UPDATE_EVENTS)
+        return events
+
+    def wanted_event_types(self) -> set[str | None]:
+        """Event types to subscribe to. ``{None}`` means all of them, which is the case unless
+        ``subscribe_all_events`` is disabled, or if an app listens for every event."""
+        if self.config.subscribe_all_events:
+            return {None}
+        listened = self.AD.callbacks.event_types(self.all_namespaces)
+        if None in listened:
+            # This includes state_changed, which is dropped when it comes from the subscribe_entities stream instead
+            return {None}
+        if self.config.subscribe_entities:
+            listened.discard("state_changed")
+        return self.required_events | listened
+
+    async def subscribe_events(self, event_type: str | None = None) -> None:
+        """Subscribes to one type of event from the websocket, or all of them if ``event_type`` is ``None``"""
+        res = await self.websocket_send_json(type="subscribe_events", event_type=event_type)
+        match res:
+            case {"success": True, "id": sub_id, "ad_duration": ad_duration}:
+                self.event_subscriptions[event_type] = sub_id
+                self.logger.debug(
+                    "Subscribed to %s Home Assistant events from the websocket in %s",
+                    event_type or "all",
+                    utils.format_timedelta(ad_duration)
+                )
+            case {"success": False, "error": {"code": code, "message": msg}}:
+                raise HAEventsSubError(f'{code}: {msg}')
+            case _:
+                raise HAEventsSubError(f'Unknown response from subscribe_events: {res}')
+
+    def event_listeners_changed(self) -> None:
+        if self.config.subscribe_all_events or self._subscriptions_pending or not self.event_subscriptions:
+            return
+        self._subscriptions_pending = True
+        self.AD.loop.create_task(self.update_event_subscriptions())
+
+    @utils.warning_decorator(error_text="Unexpected error updating the event subscriptions")
+    async def update_event_subscriptions(self) -> None:
+        """Brings the websocket subscriptions in line with the event types that are wanted.
+
+        New subscriptions are made before the old ones are removed, so no events are missed in between. Events that
+        still arrive from a removed subscription are ignored.
+        """
+        async with self._subscriptions_lock:
+            self._subscriptions_pending = False
+            wanted = self.wanted_event_types()
+            for event_type in wanted - self.event_subscriptions.keys():
+                try:
+                    await self.subscribe_events(event_type)
+                except HAEventsSubError as e:
+                    self.logger.warning("Failed to subscribe to %s events: %s", event_type or "all", e)
+
+            for event_type in self.event_subscriptions.keys() - wanted:
+                sub_id = self.event_subscriptions.pop(event_type)
+                self._retired_subscriptions.add(sub_id)
+                await self.websocket_send_json(type="unsubscribe_events", subscription=sub_id, silent=True)
+                self.logger.debug("Unsubscribed from %s Home Assistant events", event_type or "all")
+
+    async def subscribe_entities(self) -> None:
+        """Subscribes to the compressed stream of entity changes, which replaces the ``state_changed`` events"""
+        self.entities_subscription = None
+        self._entities_initialized = False
+        res = await self.websocket_send_json(type="subscribe_entities")
+        match res:
+            case {"success": True, "id": sub_id, "ad_duration": ad_duration}:
+                self.entities_subscription = sub_id
+                self.logger.debug(
+                    "Subscribed to Home Assistant entities from the websocket in %s",
+                    utils.format_timedelta(ad_duration)
+                )
+            case {"success": False, "error": {"code": code, "message": msg}}:
+                raise HAEventsSubError(f'{code}: {msg}')
+            case _:
+                raise HAEventsSubError(f'Unknown response from subscribe_entities: {res}')
+
+    @utils.warning_decorator(error_text="Unexpected error during receive_entities")
+    async def receive_entities(self, message: dict[str, Any]) -> None:
+        """Turns a message from the ``subscribe_entities`` stream into ``state_changed`` events.
+
+        Messages have the full state of entities that were added under ``a``, the changes to existing entities under
+        ``c``, and the entities that were removed under ``r``. The old states come from the local copy of the namespace.
+        The first message has every entity in it, which is skipped because the complete state is loaded anyway when the
+        plugin starts.
+
+        Each message is processed in its own task, like everything else from the websocket, so they take turns with
+        :attr:`_entities_lock`. Otherwise a diff could be applied to a state that an earlier one hasn't updated yet.
+        """
+        async with self._entities_lock:
+            if not self._entities_initialized:
+                self._entities_initialized = True
+                return
+
+            for entity_id, compressed in message.get("a", {}).items():
+                old_state = self.local_state(entity_id)
+                await self.receive_state_changed(entity_id, old_state, expand_compressed_state(entity_id, compressed))
+
+            for entity_id, diff in message.get("c", {}).items():
+                if (old_state := self.local_state(entity_id)) is None:
+                    # There's nothing to apply the changes to, which happens before the complete state has been loaded
+                    continue
+                await self.receive_state_changed(entity_id, old_state, apply_compressed_diff(old_state, diff))
+
+            for entity_id in message.get("r", ()):
+                if (old_state := self.local_state(entity_id)) is not None:
+                    await self.receive_state_changed(entity_id, old_state, None)
+
+    def local_state(self, entity_id: str) -> dict[str, Any] | None:
+        """Copy of the state of an entity in the plugin's namespace, if it exists"""
+        return deepcopy(self.AD.state.state.get(self.namespace, {}).get(entity_id))
+
+    async def receive_state_changed(
+        self,
+        entity_id: str,
+        old_state: dict[str, Any] | None,
+        new_state: dict[str, Any] | None
+    ) -> None:
+        """Processes a ``state_changed`` event built from the ``subscribe_entities`` stream. The stream doesn't have
+        an origin for the changes, so the event doesn't either."""
+        current = new_state if new_state is not None else old_state
+        await self.receive_event({
+            "event_type": "state_changed",
+            "data": {"entity_id": entity_id, "old_state": old_state, "new_state": new_state},
+            "time_fired": current.get("last_updated"),
+            "context": current.get("context"),
+        })
+
     @hass_check
     async def ping(self, timeout: float = 1.0) -> dict[str, Any ] | None:
         """Method for testing response times over the websocket."""
@@ -238,19 +443,15 @@ class HassPlugin(PluginBase):
         return await self.websocket_send_json(timeout=timeout, type="ping")
 
     @utils.warning_decorator(error_text="Unexpected error during receive_result")
-    async def receive_result(self, resp: dict):
-        silent = self._silent_results.pop(resp["id"], False) or \
-            self.AD.config.suppress_log_messages
+    async def receive_result(self, resp: dict, requests: RequestTracker | None = None):
+        req = (requests or self.requests).resolve(resp["id"], resp)
+        silent = (req is not None and req.silent) or self.AD.config.suppress_log_messages
 
-        if (future := self._result_futures.pop(resp["id"], None)) is not None:
-            if not future.done():
-                future.set_result(resp)
-            else:
-                if not silent:
-                    self.logger.warning(f'Request already timed out for {resp["id"]}')
-        else:
-            if not silent:
-                self.logger.warning(f"Received result without a matching future: {resp}")
+        if not silent:
+            if req is None:
+                self.logger.warning(f"Received result without a matching request: {resp}")
+            elif req.expired:
+                self.logger.warning(f'Request already timed out for {resp["id"]}')
 
         if not silent:
             match resp["success"]:
@@ -263,7 +464,9 @@ class HassPlugin(PluginBase):
 
     @utils.warning_decorator(error_text="Unexpected error during receive_event")
     async def receive_event(self, event: dict[str, Any]) -> None:
-        self.logger.debug(f"Received event type: {event['event_type']}")
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug("Received event type: %s", event["event_type"])
 
         meta_attrs = {"origin", "time_fired", "context"}
         event["data"]["metadata"] = {a: val for a in meta_attrs if (val := event.pop(a, None)) is not None}
@@ -285,7 +488,11 @@ class HassPlugin(PluginBase):
             case {"event_type": "service_registered", "data": {"domain": domain, "service": service}}:
                 # https://data.home-assistant.io/docs/events/#service_registered
                 await self.check_register_service(domain, service, silent=True)
+            case {"event_type": event_type} if self.registry is not None and event_type in RegistryCache.UPDATE_EVENTS:
+                self.registry.registry_updated(event_type)
             # Everything below here is just for information/debug purposes
+            case _ if not debug:
+                pass
             case { #
                 "event_type": "call_service",
                 "data": {
@@ -350,12 +557,20 @@ class HassPlugin(PluginBase):
             self.logger.debug("Not connected to websocket, skipping JSON send.")
             return
 
+        # commands go on the second websocket if there is one and it's ready
+        command = self.command_ws is not None and self.command_ws.accepts(request)
+        ws, requests = (self.command_ws.ws, self.command_ws.requests) if command else (self.ws, self.requests)
+
         # auth requests don't have an id field assigned
         if not request.get("type") == "auth":
-            self.id += 1
-            request["id"] = self.id
+            if command:
+                request_id = self.command_ws.next_id()
+            else:
+                self.id += 1
+                request_id = self.id
+            request["id"] = request_id
 
-            if not silent:
+            if not silent and self.logger.isEnabledFor(logging.DEBUG):
                 # include this in the "not auth" section so we don't accidentally put the token in the logs
                 req_json = json.dumps(request, indent=4)
                 for i, line in enumerate(req_json.splitlines()):
@@ -364,9 +579,12 @@ class HassPlugin(PluginBase):
                     else:
                         self.logger.debug(line)
 
+        # Home Assistant only accepts text frames, so the request is serialized to a str. It's only encoded again to
+        # count the bytes that were sent.
+        payload = json_codec.dumps(request)
         send_time = perf_counter()
         try:
-            await self.ws.send_json(request)
+            await ws.send_str(payload)
         # happens when the connection closes in the middle, which could be during shutdown
         except ConnectionResetError:
             if self.stopping:
@@ -375,19 +593,17 @@ class HassPlugin(PluginBase):
             else:
                 raise # Something bad actually happened, so raise the exception
 
-        self.update_perf(bytes_sent=len(json.dumps(request)), requests_sent=1)
+        self.update_perf(bytes_sent=len(payload.encode()), requests_sent=1)
 
         match request:
             case {"type": "auth"}:
                 return
 
-        future = self.AD.loop.create_future()
-        self._result_futures[self.id] = future
-        self._silent_results[self.id] = silent
+        timeout = utils.parse_timedelta(self.config.ws_timeout if timeout is None else timeout)
+        future = requests.add(request_id, timeout.total_seconds(), silent)
 
         try:
-            timeout = utils.parse_timedelta(self.config.ws_timeout if timeout is None else timeout)
-            result: dict = await asyncio.wait_for(future, timeout=timeout.total_seconds())
+            result: dict = await future
         except asyncio.TimeoutError:
             ad_status = ServiceCallStatus.TIMEOUT
             result = {"success": False}
@@ -400,6 +616,8 @@ class HassPlugin(PluginBase):
                 self.logger.warning(f"AppDaemon started shut down while waiting for the response from the request: {request}")
         else:
             ad_status = ServiceCallStatus.OK
+        finally:
+            requests.discard(request_id)
 
         travel_time = perf_counter() - send_time
         result.update({
@@ -416,39 +634,78 @@ class HassPlugin(PluginBase):
         timeout: str | int | float | datetime.timedelta | None = 10,
         **kwargs
     ) -> str | dict[str, Any] | list[Any] | ClientResponse | None:
-        """
+        """Makes a request to the Home Assistant REST API.
+
+        GET requests that are identical to one that's already in progress wait for its response instead of making
+        another request, and their responses are cached for ``rest_cache_ttl`` if it's set. Any other request to an
+        endpoint drops the cached responses for it.
 
         https://developers.home-assistant.io/docs/api/rest
 
         Args:
-            typ (Literal['get', 'post', 'delete']): Type of HTTP method to use
+            method (Literal['get', 'post', 'delete']): Type of HTTP method to use
             endpoint (str): Home Assistant REST endpoint to use. For example '/api/states'
             timeout (float, optional): Timeout for the method in seconds. Defaults to 10s.
             **kwargs (optional): Zero or more keyword arguments. These get used as the data
                 for the method, as appropriate.
 
-        Raises:
-            NotImplementedError: _description_
-
         Returns:
-            dict | None: _description_
+            The decoded response, or ``None`` if the request failed
+        """
+        if method.lower() != 'get':
+            for key in [key for key in self._get_cache if key[0] == endpoint]:
+                del self._get_cache[key]
+            return await self.http_request(method, endpoint, timeout, **kwargs)
+
+        key = (endpoint, json_codec.dumps(kwargs))
+        if (cached := self._get_cache.get(key)) is not None:
+            expires, resp = cached
+            if perf_counter() < expires:
+                return deepcopy(resp)
+            del self._get_cache[key]
+
+        if (task := self._inflight_gets.get(key)) is None:
+            task = self.AD.loop.create_task(self.http_request(method, endpoint, timeout, **kwargs))
+            self._inflight_gets[key] = task
+            task.add_done_callback(lambda _: self._inflight_gets.pop(key, None))
+
+        # Shielded so that one of the callers being cancelled doesn't cancel the request for the others
+        resp = await asyncio.shield(task)
+        if isinstance(resp, (dict, list)):
+            if (ttl := self.config.rest_cache_ttl.total_seconds()) > 0 and key not in self._get_cache:
+                now = perf_counter()
+                self._get_cache = {k: cached for k, cached in self._get_cache.items() if cached[0] > now}
+                self._get_cache[key] = (now + ttl, resp)
+            # Every caller gets its own copy, since they might modify it
+            return deepcopy(resp)
+        return resp
+
+    async def http_request(
+        self,
+        method: Literal['get', 'post', 'delete'],
+        endpoint: str,
+        timeout: str | int | float | datetime.timedelta | None = 10,
+        **kwargs
+    ) -> str | dict[str, Any] | list[Any] | ClientResponse | None:
+        """Sends a single request to the Home Assistant REST API, without any sharing or caching. Takes the same
+        arguments as :meth:`http_method`.
         """
         kwargs = utils.clean_kwargs(**kwargs)
         url = utils.make_endpoint(self.config.ha_url, endpoint)
 
         try:
-            self.update_perf(
-                bytes_sent=len(url) + len(json.dumps(kwargs).encode('utf-8')),
-                requests_sent=1
-            )
+            # Serialized once, both to send and to count the bytes
+            payload = json_codec.dumpb(kwargs)
+            self.update_perf(bytes_sent=len(url) + len(payload), requests_sent=1)
             self.logger.debug(f'Hass {method.upper()} {endpoint}: {kwargs}')
+            headers = {'Content-Type': 'application/json'}
             match method.lower():
                 case 'get':
                     coro = self.session.get(url=url, params=kwargs)
                 case 'post':
-                    coro = self.session.post(url=url, json=kwargs)
+                    coro = self.session.post(url=url, data=payload, headers=headers)
                 case 'delete':
-                    coro = self.session.delete(url=url, json=kwargs)
+                    coro = self.session.delete(url=url, data=payload, headers=headers)
                 case _:
                     raise ValueError(f'Invalid method: {method}')
             timeout = utils.parse_timedelta(timeout)
@@ -460,16 +717,18 @@ class HassPlugin(PluginBase):
         except aiohttp.ServerDisconnectedError:
             self.logger.error("HASS disconnected unexpectedly during %s to %s", method.upper(), url)
         else:
-            self.update_perf(bytes_recv=resp.content_length, updates_recv=1)
+            # Chunked responses don't have a content length, so the body is read first to count it
+            body = await resp.read()
+            self.update_perf(bytes_recv=resp.content_length or len(body), updates_recv=1)
             match resp.status:
                 case 200 | 201:
                     if endpoint.endswith('template'):
                         return await resp.text()
                     else:
-                        return await resp.json()
+                        return await resp.json(loads=json_codec.loads)
                 case 400 | 401 | 403 | 404 | 405:
                     try:
-                        msg = (await resp.json())["message"]
+                        msg = (await resp.json(loads=json_codec.loads))["message"]
                     except Exception:
                         msg = await resp.text()
                     self.logger.error(f"Bad response from {url}: {msg}")
@@ -545,17 +804,24 @@ class HassPlugin(PluginBase):
             # except HAEventsSubError:
             #     pass
             except Exception:
+                self.connect_event.clear()
                 if not self.stopping:
-                    self.logger.warning(
-                        "Disconnected from Home Assistant, retrying in %s seconds",
-                        self.config.retry_secs,
-                    )
-                    if self.is_ready:
+                    resync = self.config.reconnect_mode == "resync"
+                    if resync:
+                        # Exponential backoff, and the apps keep running while reconnecting
+                        delay = min(self.config.retry_secs * 2 ** self._reconnect_attempts, self.config.retry_max_secs)
+                        self._reconnect_attempts += 1
+                        if not self.first_time and self._disconnected_at is None:
+                            self._disconnected_at = perf_counter()
+                    else:
+                        delay = self.config.retry_secs
+                    self.logger.warning("Disconnected from Home Assistant, retrying in %s seconds", delay)
+                    if self.is_ready and not resync:
                         # Will only run the first time through the loop after a failure
                         await self.AD.plugins.notify_plugin_stopped(self.name, self.namespace)
                     self.ready_event.clear()
 
-                    await asyncio.sleep(self.config.retry_secs)
+                    await asyncio.sleep(delay)
 
             # always do this block, no matter what
             finally:
@@ -564,6 +830,33 @@ class HassPlugin(PluginBase):
 
         self.logger.info("Disconnecting from Home Assistant")
 
+    async def perf_data(self) -> dict[str, Any]:
+        """Adds the websocket request counters and latency histogram to the standard performance data"""
+        data = {**await super().perf_data(), **self.requests.report()}
+        if self.command_ws is not None:
+            data.update({f"command_{key}": value for key, value in self.command_ws.requests.report().items()})
+        return data
+
+    @property
+    def reconnecting(self) -> bool:
+        """Whether the connection was lost in ``resync`` mode and hasn't been re-established yet"""
+        return self._disconnected_at is not None
+
+    async def wait_for_reconnect(self) -> bool:
+        """Waits for the plugin to reconnect, for up to ``reconnect_buffer`` after the connection was lost.
+
+        Returns:
+            ``True`` if the plugin is connected again
+        """
+        if not self.reconnecting or self.stopping:
+            return self.is_ready
+        remaining = self.config.reconnect_buffer.total_seconds() - (perf_counter() - self._disconnected_at)
+        try:
+            await asyncio.wait_for(self.ready_event.wait(), timeout=max(remaining, 0))
+        except asyncio.TimeoutError:
+            return False
+        return True
+
     def _check_for_service(self, domain: str, service: str) -> bool:
         return service in self.AD.services.services.get(self.namespace, {}).get(domain, {})
 
@@ -674,7 +967,7 @@ class HassPlugin(PluginBase):
     # Services
     #
 
-    @hass_check
+    @buffered_hass_check
     async def call_plugin_service(
         self,
         namespace: str,
@@ -763,6 +1056,79 @@ class HassPlugin(PluginBase):
         )
         return await send_coro
 
+    @buffered_hass_check
+    async def call_plugin_services(
+        self,
+        namespace: str,
+        calls: Iterable[dict[str, Any]],
+        hass_timeout: str | int | float | None = None,
+        suppress_log_messages: bool = False,
+    ) -> list[Any]:
+        """Calls several services in Home Assistant at once.
+
+        The requests are all sent over the websocket before waiting for any of the results. Calls to the same service
+        with the same data, except for ``entity_id``, are merged into a single call that targets all of their entities
+        if the service accepts targets. An entity is never added to a call twice, so services like ``toggle`` still run
+        once per call.
+
+        Args:
+            namespace (str): Namespace for the plugin. Used as a sanity check.
+            calls (Iterable[dict]): Each call has a ``service`` key in the format ``<domain>/<service>``, and the rest of
+                it is used as the keyword arguments for :meth:`call_plugin_service`.
+            hass_timeout (str | int | float, optional): Applies to each of the calls.
+            suppress_log_messages (bool, optional): Applies to each of the calls.
+
+        Returns:
+            The result for each call, in the same order. Calls that were merged share the same result.
+        """
+        assert namespace == self.namespace
+
+        # Each group is a single service call: the domain, service and data for it, and the calls it's the result for
+        groups: list[tuple[str, str, dict[str, Any], list[int]]] = []
+        mergeable: dict[tuple[str, str, str], int] = {}
+        count = 0
+        for i, call in enumerate(calls):
+            count += 1
+            data = dict(call)
+            domain, service = data.pop("service").split("/", 1)
+            entity_id = data.get("entity_id")
+            if (
+                entity_id is not None
+                and "target" not in data
+                and "target" in self.services.get(domain, {}).get(service, {})
+            ):
+                ids = [entity_id] if isinstance(entity_id, str) else list(entity_id)
+                others = {k: v for k, v in data.items() if k != "entity_id"}
+                key = (domain, service, utils.convert_json(others, sort_keys=True))
+                if (index := mergeable.get(key)) is not None:
+                    merged_ids: list[str] = groups[index][2]["entity_id"]
+                    if not set(ids) & set(merged_ids):
+                        merged_ids.extend(ids)
+                        groups[index][3].append(i)
+                        continue
+                mergeable[key] = len(groups)
+                data["entity_id"] = ids
+            groups.append((domain, service, data, [i]))
+
+        self.logger.debug("Calling %s services with %s requests", count, len(groups))
+        group_results = await asyncio.gather(*(
+            self.call_plugin_service(
+                namespace,
+                domain,
+                service,
+                hass_timeout=hass_timeout,
+                suppress_log_messages=suppress_log_messages,
+                **data
+            )
+            for domain, service, data, _ in groups
+        ))
+
+        results = [None] * count
+        for (*_, indexes), result in zip(groups, group_results):
+            for i in indexes:
+                results[i] = result
+        return results
+
     #
     # Events
     #
@@ -837,6 +1203,23 @@ class HassPlugin(PluginBase):
 
         return await safe_set_state(self)
 
+    async def set_plugin_states(self, namespace: str, states: dict[str, dict[str, Any]]) -> dict[str, dict | None]:
+        """Sets the states of several entities with concurrent requests. The connection pool limits them to
+        ``max_concurrent_requests`` at a time.
+
+        Args:
+            namespace: Namespace of the entities
+            states: Maps each entity ID to the keyword arguments for :meth:`set_plugin_state`
+
+        Returns:
+            The result for each entity, which is ``None`` if its request failed
+        """
+        results = await asyncio.gather(*(
+            self.set_plugin_state(namespace, entity_id, **kwargs)
+            for entity_id, kwargs in states.items()
+        ))
+        return dict(zip(states, results))
+
     @utils.warning_decorator(error_text='Unexpected error getting state')
     async def get_plugin_state(
         self,
@@ -0,0 +1,217 @@
+import asyncio
+import unicodedata
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .hassplugin import HassPlugin
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes a name the same way Home Assistant does for looking up areas and labels by name"""
+    return unicodedata.normalize("NFKD", name).casefold().replace(" ", "")
+
+
+class RegistryCache:
+    """Local copies of the Home Assistant area, device, entity and label registries.
+
+    The registries are loaded over the websocket when the plugin connects, and each one is loaded again after Home
+    Assistant fires the ``*_registry_updated`` event for it. The lookups have the same names and give the same answers
+    as the `template functions <https://www.home-assistant.io/docs/configuration/templating/#areas>`__, without a
+    request to Home Assistant. Each registry is replaced rather than modified when it's reloaded, so they can be read
+    from the worker threads.
+    """
+
+    REGISTRIES = {"area": "area_id", "device": "id", "entity": "entity_id", "label": "label_id"}
+    """The name of each registry, along with the field its entries are keyed by"""
+    UPDATE_EVENTS = {f"{name}_registry_updated": name for name in REGISTRIES}
+    """The events that signal a change to each registry"""
+    RELOAD_DELAY: float = 1.0
+    """Time to wait for more changes after a registry is updated, since they usually come in bursts"""
+
+    plugin: "HassPlugin"
+    registries: dict[str, dict[str, dict[str, Any]]]
+    _pending: set[str]
+
+    def __init__(self, plugin: "HassPlugin"):
+        self.plugin = plugin
+        self.logger = plugin.logger
+        self.registries = {}
+        self._pending = set()
+
+    @property
+    def available(self) -> bool:
+        """Whether all the registries have been loaded"""
+        return all(name in self.registries for name in self.REGISTRIES)
+
+    @property
+    def areas_by_id(self) -> dict[str, dict[str, Any]]:
+        return self.registries["area"]
+
+    @property
+    def devices_by_id(self) -> dict[str, dict[str, Any]]:
+        return self.registries["device"]
+
+    @property
+    def entities_by_id(self) -> dict[str, dict[str, Any]]:
+        return self.registries["entity"]
+
+    @property
+    def labels_by_id(self) -> dict[str, dict[str, Any]]:
+        return self.registries["label"]
+
+    async def load(self, *names: str) -> None:
+        """Loads the given registries, or all of them"""
+        for name in names or self.REGISTRIES:
+            res = await self.plugin.websocket_send_json(type=f"config/{name}_registry/list", silent=True)
+            match res:
+                case {"success": True, "result": list() as entries}:
+                    key = self.REGISTRIES[name]
+                    self.registries = {**self.registries, name: {entry[key]: entry for entry in entries}}
+                    self.logger.debug("Loaded %s entries from the %s registry", len(entries), name)
+                case _:
+                    self.logger.warning("Failed to load the %s registry, the template functions will be used", name)
+
+    def registry_updated(self, event_type: str) -> None:
+        """Schedules the registry for an update event to be loaded again"""
+        if not self._pending:
+            self.plugin.AD.loop.create_task(self._reload())
+        self._pending.add(self.UPDATE_EVENTS[event_type])
+
+    async def _reload(self) -> None:
+        await asyncio.sleep(self.RELOAD_DELAY)
+        names, self._pending = self._pending, set()
+        await self.load(*names)
+
+    #
+    # Internal helpers
+    #
+
+    def _area_by_name(self, name: str) -> dict[str, Any] | None:
+        name = normalize_name(name)
+        return next((area for area in self.areas_by_id.values() if normalize_name(area["name"]) == name), None)
+
+    def _resolve_area_id(self, area_name_or_id: str) -> str | None:
+        if area_name_or_id in self.areas_by_id:
+            return area_name_or_id
+        if area := self._area_by_name(area_name_or_id):
+            return area["area_id"]
+
+    def _resolve_label_id(self, label_name_or_id: str) -> str | None:
+        if label_name_or_id in self.labels_by_id:
+            return label_name_or_id
+        return self.label_id(label_name_or_id)
+
+    def _entity_area_id(self, entity: dict[str, Any]) -> str | None:
+        if (area_id := entity.get("area_id")) is None and (device := self.devices_by_id.get(entity.get("device_id"))):
+            area_id = device.get("area_id")
+        return area_id
+
+    def _entity_ids_for_device(self, device_id: str) -> list[str]:
+        return [
+            entity_id
+            for entity_id, entity in self.entities_by_id.items()
+            if entity.get("device_id") == device_id and entity.get("disabled_by") is None
+        ]
+
+    #
+    # Devices
+    #
+
+    def device_entities(self, device_id: str) -> list[str]:
+        return self._entity_ids_for_device(device_id)
+
+    def device_attr(self, device_or_entity_id: str, attr_name: str) -> Any:
+        if entity := self.entities_by_id.get(device_or_entity_id):
+            device_or_entity_id = entity.get("device_id")
+        if device := self.devices_by_id.get(device_or_entity_id):
+            return device.get(attr_name)
+
+    def is_device_attr(self, device_or_entity_id: str, attr_name: str, attr_value: Any) -> bool:
+        return self.device_attr(device_or_entity_id, attr_name) == attr_value
+
+    def device_id(self, entity_id_or_device_name: str) -> str | None:
+        if entity := self.entities_by_id.get(entity_id_or_device_name):
+            return entity.get("device_id")
+        for device_id, device in self.devices_by_id.items():
+            if entity_id_or_device_name in (device.get("name_by_user"), device.get("name")):
+                return device_id
+
+    #
+    # Areas
+    #
+
+    def areas(self) -> list[str]:
+        return list(self.areas_by_id)
+
+    def area_id(self, lookup_value: str) -> str | None:
+        if area := self._area_by_name(lookup_value):
+            return area["area_id"]
+        if device := self.devices_by_id.get(lookup_value):
+            return device.get("area_id")
+        if entity := self.entities_by_id.get(lookup_value):
+            return self._entity_area_id(entity)
+
+    def area_name(self, lookup_value: str) -> str | None:
+        if area := self.areas_by_id.get(lookup_value):
+            return area["name"]
+        if device := self.devices_by_id.get(lookup_value):
+            area_id = device.get("area_id")
+        elif entity := self.entities_by_id.get(lookup_value):
+            area_id = self._entity_area_id(entity)
+        else:
+            return None
+        if area := self.areas_by_id.get(area_id):
+            return area["name"]
+
+    def area_entities(self, area_name_or_id: str) -> list[str]:
+        if (area_id := self._resolve_area_id(area_name_or_id)) is None:
+            return []
+        entity_ids = [entity_id for entity_id, entity in self.entities_by_id.items() if entity.get("area_id") == area_id]
+        for device_id in self.area_devices(area_id):
+            entity_ids.extend(
+                entity_id
+                for entity_id in self._entity_ids_for_device(device_id)
+                if self.entities_by_id[entity_id].get("area_id") is None
+            )
+        return entity_ids
+
+    def area_devices(self, area_name_or_id: str) -> list[str]:
+        if (area_id := self._resolve_area_id(area_name_or_id)) is None:
+            return []
+        return [device_id for device_id, device in self.devices_by_id.items() if device.get("area_id") == area_id]
+
+    #
+    # Labels
+    #
+
+    def labels(self, lookup_value: str | None = None) -> list[str]:
+        if lookup_value is None:
+            return list(self.labels_by_id)
+        for registry in (self.entities_by_id, self.devices_by_id, self.areas_by_id):
+            if entry := registry.get(lookup_value):
+                return list(entry.get("labels", ()))
+        return []
+
+    def label_id(self, lookup_value: str) -> str | None:
+        name = normalize_name(lookup_value)
+        for label_id, label in self.labels_by_id.items():
+            if normalize_name(label["name"]) == name:
+                return label_id
+
+    def label_name(self, lookup_value: str) -> str | None:
+        if label := self.labels_by_id.get(lookup_value):
+            return label["name"]
+
+    def _labelled(self, registry: dict[str, dict[str, Any]], label_name_or_id: str) -> list[str]:
+        if (label_id := self._resolve_label_id(label_name_or_id)) is None:
+            return []
+        return [key for key, entry in registry.items() if label_id in entry.get("labels", ())]
+
+    def label_areas(self, label_name_or_id: str) -> list[str]:
+        return self._labelled(self.areas_by_id, label_name_or_id)
+
+    def label_devices(self, label_name_or_id: str) -> list[str]:
+        return self._labelled(self.devices_by_id, label_name_or_id)
+
+    def label_entities(self, label_name_or_id: str) -> list[str]:
+        return self._labelled(self.entities_by_id, label_name_or_id)
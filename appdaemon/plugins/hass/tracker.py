@@ -0,0 +1,139 @@
+import asyncio
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any
+
+
+@dataclass(slots=True)
+class PendingRequest:
+    """A websocket request that's waiting for its result"""
+    id: int
+    future: asyncio.Future
+    sent: float
+    deadline: float
+    silent: bool = False
+    expired: bool = False
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """Counters for the websocket requests since they were last reported"""
+    completed: int = 0
+    timeouts: int = 0
+    dropped: int = 0
+    late: int = 0
+    unmatched: int = 0
+    latency_total: float = 0.0
+    latency_histogram: list[int] = field(default_factory=lambda: [0] * (len(RequestTracker.LATENCY_BUCKETS) + 1))
+
+
+class RequestTracker:
+    """Keeps track of the websocket requests that are waiting for their results.
+
+    Each request gets a deadline instead of its own timeout handle, and a single task sweeps through the requests
+    periodically to expire the ones that are past it. The sweep only runs while there are requests waiting. Expired
+    requests are remembered for a while so that a result that arrives after the deadline can be recognized as late.
+    """
+
+    SWEEP_INTERVAL: float = 0.1
+    """Time between sweeps for expired requests, which is also the resolution of the timeouts"""
+    EXPIRED_MAX: int = 1000
+    """Number of expired requests to remember for recognizing late results"""
+    LATENCY_BUCKETS: tuple[float, ...] = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    """Upper bounds of the latency histogram buckets in seconds. The last bucket is for anything slower."""
+
+    pending: dict[int, PendingRequest]
+    expired: dict[int, PendingRequest]
+    stats: RequestStats
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pending = {}
+        self.expired = {}
+        self.stats = RequestStats()
+        self._sweeper = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.pending)
+
+    def add(self, request_id: int, timeout: float, silent: bool = False) -> asyncio.Future:
+        """Starts tracking a request and returns the future for its result. The future gets an
+        ``asyncio.TimeoutError`` if the result doesn't arrive before the timeout."""
+        now = perf_counter()
+        future = self.loop.create_future()
+        self.pending[request_id] = PendingRequest(request_id, future, now, now + timeout, silent)
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = self.loop.create_task(self._sweep_loop())
+        return future
+
+    def resolve(self, request_id: int, result: dict[str, Any]) -> PendingRequest | None:
+        """Delivers the result for a request.
+
+        Returns:
+            The request the result is for, which has ``expired`` set if the result was late, or ``None`` if it's
+            unknown.
+        """
+        if (req := self.pending.pop(request_id, None)) is not None:
+            if not req.future.done():
+                req.future.set_result(result)
+            self._record_latency(perf_counter() - req.sent)
+            self.stats.completed += 1
+        elif (req := self.expired.pop(request_id, None)) is not None:
+            self.stats.late += 1
+        else:
+            self.stats.unmatched += 1
+        return req
+
+    def discard(self, request_id: int) -> None:
+        """Stops tracking a request, for example because the caller was cancelled"""
+        self.pending.pop(request_id, None)
+
+    def expire(self, now: float | None = None) -> None:
+        """Expires the requests that are past their deadline"""
+        now = perf_counter() if now is None else now
+        for req in [req for req in self.pending.values() if req.deadline <= now]:
+            self._expire(req)
+            self.stats.timeouts += 1
+
+    def drop_all(self) -> None:
+        """Expires all the requests, for when the connection is lost. Their results will never arrive, and the request
+        IDs start over with the next connection."""
+        for req in list(self.pending.values()):
+            self._expire(req)
+            self.stats.dropped += 1
+        self.expired.clear()
+
+    def report(self) -> dict[str, Any]:
+        """Counters since the last report, along with the current number of requests in flight"""
+        stats, self.stats = self.stats, RequestStats()
+        bounds = [f"le_{bound}" for bound in self.LATENCY_BUCKETS] + ["le_inf"]
+        return {
+            "requests_in_flight": self.in_flight,
+            "requests_completed": stats.completed,
+            "requests_timed_out": stats.timeouts,
+            "requests_dropped": stats.dropped,
+            "results_late": stats.late,
+            "results_unmatched": stats.unmatched,
+            "latency_avg": round(stats.latency_total / stats.completed, 4) if stats.completed else None,
+            "latency_histogram": dict(zip(bounds, stats.latency_histogram)),
+        }
+
+    def _expire(self, req: PendingRequest) -> None:
+        del self.pending[req.id]
+        req.expired = True
+        if not req.future.done():
+            req.future.set_exception(asyncio.TimeoutError())
+        self.expired[req.id] = req
+        if len(self.expired) > self.EXPIRED_MAX:
+            del self.expired[next(iter(self.expired))]
+
+    def _record_latency(self, latency: float) -> None:
+        self.stats.latency_total += latency
+        self.stats.latency_histogram[bisect_left(self.LATENCY_BUCKETS, latency)] += 1
+
+    async def _sweep_loop(self) -> None:
+        while self.pending:
+            await asyncio.sleep(self.SWEEP_INTERVAL)
+            self.expire()
@@ -1,7 +1,9 @@
 import asyncio
 import functools
+from copy import deepcopy
+from datetime import datetime, timezone
 from enum import Enum, auto
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from .hassplugin import HassPlugin
@@ -29,6 +31,23 @@ def looped_coro(coro, sleep_time: int | float):
     return loop
 
 
+def buffered_hass_check(func):
+    """Like ``hass_check``, except that while the plugin is reconnecting in ``resync`` mode, the call waits for the
+    connection to come back, for up to ``reconnect_buffer`` after it was lost.
+    """
+    @functools.wraps(func)
+    async def func_wrapper(self: "HassPlugin", *args, **kwargs):
+        if self.reconnecting and not await self.wait_for_reconnect():
+            self.logger.warning("Gave up waiting to reconnect to Home Assistant: %s", func.__name__)
+            return None
+        if not self.connect_event.is_set():
+            self.logger.warning("Attempt to call Home Assistant while disconnected: %s", func.__name__)
+            return None
+        return await func(self, *args, **kwargs)
+
+    return func_wrapper
+
+
 def hass_check(func):
     """Essentially swallows the function call if the Home Assistant plugin isn't connected, in which case the function will return None.
     """
@@ -44,3 +63,59 @@ def hass_check(func):
             return func(self, *args, **kwargs)
 
     return func_wrapper
+
+
+def _expand_timestamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def _expand_context(context: str | dict[str, Any] | None) -> dict[str, Any]:
+    match context:
+        case str():
+            return {"id": context, "parent_id": None, "user_id": None}
+        case dict():
+            return {"id": None, "parent_id": None, "user_id": None, **context}
+        case _:
+            return {"id": None, "parent_id": None, "user_id": None}
+
+
+def expand_compressed_state(entity_id: str, compressed: dict[str, Any]) -> dict[str, Any]:
+    """Builds a full state dict from the compressed form that ``subscribe_entities`` sends for new entities.
+
+    https://developers.home-assistant.io/docs/api/websocket/#subscribe-to-entities
+    """
+    last_changed = _expand_timestamp(compressed["lc"])
+    return {
+        "entity_id": entity_id,
+        "state": compressed["s"],
+        "attributes": compressed.get("a", {}),
+        "last_changed": last_changed,
+        "last_updated": _expand_timestamp(compressed["lu"]) if "lu" in compressed else last_changed,
+        "context": _expand_context(compressed.get("c")),
+    }
+
+
+def apply_compressed_diff(old_state: dict[str, Any], diff: dict[str, Any]) -> dict[str, Any]:
+    """Builds the new state of an entity from its old state and the changes that ``subscribe_entities`` sends for it.
+
+    Additions are under ``+`` and removed attributes under ``-``. The old state isn't modified.
+    """
+    new_state = deepcopy(old_state)
+    if additions := diff.get("+"):
+        if "s" in additions:
+            new_state["state"] = additions["s"]
+        if "lc" in additions:
+            new_state["last_changed"] = new_state["last_updated"] = _expand_timestamp(additions["lc"])
+        if "lu" in additions:
+            new_state["last_updated"] = _expand_timestamp(additions["lu"])
+        if "c" in additions:
+            # Only the parts of the context that changed are sent
+            context = additions["c"]
+            changes = {"id": context} if isinstance(context, str) else context
+            new_state["context"] = {**_expand_context(new_state.get("context")), **changes}
+        if "a" in additions:
+            new_state.setdefault("attributes", {}).update(additions["a"])
+    if removals := diff.get("-"):
+        for attribute in removals.get("a", ()):
+            new_state.get("attributes", {}).pop(attribute, None)
+    return new_state
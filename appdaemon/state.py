@@ -1,20 +1,30 @@
+import asyncio
+import dbm
+import functools
+import os
+import pickle
 import threading
 import traceback
 import uuid
 from copy import copy, deepcopy
-from datetime import timedelta
+from datetime import datetime, timedelta
 from logging import Logger
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Protocol, Set, overload
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Protocol, Set, overload
 
 from . import exceptions as ade
 from . import utils
+from .models.internal.state import EntityHistory, StateIndex
 
 if TYPE_CHECKING:
     from .adbase import ADBase
     from .appdaemon import AppDaemon
 
 
+SNAPSHOT_VERSION = 1
+"""Format version of the state snapshot. Snapshots from other versions are ignored."""
+
+
 class StateCallback(Protocol):
     def __call__(self, entity: str, attribute: str, old: Any, new: Any, **kwargs: Any) -> None: ...
 
@@ -32,6 +42,18 @@ class State:
     state: dict[str, dict[str, Any]]
 
     app_added_namespaces: Set[str]
+    pending_saves: Set[str]
+    """Persistent namespaces that have a write scheduled"""
+    snapshot_namespaces: Set[str]
+    """Namespaces restored from the state snapshot that haven't been refreshed by their plugin yet"""
+    indexes: dict[str, StateIndex]
+    """Secondary indexes of the namespaces that have been queried. They're built on first use."""
+    history: dict[str, dict[str, EntityHistory]]
+    """Recent numeric states of the entities in each namespace, if ``state_history_size`` is set"""
+    tasks: set[asyncio.Task]
+    """Background tasks that save the namespaces and the snapshot, which are finished before the final save"""
+    loop_tasks: list[asyncio.Task]
+    """The periodic save loops, which are cancelled when AppDaemon stops"""
 
     def __init__(self, ad: "AppDaemon"):
         self.AD = ad
@@ -40,9 +62,15 @@ class State:
         self.logger = ad.logging.get_child(self.name)
         self.error = ad.logging.get_error()
         self.app_added_namespaces = set()
+        self.pending_saves = set()
+        self.indexes = {}
+        self.history = {}
+        self.tasks = set()
+        self.loop_tasks = []
 
         # Initialize User Defined Namespaces
         self.namespace_path.mkdir(exist_ok=True)
+        self.snapshot_namespaces = self.load_snapshot() if self.AD.state_snapshot else set()
         for ns_name, ns_cfg in self.AD.namespaces.items():
             if not self.namespace_exists(ns_name):
                 decorator = ade.wrap_async(
@@ -58,15 +86,23 @@ class State:
                 )
                 self.AD.loop.create_task(coro)
 
+        self.loop_tasks.append(self.create_task(self.save_loop()))
+        if self.AD.state_snapshot:
+            self.loop_tasks.append(self.create_task(self.snapshot_loop()))
+
     @property
     def namespace_path(self) -> Path:
         return self.AD.config_dir / "namespaces"
 
-    # @property
-    # def namespace_db_path(self) -> Path:
-    #     return self.namespace_path /
+    @property
+    def snapshot_path(self) -> Path:
+        return self.namespace_path / "snapshot.pickle"
 
     def namespace_db_path(self, namespace: str) -> Path:
+        return self.namespace_path / f"{namespace}.sqlite"
+
+    def legacy_namespace_db_path(self, namespace: str) -> Path:
+        """Path of the shelve database that was used for persistent namespaces before they moved to SQLite"""
         return self.namespace_path / f"{namespace}.db"
 
     async def add_namespace(
@@ -87,6 +123,7 @@ class State:
         else:
             nspath_file = None
             self.state[namespace] = {}
+        self.entity_updated(namespace)
 
         if name is not None:
             self.app_added_namespaces.add(namespace)
@@ -110,7 +147,10 @@ class State:
         Fires an ``__AD_NAMESPACE_REMOVED`` event in the ``admin`` namespace if it's actually removed.
         """
 
-        if self.state.pop(namespace, False):
+        if ns := self.state.pop(namespace, False):
+            if isinstance(ns, utils.SQLitePersistentDict):
+                ns.close()
+            self.entity_updated(namespace)
             nspath_file = await self.remove_persistent_namespace(namespace)
             self.app_added_namespaces.remove(namespace)
 
@@ -133,33 +173,57 @@ class State:
     async def add_persistent_namespace(self, namespace: str, writeback: str) -> Path:
         """Used to add a database file for a created namespace.
 
-        Needs to be an async method to make sure it gets run from the event loop in the
-        main thread. Otherwise, the DbfilenameShelf can get messed up because it's not
-        thread-safe. In some systems, it'll complain about being accessed from multiple
-        threads."""
+        Opening the database checks its integrity and can migrate an old shelve file, which can take a while for a
+        large namespace, so it's done in the executor by :meth:`open_persistent_namespace`.
+        """
 
-        if isinstance(self.state.get(namespace), utils.PersistentDict):
+        if isinstance(self.state.get(namespace), utils.SQLitePersistentDict):
             self.logger.info(f"Persistent namespace '{namespace}' already initialized")
             return
 
         ns_db_path = self.namespace_db_path(namespace)
         safe = writeback == "safe"
         try:
-            self.state[namespace] = utils.PersistentDict(ns_db_path, safe)
+            ns = await utils.run_in_executor(self, self.open_persistent_namespace, namespace, safe)
         except Exception as exc:
             raise ade.PersistentNamespaceFailed(namespace, ns_db_path) from exc
+
+        if isinstance(self.state.get(namespace), utils.SQLitePersistentDict):
+            # Opened by something else while this was waiting for the executor
+            ns.close()
+            return ns_db_path
+
+        if safe:
+            ns.on_change = functools.partial(self.schedule_namespace_save, namespace)
+        self.state[namespace] = ns
+        self.entity_updated(namespace)
         current_thread = threading.current_thread().getName()
         self.logger.info(f"Persistent namespace '{namespace}' initialized from {current_thread}")
         return ns_db_path
 
+    def open_persistent_namespace(self, namespace: str, safe: bool) -> utils.SQLitePersistentDict:
+        """Opens the database of a persistent namespace, and migrates the shelve file it used to have if it's new"""
+        ns = utils.SQLitePersistentDict(self.namespace_db_path(namespace), safe, self.logger)
+        legacy_path = self.legacy_namespace_db_path(namespace)
+        if not ns and dbm.whichdb(legacy_path.as_posix()):
+            count = ns.migrate_shelf(legacy_path)
+            # Depending on the dbm implementation, the shelf can be made of several files
+            for suffix in ("", ".db", ".dat", ".dir", ".bak", ".pag"):
+                if (path := Path(f"{legacy_path}{suffix}")).exists():
+                    path.rename(f"{path}.migrated")
+            self.logger.info(f"Migrated {count} entities of namespace '{namespace}' from {legacy_path}")
+        return ns
+
     @utils.executor_decorator
     def remove_persistent_namespace(self, namespace: str) -> Path:
-        """Used to remove the file for a created namespace"""
+        """Used to remove the files for a created namespace"""
 
         try:
             ns_db_path = self.namespace_db_path(namespace)
-            if ns_db_path.exists():
-                ns_db_path.unlink()
+            # The write-ahead log files go along with the database
+            for path in (ns_db_path, Path(f"{ns_db_path}-wal"), Path(f"{ns_db_path}-shm")):
+                if path.exists():
+                    path.unlink()
             return ns_db_path
         except Exception:
             self.logger.warning("-" * 60)
@@ -175,10 +239,39 @@ class State:
         if entity_dict := self.state.get(namespace):
             return list(entity_dict.keys())
 
+    def create_task(self, coro) -> asyncio.Task:
+        """Creates a background task that's kept in :attr:`tasks` until it's done"""
+        task = self.AD.loop.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def stop(self) -> None:
+        """Cancels the periodic save loops. Saves that are already running carry on."""
+        for task in self.loop_tasks:
+            task.cancel()
+
+    async def finish_tasks(self) -> None:
+        """Cancels the save loops and waits for the saves that were started to be written"""
+        self.stop()
+        # Let any saves that were scheduled from other threads start first
+        await asyncio.sleep(0)
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
     def terminate(self):
         self.logger.debug("terminate() called for state")
+        # A save that's still in progress could otherwise overwrite the final one with older values
+        if not self.AD.loop.is_closed() and not self.AD.loop.is_running():
+            self.AD.loop.run_until_complete(self.finish_tasks())
         self.logger.info("Saving all namespaces")
         self.save_all_namespaces()
+        if self.AD.state_snapshot:
+            self.logger.info("Saving state snapshot")
+            try:
+                self.write_snapshot(self.snapshot_state())
+            except Exception:
+                self.logger.warning("Unable to save the state snapshot: %s", traceback.format_exc())
 
     async def add_state_callback(
         self,
@@ -241,6 +334,7 @@ class State:
                 "pin_thread": pin_thread,
                 "kwargs": kwargs,
             }
+            self.AD.callbacks.add_state_listener(name, handle, kwargs.get("attribute"))
 
         #
         # If we have a timeout parameter, add a scheduler entry to delete the callback later
@@ -333,7 +427,8 @@ class State:
         executed = False
         async with self.AD.callbacks.callbacks_lock:
             if name in self.AD.callbacks.callbacks and handle in self.AD.callbacks.callbacks[name]:
-                del self.AD.callbacks.callbacks[name][handle]
+                callback = self.AD.callbacks.callbacks[name].pop(handle)
+                self.AD.callbacks.remove_state_listener(name, handle, callback["kwargs"].get("attribute"))
                 await self.AD.state.remove_entity("admin", f"state_callback.{handle}")
                 executed = True
 
@@ -377,94 +472,108 @@ class State:
             else:
                 raise ValueError("Invalid handle: {}".format(handle))
 
+    @staticmethod
+    def changed_keys(old_state: dict[str, Any] | None, new_state: dict[str, Any] | None) -> set[str]:
+        """Names of the top-level fields and of the attributes that differ between 2 versions of an entity's state.
+        Keys that were added or removed count as changed."""
+        old_state, new_state = old_state or {}, new_state or {}
+        changed = {
+            key
+            for key in old_state.keys() | new_state.keys()
+            if key != "attributes" and (
+                key not in old_state or key not in new_state or old_state[key] != new_state[key]
+            )
+        }  # fmt: skip
+        old_attrs, new_attrs = old_state.get("attributes") or {}, new_state.get("attributes") or {}
+        changed.update(
+            key
+            for key in old_attrs.keys() | new_attrs.keys()
+            if key not in old_attrs or key not in new_attrs or old_attrs[key] != new_attrs[key]
+        )  # fmt: skip
+        return changed
+
     async def process_state_callbacks(self, namespace, state):
+        """Dispatches the state callbacks for a ``state_changed`` event.
+
+        The fields and attributes that changed are worked out once for the event, and only the callbacks listening to
+        one of them, or to ``all``, are looked at. The others wouldn't see a change in the value they listen to.
+        """
         data = state["data"]
         entity_id = data["entity_id"]
         self.logger.debug(data)
         device, entity = entity_id.split(".")
+        changed = self.changed_keys(data["old_state"], data["new_state"])
 
         # Process state callbacks
 
         removes = []
+        frozen = None
         async with self.AD.callbacks.callbacks_lock:
-            for name in self.AD.callbacks.callbacks.keys():
-                for uuid_ in self.AD.callbacks.callbacks[name]:
-                    callback = self.AD.callbacks.callbacks[name][uuid_]
-                    if callback["type"] == "state" and (
-                        callback["namespace"] == namespace or
-                        callback["namespace"] == "global" or
-                        namespace == "global"
-                    ):
-                        cdevice = None
-                        centity = None
-                        if callback["entity"] is not None:
-                            if "." not in callback["entity"]:
-                                cdevice = callback["entity"]
-                                centity = None
-                            else:
-                                cdevice, centity = callback["entity"].split(".")
-                        if callback["kwargs"].get("attribute") is None:
-                            cattribute = "state"
+            listeners = [
+                listener
+                for attribute, attribute_listeners in self.AD.callbacks.state_listeners.items()
+                if attribute == "all" or attribute in changed
+                for listener in attribute_listeners
+            ]  # fmt: skip
+            for name, uuid_ in listeners:
+                callback = self.AD.callbacks.callbacks[name][uuid_]
+                if (
+                    callback["namespace"] == namespace or
+                    callback["namespace"] == "global" or
+                    namespace == "global"
+                ):  # fmt: skip
+                    cdevice = None
+                    centity = None
+                    if callback["entity"] is not None:
+                        if "." not in callback["entity"]:
+                            cdevice = callback["entity"]
+                            centity = None
                         else:
-                            cattribute = callback["kwargs"].get("attribute")
-
-                        cold = callback["kwargs"].get("old")
-                        cnew = callback["kwargs"].get("new")
-
-                        executed = False
-                        if cdevice is None:
-                            executed = await self.AD.threading.check_and_dispatch_state(
-                                name,
-                                callback["function"],
-                                entity_id,
-                                cattribute,
-                                data["new_state"],
-                                data["old_state"],
-                                cold,
-                                cnew,
-                                callback["kwargs"],
-                                uuid_,
-                                callback["pin_app"],
-                                callback["pin_thread"],
-                            )
-                        elif centity is None:
-                            if device == cdevice:
-                                executed = await self.AD.threading.check_and_dispatch_state(
-                                    name,
-                                    callback["function"],
-                                    entity_id,
-                                    cattribute,
-                                    data["new_state"],
-                                    data["old_state"],
-                                    cold,
-                                    cnew,
-                                    callback["kwargs"],
-                                    uuid_,
-                                    callback["pin_app"],
-                                    callback["pin_thread"],
-                                )
-
-                        elif device == cdevice and entity == centity:
-                            executed = await self.AD.threading.check_and_dispatch_state(
-                                name,
-                                callback["function"],
-                                entity_id,
-                                cattribute,
-                                data["new_state"],
-                                data["old_state"],
-                                cold,
-                                cnew,
-                                callback["kwargs"],
-                                uuid_,
-                                callback["pin_app"],
-                                callback["pin_thread"],
-                            )
-
-                        # Remove the callback if appropriate
-                        if executed is True:
-                            remove = callback["kwargs"].get("oneshot", False)
-                            if remove:
-                                removes.append({"name": callback["name"], "uuid": uuid_})
+                            cdevice, centity = callback["entity"].split(".")
+                    if callback["kwargs"].get("attribute") is None:
+                        cattribute = "state"
+                    else:
+                        cattribute = callback["kwargs"].get("attribute")
+
+                    cold = callback["kwargs"].get("old")
+                    cnew = callback["kwargs"].get("new")
+
+                    if cdevice is None:
+                        matched = True
+                    elif centity is None:
+                        matched = device == cdevice
+                    else:
+                        matched = device == cdevice and entity == centity
+
+                    executed = False
+                    if matched:
+                        new_state, old_state = data["new_state"], data["old_state"]
+                        if self.AD.threading.frozen_payloads(name):
+                            # Only freeze the states once per event, they're shared between all the callbacks
+                            if frozen is None:
+                                frozen = utils.freeze(new_state), utils.freeze(old_state)
+                            new_state, old_state = frozen
+
+                        executed = await self.AD.threading.check_and_dispatch_state(
+                            name,
+                            callback["function"],
+                            entity_id,
+                            cattribute,
+                            new_state,
+                            old_state,
+                            cold,
+                            cnew,
+                            callback["kwargs"],
+                            uuid_,
+                            callback["pin_app"],
+                            callback["pin_thread"],
+                        )
+
+                    # Remove the callback if appropriate
+                    if executed is True:
+                        remove = callback["kwargs"].get("oneshot", False)
+                        if remove:
+                            removes.append({"name": callback["name"], "uuid": uuid_})
 
         for remove in removes:
             await self.cancel_state_callback(remove["uuid"], remove["name"])
@@ -526,6 +635,7 @@ class State:
 
         if entity_id in self.state[namespace]:
             self.state[namespace].pop(entity_id)
+            self.entity_updated(namespace, entity_id)
             data = {"event_type": "__AD_ENTITY_REMOVED", "data": {"entity_id": entity_id}}
             self.AD.loop.create_task(self.AD.events.process_event(namespace, data))
 
@@ -550,7 +660,8 @@ class State:
             "attributes": attributes or {},
         }
 
-        self.state[namespace][entity] = state
+        self.state[namespace][entity] = self.compact(namespace, state)
+        self.entity_updated(namespace, entity)
 
         data = {
             "event_type": "__AD_ENTITY_ADDED",
@@ -585,16 +696,7 @@ class State:
         if entity_id is not None and "." in entity_id:
             if not self.entity_exists(namespace, entity_id):
                 return default
-            state = self.state[namespace][entity_id]
-            if attribute is None and "state" in state:
-                return maybe_copy(state["state"])
-            if attribute == "all":
-                return maybe_copy(state)
-            if attribute in state["attributes"]:
-                return maybe_copy(state["attributes"][attribute])
-            if attribute in state:
-                return maybe_copy(state[attribute])
-            return default
+            return maybe_copy(self.entity_value(self.state[namespace][entity_id], attribute, default))
 
         if attribute is not None:
             raise ValueError("{}: Querying a specific attribute is only possible for a single entity".format(name))
@@ -602,12 +704,132 @@ class State:
         if entity_id is None:
             return maybe_copy(self.state[namespace])
 
-        domain = entity_id.split(".", 1)[0]
+        entities = self.state[namespace]
         return {
-            entity_id: maybe_copy(state)
-            for entity_id, state in self.state[namespace].items()
-            if entity_id.split(".", 1)[0] == domain
-        }
+            entity_id: maybe_copy(entities[entity_id])
+            for entity_id in self.get_index(namespace).domains.get(entity_id, ())
+        }  # fmt: skip
+
+    async def get_states(
+        self,
+        name: str,
+        namespace: str,
+        entity_ids: Iterable[str],
+        attribute: str | None = None,
+        default: Any | None = None,
+        copy: bool = True,
+    ) -> dict[str, Any]:  # fmt: skip
+        """Gets the state or an attribute of several entities at once, with a single copy of the results.
+
+        Returns:
+            A dict that maps each entity ID to its result, which is the same as it would be from :meth:`get_state`
+        """
+        self.logger.debug("get_states: %s %s %s", name, attribute, default)
+        entities = self.state.get(namespace, {})
+        result = {
+            entity_id: self.entity_value(entities[entity_id], attribute, default) if entity_id in entities else default
+            for entity_id in entity_ids
+        }  # fmt: skip
+        return deepcopy(result) if copy else result
+
+    @staticmethod
+    def entity_value(state: dict[str, Any], attribute: str | None, default: Any) -> Any:
+        """Picks the state, an attribute or the whole state dict of an entity the same way as :meth:`get_state`"""
+        if attribute is None and "state" in state:
+            return state["state"]
+        if attribute == "all":
+            return state
+        if attribute in state["attributes"]:
+            return state["attributes"][attribute]
+        if attribute in state:
+            return state[attribute]
+        return default
+
+    def get_index(self, namespace: str) -> StateIndex:
+        """Gets the secondary indexes of a namespace, building them if needed"""
+        if (index := self.indexes.get(namespace)) is None:
+            index = self.indexes[namespace] = StateIndex(self.AD.indexed_attributes, self.state[namespace])
+        return index
+
+    def query_entities(self, namespace: str, domain: str | None = None, **attributes: Any) -> list[str]:
+        """Finds the entities in a namespace by domain and attribute values, using the secondary indexes.
+
+        Returns:
+            The matching entity IDs. The list is empty if the namespace doesn't exist.
+        """
+        if namespace not in self.state:
+            return []
+        return self.get_index(namespace).query(self.state[namespace], domain, **attributes)
+
+    def entity_updated(self, namespace: str, entity_id: str | None = None) -> None:
+        """Keeps the caches and indexes that are derived from the state up to date. Needs to be called from the event
+        loop whenever an entity is set or removed, or without an entity when a whole namespace is replaced.
+        """
+        self.AD.threading.invalidate_constraints(namespace, entity_id)
+        if (index := self.indexes.get(namespace)) is not None:
+            if entity_id is None:
+                # Rebuilt the next time it's needed
+                del self.indexes[namespace]
+            else:
+                index.update(entity_id, self.state[namespace].get(entity_id))
+
+        if entity_id is None:
+            if namespace not in self.state:
+                self.history.pop(namespace, None)
+        elif self.AD.state_history_size and namespace != "admin":
+            self.record_history(namespace, entity_id)
+
+    def record_history(self, namespace: str, entity_id: str) -> None:
+        """Adds the current state of an entity to its history if it's numeric and has changed"""
+        if (state := self.state.get(namespace, {}).get(entity_id)) is None:
+            self.history.get(namespace, {}).pop(entity_id, None)
+            return
+
+        try:
+            value = float(state.get("state"))
+        except (TypeError, ValueError):
+            return
+
+        ns_history = self.history.setdefault(namespace, {})
+        if (history := ns_history.get(entity_id)) is None:
+            history = ns_history[entity_id] = EntityHistory(self.AD.state_history_size)
+        elif history.last == value:
+            return
+        history.append(self.AD.sched.get_now_sync().timestamp(), value)
+
+    def get_history_since(self, window: timedelta | None) -> float | None:
+        if window is None:
+            return None
+        return self.AD.sched.get_now_sync().timestamp() - window.total_seconds()
+
+    def recent_history(
+        self,
+        namespace: str,
+        entity_id: str,
+        window: timedelta | None = None,
+    ) -> list[tuple[datetime, float]]:  # fmt: skip
+        """Recent numeric states of an entity from the in-memory history, oldest first.
+
+        Args:
+            namespace: Namespace of the entity
+            entity_id: Full entity ID
+            window: Only return the states from this far back. All of the history is returned if this is ``None``.
+        """
+        if (history := self.history.get(namespace, {}).get(entity_id)) is None:
+            return []
+        times, values = history.window(self.get_history_since(window))
+        return [(datetime.fromtimestamp(ts, self.AD.tz), value) for ts, value in zip(times, values)]
+
+    def history_stats(
+        self,
+        namespace: str,
+        entity_id: str,
+        window: timedelta | None = None,
+    ) -> dict[str, float | int | None]:  # fmt: skip
+        """Count, mean, min, max and rate of change per second of the recent numeric states of an entity"""
+        if (history := self.history.get(namespace, {}).get(entity_id)) is None:
+            history = EntityHistory(0)
+        return history.stats(self.get_history_since(window))
 
     def parse_state(
         self,
@@ -725,69 +947,192 @@ class State:
             replace:
         """
         self.logger.debug("set_state(): %s, %s", entity, kwargs)
-        if entity in self.state[namespace]:
-            old_state = deepcopy(self.state[namespace][entity])
-        else:
-            old_state = {"state": None, "attributes": {}}
-        new_state = self.parse_state(namespace, entity, **kwargs)
-        new_state["last_changed"] = utils.dt_to_str((await self.AD.sched.get_now()).replace(microsecond=0), self.AD.tz)
-        self.logger.debug("Old state: %s", old_state)
-        self.logger.debug("New state: %s", new_state)
+        new_states = await self.set_states(name, namespace, {entity: kwargs}, _silent)
+        return new_states[entity]
+
+    async def set_states(
+        self,
+        name: str,
+        namespace: str,
+        states: dict[str, dict[str, Any]],
+        _silent: bool = False,
+    ) -> dict[str, dict[str, Any]]:  # fmt: skip
+        """Sets the internal state of several entities at once.
+
+        All the states are worked out and stored in one go, and their ``state_changed`` events are fired in order from a
+        single task. Namespaces with a plugin that has a ``set_plugin_states`` method hand all the states to it at once,
+        so it can send them together.
+
+        Args:
+            name: Only used for log messages
+            namespace:
+            states: Maps each entity to the keyword arguments for it, which are the same as for :meth:`set_state`
+            _silent: Whether to skip the log message for entities that are created
 
-        if not self.entity_exists(namespace, entity):
-            await self.add_entity(namespace, entity, new_state.get("state"), new_state.get("attributes"))
-            if not _silent:
-                self.logger.info("%s: Entity %s created in namespace: %s", name, entity, namespace)
+        Returns:
+            The new state of each entity
+        """
+        now = utils.dt_to_str((await self.AD.sched.get_now()).replace(microsecond=0), self.AD.tz)
+        changes = {}
+        for entity, kwargs in states.items():
+            if entity in self.state[namespace]:
+                old_state = deepcopy(self.state[namespace][entity])
+            else:
+                old_state = {"state": None, "attributes": {}}
+            new_state = self.parse_state(namespace, entity, **kwargs)
+            new_state["last_changed"] = now
+            self.logger.debug("Old state: %s", old_state)
+            self.logger.debug("New state: %s", new_state)
+
+            if not self.entity_exists(namespace, entity):
+                await self.add_entity(namespace, entity, new_state.get("state"), new_state.get("attributes"))
+                if not _silent:
+                    self.logger.info("%s: Entity %s created in namespace: %s", name, entity, namespace)
+
+            changes[entity] = old_state, new_state
 
         # Fire the plugin's state update if it has one
 
         plugin = self.AD.plugins.get_plugin_object(namespace)
 
-        if set_plugin_state := getattr(plugin, "set_plugin_state", False):
-            # We assume that the state change will come back to us via the plugin
-            self.logger.debug("sending event to plugin")
-
-            result = await set_plugin_state(
+        if set_plugin_states := getattr(plugin, "set_plugin_states", False):
+            self.logger.debug("sending %s states to plugin", len(changes))
+            results = await set_plugin_states(
                 namespace,
-                entity,
-                state=new_state["state"],
-                attributes=new_state["attributes"]
+                {
+                    entity: {"state": new_state.get("state"), "attributes": new_state["attributes"]}
+                    for entity, (_, new_state) in changes.items()
+                },
             )
-            if result is not None:
-                if "entity_id" in result:
-                    result.pop("entity_id")
-                self.state[namespace][entity] = self.parse_state(namespace, entity, **result)
+        elif set_plugin_state := getattr(plugin, "set_plugin_state", False):
+            self.logger.debug("sending event to plugin")
+            results = {
+                entity: await set_plugin_state(
+                    namespace,
+                    entity,
+                    state=new_state.get("state"),
+                    attributes=new_state["attributes"]
+                )
+                for entity, (_, new_state) in changes.items()
+            }  # fmt: skip
         else:
-            # Set the state locally
-            self.state[namespace][entity] = new_state
-            # Fire the event locally
-            self.logger.debug("sending event locally")
-            data = {
-                "event_type": "state_changed",
-                "data": {"entity_id": entity, "new_state": new_state, "old_state": old_state},
-            }
+            results = None
+
+        if results is not None:
+            # We assume that the state changes will come back to us via the plugin
+            for entity, result in results.items():
+                if result is not None:
+                    result.pop("entity_id", None)
+                    plugin_state = self.parse_state(namespace, entity, **result)
+                    self.state[namespace][entity] = self.compact(namespace, plugin_state)
+                    self.entity_updated(namespace, entity)
+        else:
+            # Set the states locally
+            events = []
+            for entity, (old_state, new_state) in changes.items():
+                self.state[namespace][entity] = self.compact(namespace, new_state)
+                self.entity_updated(namespace, entity)
+                events.append({
+                    "event_type": "state_changed",
+                    "data": {"entity_id": entity, "new_state": new_state, "old_state": old_state},
+                })  # fmt: skip
 
             #
             # Schedule this rather than awaiting to avoid locking ourselves out
             #
-            # await self.AD.events.process_event(namespace, data)
-            self.AD.loop.create_task(self.AD.events.process_event(namespace, data))
+            self.logger.debug("sending %s events locally", len(events))
+            self.AD.loop.create_task(self.process_state_events(namespace, events))
 
-        return new_state
+        return {entity: new_state for entity, (_, new_state) in changes.items()}
+
+    async def process_state_events(self, namespace: str, events: list[dict[str, Any]]) -> None:
+        """Processes ``state_changed`` events one after the other"""
+        for data in events:
+            await self.AD.events.process_event(namespace, data)
+
+    def compact(self, namespace: str, state: Any) -> Any:
+        """Converts the state of an entity into its compact representation if ``compact_entities`` is enabled. The
+        ``admin`` namespace is never compacted."""
+        if self.AD.compact_entities and namespace != "admin":
+            return utils.compact_state(state)
+        return state
+
+    def compact_namespace(self, namespace: str, state: dict[str, Any]) -> dict[str, Any]:
+        """Same as :meth:`compact`, for a whole namespace. A new dictionary is returned if anything is compacted."""
+        if self.AD.compact_entities and namespace != "admin":
+            return {entity_id: utils.compact_state(entity) for entity_id, entity in state.items()}
+        return state
 
     def set_state_simple(self, namespace: str, entity_id: str, state: Any):
         """Set state without any checks or triggering amy events, and only if the entity exists"""
         if self.entity_exists(namespace, entity_id):
-            self.state[namespace][entity_id] = state
+            self.state[namespace][entity_id] = self.compact(namespace, state)
+            self.entity_updated(namespace, entity_id)
 
     async def set_namespace_state(self, namespace: str, state: Dict, persist: bool = False):
         if persist:
             await self.add_persistent_namespace(namespace, "safe")
-            self.state[namespace].update(state)
+            self.state[namespace].update(self.compact_namespace(namespace, state))
         else:
             # first in case it had been created before, it should be deleted
+            if isinstance(ns := self.state.get(namespace), utils.SQLitePersistentDict):
+                ns.close()
             await self.remove_persistent_namespace(namespace)
-            self.state[namespace] = state
+            if namespace in self.snapshot_namespaces:
+                self.snapshot_namespaces.discard(namespace)
+                await self.reconcile_namespace(namespace, state)
+            else:
+                self.state[namespace] = self.compact_namespace(namespace, state)
+        self.entity_updated(namespace)
+
+    @staticmethod
+    def entity_changed(old_state: Any, new_state: Any) -> bool:
+        """Whether an entity has changed between 2 versions of its state.
+
+        States that have ``last_updated`` are compared by it and their context id, which changes whenever anything about
+        the entity changes, so the attributes don't have to be compared. Anything else is compared by value.
+        """
+        try:
+            if "last_updated" in old_state and "last_updated" in new_state:
+                return (
+                    old_state["last_updated"] != new_state["last_updated"]
+                    or (old_state.get("context") or {}).get("id") != (new_state.get("context") or {}).get("id")
+                )  # fmt: skip
+        except TypeError:
+            pass
+        return old_state != new_state
+
+    async def reconcile_namespace(self, namespace: str, state: dict[str, Any]) -> int:
+        """Brings a namespace up to date with a fresh copy of its state without replacing it.
+
+        A ``state_changed`` event is processed for each entity that is new or has changed, and for each entity that no
+        longer exists, so that the state callbacks see the difference. Entities that are the same are left alone.
+
+        Returns:
+            The number of entities that were added, changed or removed
+        """
+        if not self.namespace_exists(namespace):
+            await self.add_namespace(namespace, "safe", persist=False)
+        current = self.state[namespace]
+        count = 0
+
+        for entity_id in [e for e in current if e not in state]:
+            data = {"entity_id": entity_id, "old_state": deepcopy(current[entity_id]), "new_state": None}
+            await self.AD.events.process_event(namespace, {"event_type": "state_changed", "data": data})
+            count += 1
+
+        for entity_id, new_state in state.items():
+            old_state = current.get(entity_id)
+            if old_state is None:
+                current[entity_id] = self.compact(namespace, new_state)
+                self.entity_updated(namespace, entity_id)
+            elif not self.entity_changed(old_state, new_state):
+                continue
+            data = {"entity_id": entity_id, "old_state": deepcopy(old_state), "new_state": new_state}
+            await self.AD.events.process_event(namespace, {"event_type": "state_changed", "data": data})
+            count += 1
+
+        return count
 
     def update_namespace_state(self, namespace: str | list[str], state: dict):
         """Uses the update method of dict
@@ -797,27 +1142,123 @@ class State:
         if isinstance(namespace, list):  # if its a list, meaning multiple namespaces to be updated
             for ns in namespace:
                 if s := state.get(ns):
-                    self.state[ns].update(s)
+                    self.state[ns].update(self.compact_namespace(ns, s))
+                    self.entity_updated(ns)
                 else:
                     self.logger.warning(f"Attempted to update namespace without data: {ns}")
         else:
-            self.state[namespace].update(state)
+            self.state[namespace].update(self.compact_namespace(namespace, state))
+            self.entity_updated(namespace)
+
+    def schedule_namespace_save(self, namespace: str) -> None:
+        """Schedules the changes to a persistent namespace to be written. Changes that happen before the write starts
+        are batched together."""
+        if namespace not in self.pending_saves:
+            self.pending_saves.add(namespace)
+            self.AD.loop.call_soon_threadsafe(self._start_namespace_save, namespace)
+
+    def _start_namespace_save(self, namespace: str) -> None:
+        self.create_task(self.commit_namespace(namespace))
+
+    async def commit_namespace(self, namespace: str) -> None:
+        """Writes the entities of a persistent namespace that have changed, using the executor"""
+        self.pending_saves.discard(namespace)
+        if isinstance(ns := self.state.get(namespace), utils.SQLitePersistentDict):
+            async with ns.commit_lock:
+                if batch := ns.take_dirty():
+                    await utils.run_in_executor(self, ns.write, batch)
 
     async def save_namespace(self, namespace: str) -> None:
-        if isinstance((ns := self.state[namespace]), utils.PersistentDict):
-            ns.sync()
+        if isinstance((ns := self.state[namespace]), utils.SQLitePersistentDict):
+            async with ns.commit_lock:
+                # Write everything, in case any values were modified in place
+                ns.dirty.update(ns.keys())
+                await utils.run_in_executor(self, ns.write, ns.take_dirty())
         else:
             self.logger.warning("Namespace: %s cannot be saved", namespace)
 
     def save_all_namespaces(self):
         for ns, state in self.state.items():
-            if isinstance(state, utils.PersistentDict):
+            if isinstance(state, utils.SQLitePersistentDict):
                 self.state[ns].sync()
 
-    def save_hybrid_namespaces(self):
-        for ns, cfg in self.AD.namespaces.items():
-            if cfg.writeback == "hybrid":
-                self.state[ns].sync()
+    async def save_hybrid_namespaces(self) -> None:
+        """Writes the entities that have changed in any of the hybrid namespaces. Namespaces without any changes are
+        skipped."""
+        for namespace, ns in list(self.state.items()):
+            if isinstance(ns, utils.SQLitePersistentDict) and not ns.safe and ns.dirty:
+                await self.commit_namespace(namespace)
+
+    async def save_loop(self) -> None:
+        """Saves the hybrid namespaces every ``namespace_save_interval``"""
+        while not self.AD.stopping:
+            await asyncio.sleep(self.AD.namespace_save_interval.total_seconds())
+            # Shielded so that cancelling the loop doesn't abandon a write in the executor
+            await asyncio.shield(self.create_task(self.save_hybrid_namespaces()))
+
+    def snapshot_state(self) -> dict[str, dict[str, Any]]:
+        """Shallow copy of the namespaces that go into the state snapshot.
+
+        The ``admin`` namespace, persistent namespaces and namespaces added by apps are left out because they get
+        re-created on their own at startup.
+        """
+        return {
+            namespace: dict(entities)
+            for namespace, entities in self.state.items()
+            if namespace != "admin"
+            and namespace not in self.app_added_namespaces
+            and not isinstance(entities, utils.SQLitePersistentDict)
+        }  # fmt: skip
+
+    def write_snapshot(self, namespaces: dict[str, dict[str, Any]]) -> None:
+        """Writes the state snapshot, replacing the previous one atomically"""
+        data = pickle.dumps({"version": SNAPSHOT_VERSION, "namespaces": namespaces}, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load_snapshot(self) -> Set[str]:
+        """Restores the namespaces from the state snapshot, if there is one.
+
+        Returns:
+            The names of the namespaces that were restored
+        """
+        try:
+            snapshot = pickle.loads(self.snapshot_path.read_bytes())
+        except FileNotFoundError:
+            return set()
+        except Exception:
+            self.logger.warning("Unable to load the state snapshot: %s", traceback.format_exc())
+            return set()
+
+        if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+            self.logger.warning("Ignoring state snapshot from an incompatible version: %s", self.snapshot_path)
+            return set()
+
+        restored = set()
+        for namespace, entities in snapshot["namespaces"].items():
+            ns_cfg = self.AD.namespaces.get(namespace)
+            if namespace == "admin" or (ns_cfg is not None and ns_cfg.persist):
+                continue
+            self.state[namespace] = self.compact_namespace(namespace, entities)
+            restored.add(namespace)
+
+        count = sum(len(self.state[ns]) for ns in restored)
+        self.logger.info("Restored %s entities in %s namespaces from the state snapshot", count, len(restored))
+        return restored
+
+    async def save_snapshot(self) -> None:
+        """Writes the state snapshot using the executor"""
+        try:
+            await utils.run_in_executor(self, self.write_snapshot, self.snapshot_state())
+        except Exception:
+            self.logger.warning("Unable to save the state snapshot: %s", traceback.format_exc())
+
+    async def snapshot_loop(self) -> None:
+        """Saves the state snapshot every ``state_snapshot_interval``"""
+        while not self.AD.stopping:
+            await asyncio.sleep(self.AD.state_snapshot_interval.total_seconds())
+            await asyncio.shield(self.create_task(self.save_snapshot()))
 
     #
     # Utilities
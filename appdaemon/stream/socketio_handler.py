@@ -1,8 +1,7 @@
 import socketio
-import json
 import traceback
 
-import appdaemon.utils as utils
+from appdaemon import json_codec
 
 
 class SocketIOHandler:
@@ -38,7 +37,7 @@ class NameSpace(socketio.AsyncNamespace):
     async def on_down(self, sid, data):
         self.logger.debug("IOSocket Down sid={} data={}".format(sid, data))
         try:
-            msg = json.loads(data)
+            msg = json_codec.loads(data)
             handler = self.ADStream.get_handler(sid)
             await handler._on_message(msg)
         except TypeError as e:
@@ -85,7 +84,7 @@ class SocketIOStream:
         self.logger.debug("IOSocket Send sid={} data={}".format(self.client_id, data))
         data["client_id"] = self.client_id
         try:
-            msg = utils.convert_json(data)
+            msg = json_codec.dumps(data)
             await self.ns.emit("up", msg, room=self.client_id)
         except TypeError as e:
             self.logger.debug("-" * 60)
@@ -1,8 +1,8 @@
-import json
 import traceback
 
 import sockjs
 
+from appdaemon import json_codec
 from appdaemon import utils as utils
 
 
@@ -24,7 +24,7 @@ class SockJSHandler:
         elif msg.type == sockjs.MSG_MESSAGE:
             self.logger.debug("SockJS message session={} data={}".format(session, msg))
             try:
-                msg = json.loads(msg.data)
+                msg = json_codec.loads(msg.data)
                 handler = self.ADStream.get_handler(session.id)
                 await handler._on_message(msg)
             except TypeError as e:
@@ -72,7 +72,7 @@ class SockJSStream:
 
     async def sendclient(self, data):
         try:
-            msg = utils.convert_json(data)
+            msg = json_codec.dumps(data)
             await utils.run_in_executor(self, self.session.send, msg)
         except TypeError as e:
             self.logger.debug("-" * 60)
@@ -1,10 +1,10 @@
 import asyncio
-import json
 import traceback
 
 import aiohttp
 from aiohttp import web
 
+from appdaemon import json_codec
 from appdaemon import utils as utils
 
 
@@ -54,7 +54,7 @@ class WSStream:
                 msg = await self.ws.receive()
                 if msg.type == aiohttp.WSMsgType.TEXT:
                     try:
-                        msg = json.loads(msg.data)
+                        msg = json_codec.loads(msg.data)
                         await self.on_message(msg)
                     except ValueError:
                         self.logger.warning("Unexpected error in JSON conversion when receiving from stream")
@@ -81,7 +81,7 @@ class WSStream:
     async def sendclient(self, data):
         try:
             async with self.lock:
-                await self.ws.send_json(data, dumps=utils.convert_json)
+                await self.ws.send_str(json_codec.dumps(data))
 
         except TypeError as e:
             self.logger.debug("-" * 60)
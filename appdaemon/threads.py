@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import datetime
 import functools
 import inspect
@@ -6,7 +7,9 @@ import logging
 import re
 import sys
 import threading
+import time
 import traceback
+import zlib
 from collections.abc import Callable
 from logging import Logger
 from queue import Queue
@@ -19,6 +22,7 @@ import iso8601
 from . import exceptions as ade
 from . import utils
 from .models.config.app import AppConfig
+from .models.internal.threading import CallbackMetrics
 
 if TYPE_CHECKING:
     from .adbase import ADBase
@@ -59,6 +63,27 @@ class Threading:
     current_callbacks_executed: int = 0
     current_callbacks_fired: int = 0
 
+    async_semaphores: dict[str, asyncio.Semaphore]
+    """Semaphores that limit the number of concurrent async callbacks, by app name
+    """
+    async_locks: dict[tuple[str, str], list[asyncio.Lock | int]]
+    """Locks used to run the async callbacks for the same entity in order, keyed by app name and entity. Each value is a
+    list of the lock and the number of callbacks that are using it.
+    """
+
+    metrics: CallbackMetrics
+    """Counters for the coroutine callbacks that are run with the ``fast_async_callbacks`` option
+    """
+
+    constraint_cache: dict[tuple[str, str, str, str], bool]
+    """Results of custom constraints that declare their dependencies, keyed by app name, namespace, constraint name
+    and the repr of the constraint value.
+    """
+    constraint_index: dict[tuple[str, str], set[tuple[str, str, str, str]]]
+    """Dictionary with keys of namespace and entity ID (or bare domain) and values of the keys of
+    :attr:`constraint_cache` that depend on them.
+    """
+
     def __init__(self, ad: "AppDaemon"):
         self.AD = ad
         self.logger = ad.logging.get_child(self.name)
@@ -76,6 +101,15 @@ class Threading:
         self.add_to_attr = ad.state.add_to_attr
 
         self.callback_list = []
+        self.metrics = CallbackMetrics()
+        self.async_semaphores = {}
+        self.async_locks = {}
+
+        self.constraint_cache = {}
+        self.constraint_index = {}
+        self._app_constraints = {}
+        self._time_constraints = {}
+        self._days_constraints = {}
 
     @property
     def pin_apps(self) -> bool:
@@ -106,12 +140,37 @@ class Threading:
             qsize = self.get_q(thread).qsize()
             await self.set_state("_threading", "admin", "thread.{}".format(thread), q=qsize)
 
+    async def publish_callback_metrics(self):
+        """Adds the counts from :attr:`metrics` to the admin entities and resets them. Called by the
+        :class:`~appdaemon.utility_loop.Utility` loop, so the counts don't pile up when there's no admin loop.
+        """
+        metrics = self.metrics
+        if metrics.fired:
+            await self.add_to_state("_threading", "admin", "sensor.callbacks_total_fired", metrics.fired)
+        if metrics.executed:
+            await self.add_to_state("_threading", "admin", "sensor.callbacks_total_executed", metrics.executed)
+
+        for entity_id, count in metrics.callback_fired.items():
+            await self.add_to_attr("_threading", "admin", entity_id, "fired", count)
+        for entity_id, count in metrics.callback_executed.items():
+            await self.add_to_attr("_threading", "admin", entity_id, "executed", count)
+
+        for app_name, count in metrics.app_executed.items():
+            if (appinfo := self.AD.app_management.get_app_info(app_name)) is not None:
+                appentity = f"{appinfo.type}.{app_name}"
+                await self.add_to_attr("_threading", "admin", appentity, "totalcallbacks", count)
+                await self.add_to_attr("_threading", "admin", appentity, "instancecallbacks", count)
+
+        metrics.reset()
+
     async def get_callback_update(self):
         """Updates the sensors with information about how many callbacks have been fired. Called by the :class:`~appdaemon.admin_loop.AdminLoop`
 
         - ``sensor.callbacks_average_fired``
         - ``sensor.callbacks_average_executed``
         """
+        await self.publish_callback_metrics()
+
         now = datetime.datetime.now()
         self.callback_list.append({"fired": self.current_callbacks_fired, "executed": self.current_callbacks_executed, "ts": now})
 
@@ -302,8 +361,16 @@ class Threading:
 
         # Check for pinned app and if so figure correct thread for app
 
-        if args["pin_app"] is True:
-            thread = args["pin_thread"]
+        pin_app, pin_thread = args["pin_app"], args["pin_thread"]
+        thread = None
+        if pin_app is True and pin_thread is None:
+            # The app uses pin_by: entity. Callbacks without an entity fall back to the normal settings of the app
+            if (thread := self.entity_thread(args)) is None:
+                obj = self.AD.app_management.objects[args["name"]]
+                pin_app, pin_thread = obj.pin_app, obj.pin_thread
+
+        if thread is None and pin_app is True:
+            thread = pin_thread
             # Handle the case where an App is unpinned but selects a pinned callback without specifying a thread
             # If this happens a lot, thread 0 might get congested but the alternatives are worse!
             if thread == -1:
@@ -312,7 +379,7 @@ class Threading:
                     args["name"],
                 )
                 thread = 0
-        else:
+        elif thread is None:
             if self.thread_count == self.pin_threads:
                 raise ValueError("pin_threads must be set lower than threads if unpinned_apps are in use")
             if self.AD.load_distribution == "load":
@@ -605,17 +672,35 @@ class Threading:
         id = int(thread.split("-")[1])
         return [app_name for app_name, obj in self.AD.app_management.objects.items() if obj.pin_thread == id]
 
+    def entity_thread(self, args: dict[str, Any]) -> int | None:
+        """Picks the thread for a callback of an app with ``pin_by: entity`` by hashing its entity, so that all the
+        callbacks for an entity run in order on the same thread.
+
+        Like unpinned callbacks, they use the threads after the ones reserved for pinned apps. If every thread is
+        reserved, which is the default when apps are pinned, the entities are spread across all of them.
+
+        Returns:
+            The thread ID number, or ``None`` if the callback doesn't have an entity
+        """
+        if (entity := self.callback_key(args)) is not None and self.thread_count > 0:
+            first = self.pin_threads if self.pin_threads < self.thread_count else 0
+            return first + zlib.crc32(entity.encode()) % (self.thread_count - first)
+
     def determine_thread(self, name: str, pin: bool | None, pin_thread: int | None) -> tuple[bool, int | None]:
         """Determine whether the app should be pinned to a thread and which one.
 
-        Applies defaults from app management
+        Applies defaults from app management. For apps with ``pin_by: entity`` callbacks are pinned without a thread,
+        which is then picked by :meth:`entity_thread` when they're dispatched.
 
         Returns:
             A tuple of (pin, pin_thread) where pin is ``True`` if the app should be pinned and pin_thread is the
             thread ID number
         """
 
-        if pin_thread is None:
+        app_cfg = self.AD.app_management.app_config.root.get(name)
+        if pin_thread is None and pin is None and isinstance(app_cfg, AppConfig) and app_cfg.pin_by == "entity":
+            return True, None
+        elif pin_thread is None:
             pin = self.AD.app_management.objects[name].pin_app if pin is None else pin
             pin_thread = self.AD.app_management.objects[name].pin_thread
         else:
@@ -629,31 +714,119 @@ class Threading:
     # Constraints
     #
 
+    def frozen_payloads(self, name: str) -> bool:
+        """Whether the callbacks of an app share read-only payloads instead of getting their own copies"""
+        app_cfg = self.AD.app_management.app_config.root.get(name)
+        if isinstance(app_cfg, AppConfig) and app_cfg.callback_args is not None:
+            return app_cfg.callback_args == "frozen"
+        return self.AD.callback_args == "frozen"
+
+    def get_app_constraints(self, name: str, app_cfg: AppConfig, app: "ADBase") -> tuple[list[tuple[str, Any]], dict[str, Any]]:
+        """Gets the app level constraints for an app.
+
+        These are compiled once from the app config and kept until the app is terminated or its registered constraints
+        change, which avoids dumping the whole config model for every dispatched callback.
+
+        Returns:
+            A tuple of the custom constraints as a list of (name, value) pairs and the time/days constraint arguments.
+        """
+        if (compiled := self._app_constraints.get(name)) is not None and compiled[0] == app.constraints:
+            return compiled[1], compiled[2]
+
+        args = app_cfg.args
+        constraints = [(arg, val) for arg, val in args.items() if arg in app.constraints]
+        time_args = {
+            arg: args[arg]
+            for arg in ("constrain_start_time", "constrain_end_time", "constrain_days")
+            if arg in args
+        }  # fmt: skip
+        self._app_constraints[name] = (list(app.constraints), constraints, time_args)
+        return constraints, time_args
+
+    def invalidate_constraints(self, namespace: str, entity_id: str | None = None) -> None:
+        """Drops the cached constraint results that depend on an entity or its domain.
+
+        If no entity is given, all the cached results for the namespace are dropped.
+        """
+        if not self.constraint_index:
+            return
+
+        if entity_id is None:
+            keys = [key for key in self.constraint_index if key[0] == namespace]
+        else:
+            keys = [(namespace, entity_id), (namespace, entity_id.split(".", 1)[0])]
+
+        for key in keys:
+            for cache_key in self.constraint_index.pop(key, ()):
+                self.constraint_cache.pop(cache_key, None)
+
+    def clear_constraint_cache(self, name: str) -> None:
+        """Drops everything cached about the constraints of an app. Used when the app is terminated."""
+        self._app_constraints.pop(name, None)
+        for cache in (self.constraint_cache, self._time_constraints):
+            for key in [key for key in cache if key[0] == name]:
+                del cache[key]
+
     async def check_constraint(self, key, value, app: "ADBase"):
-        """Used to check Constraint"""
+        """Used to check Constraint
+
+        Results of constraints that were registered with their dependencies are cached until one of the entities they
+        depend on changes state. If there are no dependencies for a value, nothing could invalidate the result, so it
+        isn't cached.
+        """
 
         unconstrained = True
         if hasattr(app, "constraints") and key in app.constraints:
             method = getattr(app, key)
-            unconstrained = await utils.run_async_sync_func(self, method, value)
+            depends_on = getattr(app, "constraint_dependencies", {}).get(key)
+            if depends_on is None:
+                return await utils.run_async_sync_func(self, method, value)
+
+            cache_key = (app.name, app.namespace, key, repr(value))
+            if (unconstrained := self.constraint_cache.get(cache_key)) is not None:
+                return unconstrained
+
+            index_keys = [(app.namespace, dependency) for dependency in depends_on(value)]
+            if not index_keys:
+                return await utils.run_async_sync_func(self, method, value)
+
+            for index_key in index_keys:
+                self.constraint_index.setdefault(index_key, set()).add(cache_key)
+
+            unconstrained = bool(await utils.run_async_sync_func(self, method, value))
+
+            # Only keep the result if none of the dependencies changed while it was being evaluated
+            if all(cache_key in self.constraint_index.get(index_key, ()) for index_key in index_keys):
+                self.constraint_cache[cache_key] = unconstrained
 
         return unconstrained
 
     async def check_time_constraint(self, args, name):
-        """Used to check time Constraint"""
+        """Used to check time Constraint
+
+        The result is re-used until the next minute starts, or until the start or end of the time window is crossed,
+        whichever comes first.
+        """
 
         unconstrained = True
         if "constrain_start_time" in args or "constrain_end_time" in args:
-            if "constrain_start_time" not in args:
-                start_time = "00:00:00"
-            else:
-                start_time = args["constrain_start_time"]
-            if "constrain_end_time" not in args:
-                end_time = "23:59:59"
-            else:
-                end_time = args["constrain_end_time"]
-            if await self.AD.sched.now_is_between(start_time, end_time, name) is False:
-                unconstrained = False
+            start_time = args.get("constrain_start_time", "00:00:00")
+            end_time = args.get("constrain_end_time", "23:59:59")
+
+            now = await self.AD.sched.get_now()
+            cache_key = (name, str(start_time), str(end_time))
+            if (cached := self._time_constraints.get(cache_key)) is not None and cached[0] <= now < cached[1]:
+                return cached[2]
+
+            unconstrained = await self.AD.sched.now_is_between(start_time, end_time, name)
+
+            if isinstance(start_time, str) and isinstance(end_time, str):
+                expires = now.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+                for edge in (start_time, end_time):
+                    edge_dt = (await self.AD.sched.get_dt_from_param(edge, name, today=True, days_offset=0))["datetime"]
+                    if now <= edge_dt < expires:
+                        expires = edge_dt
+                self._time_constraints[cache_key] = (now, expires, unconstrained)
 
         return unconstrained
 
@@ -663,11 +836,13 @@ class Threading:
         unconstrained = True
         if "constrain_days" in args:
             days = args["constrain_days"]
-            now = (await self.AD.sched.get_now()).astimezone(self.AD.tz)
-            daylist = []
-            for day in days.split(","):
-                daylist.append(await utils.run_in_executor(self, utils.day_of_week, day))
+            if (daylist := self._days_constraints.get(days)) is None:
+                daylist = set()
+                for day in days.split(","):
+                    daylist.add(await utils.run_in_executor(self, utils.day_of_week, day))
+                self._days_constraints[days] = daylist
 
+            now = (await self.AD.sched.get_now()).astimezone(self.AD.tz)
             if now.weekday() not in daylist:
                 unconstrained = False
 
@@ -849,23 +1024,30 @@ class Threading:
         # (plugins have no args so skip if necessary)
         #
         if app_cfg := self.AD.app_management.app_config.root.get(name):
-            for arg, val in app_cfg.args.items():
-                constrained = await self.check_constraint(
-                    arg,
-                    val,
-                    self.AD.app_management.objects[name].object,
-                )
-                if not constrained:
+            app = self.AD.app_management.objects[name].object
+            constraints, time_args = self.get_app_constraints(name, app_cfg, app)
+            for arg, val in constraints:
+                if not await self.check_constraint(arg, val, app):
+                    unconstrained = False
+                    break
+            if unconstrained:
+                if not await self.check_time_constraint(time_args, name):
+                    unconstrained = False
+                elif not await self.check_days_constraint(time_args, name):
                     unconstrained = False
-            if not await self.check_time_constraint(self.AD.app_management.app_config[name].args, name):
-                unconstrained = False
-            elif not await self.check_days_constraint(self.AD.app_management.app_config[name].args, name):
-                unconstrained = False
 
         #
         # Callback level constraints
         #
-        myargs = utils.deepcopy(args)
+        if self.frozen_payloads(name):
+            # The payloads are usually frozen once per event already, so this only copies the top level
+            myargs = args.copy()
+            for key in ("new_state", "old_state", "data"):
+                if key in myargs:
+                    myargs[key] = utils.freeze(myargs[key])
+            myargs["kwargs"] = myargs["kwargs"].copy()
+        else:
+            myargs = utils.deepcopy(args)
         if "kwargs" in myargs:
             for arg in myargs["kwargs"].keys():
                 constrained = await self.check_constraint(
@@ -891,8 +1073,12 @@ class Threading:
             #
             # It's going to happen
             #
+            fast_async = self.AD.fast_async_callbacks and asyncio.iscoroutinefunction(myargs["function"])
             if "__silent" in args["kwargs"] and args["kwargs"]["__silent"] is True:
                 pass
+            elif fast_async:
+                self.metrics.record_fired("{}_callback.{}".format(myargs["type"], myargs["id"]))
+                self.current_callbacks_fired += 1
             else:
                 await self.add_to_state("_threading", "admin", "sensor.callbacks_total_fired", 1)
                 await self.add_to_attr(
@@ -905,7 +1091,10 @@ class Threading:
             #
             # And Q
             #
-            if asyncio.iscoroutinefunction(myargs["function"]):
+            if fast_async:
+                future = asyncio.ensure_future(self.fast_async_worker(myargs))
+                self.AD.futures.add_future(name, future)
+            elif asyncio.iscoroutinefunction(myargs["function"]):
                 future = asyncio.ensure_future(self.async_worker(myargs))
                 self.AD.futures.add_future(name, future)
             else:
@@ -914,15 +1103,134 @@ class Threading:
         else:
             return False
 
+    def get_callback_partial(self, app: "ADBase", args: dict[str, Any]) -> functools.partial:
+        """Builds the partial that calls the callback function with the right arguments for its type"""
+        funcref = args["function"]
+        pos_args = tuple()
+        kwargs = dict()
+        match args["type"]:
+            case "scheduler":
+                kwargs = self.AD.sched.sanitize_timer_kwargs(app, args["kwargs"])
+
+            case "state":
+                pos_args = (
+                    args["entity"],
+                    args["attribute"],
+                    args["old_state"],
+                    args["new_state"],
+                )
+                kwargs = self.AD.state.sanitize_state_kwargs(app, args["kwargs"])
+
+            case "log":
+                data = args["data"]
+                pos_args = (
+                    data["app_name"],
+                    data["ts"],
+                    data["level"],
+                    data["log_type"],
+                    data["message"],
+                )
+                kwargs = self.AD.logging.sanitize_log_kwargs(app, args["kwargs"])
+
+            case "event":
+                pos_args = (args["event"], args["data"])
+                kwargs = self.AD.events.sanitize_event_kwargs(app, args["kwargs"])
+
+        use_dictionary_unpacking = utils.has_expanded_kwargs(funcref)
+        if use_dictionary_unpacking:
+            return functools.partial(funcref, *pos_args, **kwargs)
+        elif isinstance(funcref, functools.partial):
+            pos_args += funcref.args
+            kwargs.update(funcref.keywords)
+            return functools.partial(funcref.func, kwargs)
+        else:
+            return functools.partial(funcref, *pos_args, kwargs)
+
+    async def run_async_callback(self, name: str, funcref: functools.partial, args: dict[str, Any], callback: str):
+        """Awaits a coroutine callback with logic to transform exceptions based on the callback type"""
+        error_logger = logging.getLogger(f"Error.{name}")
+
+        @ade.wrap_async(error_logger, self.AD.app_dir, callback)
+        async def safe_callback():
+            """Wraps actually calling the function for the callback with logic to transform exceptions based
+            on the callback type"""
+            self.AD.app_management.objects[name].increment_callback_counter()
+            try:
+                await funcref()
+            except Exception as exc:
+                # positional arguments common to all the AppCallbackFail exceptions
+                pos_args = (name, funcref)
+                match args["type"]:
+                    case "event":
+                        raise ade.EventCallbackFail(*pos_args, args["event"]) from exc
+                    case "scheduler":
+                        raise ade.SchedulerCallbackFail(*pos_args) from exc
+                    case "state":
+                        raise ade.StateCallbackFail(*pos_args, args["entity"]) from exc
+                    case _:
+                        raise ade.AppCallbackFail(*pos_args) from exc
+
+        await safe_callback()
+
+    @staticmethod
+    def callback_key(args: dict[str, Any]) -> str | None:
+        """Gets the entity that a callback is for, which is used to keep the callbacks for each entity in order.
+
+        Event callbacks use the ``entity_id`` of the event data if there is one, or otherwise the event type. Other
+        callbacks don't have an entity.
+        """
+        match args["type"]:
+            case "state":
+                return args["entity"]
+            case "event":
+                data = args.get("data")
+                if isinstance(data, dict) and isinstance(entity_id := data.get("entity_id"), str):
+                    return entity_id
+                return args["event"]
+
+    @contextlib.asynccontextmanager
+    async def async_callback_limits(self, name: str, args: dict[str, Any]):
+        """Waits until the ``async_max_concurrency`` and ``async_serialize_by_entity`` settings of the app allow a
+        callback to run."""
+        app_cfg = self.AD.app_management.app_config.root.get(name)
+        if not isinstance(app_cfg, AppConfig):
+            yield
+            return
+
+        async with contextlib.AsyncExitStack() as stack:
+            if app_cfg.async_serialize_by_entity and (entity := self.callback_key(args)) is not None:
+                lock_key = (name, entity)
+                entry = self.async_locks.setdefault(lock_key, [asyncio.Lock(), 0])
+                entry[1] += 1
+
+                def release_lock():
+                    entry[1] -= 1
+                    if entry[1] == 0 and self.async_locks.get(lock_key) is entry:
+                        del self.async_locks[lock_key]
+
+                stack.callback(release_lock)
+                await stack.enter_async_context(entry[0])
+
+            if (limit := app_cfg.async_max_concurrency) is not None:
+                if (semaphore := self.async_semaphores.get(name)) is None:
+                    semaphore = self.async_semaphores[name] = asyncio.Semaphore(limit)
+                await stack.enter_async_context(semaphore)
+
+            yield
+
+    def clear_async_limits(self, name: str) -> None:
+        """Drops the semaphore and locks of an app. Used when the app is terminated."""
+        self.async_semaphores.pop(name, None)
+        for key in [key for key in self.async_locks if key[0] == name]:
+            del self.async_locks[key]
+
     # noinspection PyBroadException
-    async def async_worker(self, args):  # noqa: C901
+    async def async_worker(self, args):
         thread_id = threading.current_thread().name
         _type = args["type"]
-        funcref = args["function"]
         _id = args["id"]
         objectid = args["objectid"]
         name = args["name"]
-        error_logger = logging.getLogger(f"Error.{name}")
         args["kwargs"]["__thread_id"] = thread_id
 
         silent = False
@@ -931,79 +1239,49 @@ class Threading:
 
         app = self.AD.app_management.get_app_instance(name, objectid)
         if app is not None:
-            try:
-                pos_args = tuple()
-                kwargs = dict()
-                match _type:
-                    case "scheduler":
-                        kwargs = self.AD.sched.sanitize_timer_kwargs(app, args["kwargs"])
-
-                    case "state":
-                        pos_args = (
-                            args["entity"],
-                            args["attribute"],
-                            args["old_state"],
-                            args["new_state"],
-                        )
-                        kwargs = self.AD.state.sanitize_state_kwargs(app, args["kwargs"])
-
-                    case "log":
-                        data = args["data"]
-                        pos_args = (
-                            data["app_name"],
-                            data["ts"],
-                            data["level"],
-                            data["log_type"],
-                            data["message"],
-                        )
-                        kwargs = self.AD.logging.sanitize_log_kwargs(app, args["kwargs"])
+            async with self.async_callback_limits(name, args):
+                try:
+                    funcref = self.get_callback_partial(app, args)
+                    callback = f"{funcref.func.__name__}() in {name}"
+                    await self.update_thread_info("async", callback, name, _type, _id, silent)
+                    await self.run_async_callback(name, funcref, args, callback)
+                finally:
+                    await self.update_thread_info("async", "idle", name, _type, _id, silent)
+        else:
+            if not self.AD.stopping:
+                self.logger.warning("Found stale callback for %s - discarding", name)
 
-                    case "event":
-                        data = args["data"]
-                        pos_args = (args["event"], data)
-                        kwargs = self.AD.events.sanitize_event_kwargs(app, args["kwargs"])
+    async def fast_async_worker(self, args):
+        """Runs a coroutine callback without updating the admin entities of the ``async`` thread.
 
-                use_dictionary_unpacking = utils.has_expanded_kwargs(funcref)
-                if use_dictionary_unpacking:
-                    funcref = functools.partial(funcref, *pos_args, **kwargs)
-                else:
-                    if isinstance(funcref, functools.partial):
-                        pos_args += funcref.args
-                        kwargs.update(funcref.keywords)
-                        funcref = functools.partial(funcref.func, kwargs)
-                    else:
-                        funcref = functools.partial(funcref, *pos_args, kwargs)
-
-                callback = f"{funcref.func.__name__}() in {name}"
-                await self.update_thread_info("async", callback, name, _type, _id, silent)
-
-                @ade.wrap_async(error_logger, self.AD.app_dir, callback)
-                async def safe_callback():
-                    """Wraps actually calling the function for the callback with logic to transform exceptions based
-                    on the callback type"""
-                    self.AD.app_management.objects[name].increment_callback_counter()
-                    try:
-                        await funcref()
-                    except Exception as exc:
-                        # positional arguments common to all the AppCallbackFail exceptions
-                        pos_args = (name, funcref)
-                        match args["type"]:
-                            case "event":
-                                raise ade.EventCallbackFail(*pos_args, args["event"]) from exc
-                            case "scheduler":
-                                raise ade.SchedulerCallbackFail(*pos_args) from exc
-                            case "state":
-                                raise ade.StateCallbackFail(*pos_args, args["entity"]) from exc
-                            case _:
-                                raise ade.AppCallbackFail(*pos_args) from exc
-
-                await safe_callback()
+        Used instead of :meth:`async_worker` when ``fast_async_callbacks`` is enabled. The callback counts are kept in
+        :attr:`metrics` and published by the utility loop.
+        """
+        name = args["name"]
+        args["kwargs"]["__thread_id"] = "async"
 
-            finally:
-                await self.update_thread_info("async", "idle", name, _type, _id, silent)
-        else:
+        app = self.AD.app_management.get_app_instance(name, args["objectid"])
+        if app is None:
             if not self.AD.stopping:
                 self.logger.warning("Found stale callback for %s - discarding", name)
+            return
+
+        funcref = self.get_callback_partial(app, args)
+        callback = f"{funcref.func.__name__}() in {name}"
+        async with self.async_callback_limits(name, args):
+            start = time.perf_counter()
+            try:
+                await self.run_async_callback(name, funcref, args, callback)
+            finally:
+                if not args["kwargs"].get("__silent", False):
+                    self.metrics.record_executed(name, "{}_callback.{}".format(args["type"], args["id"]))
+                    self.current_callbacks_executed += 1
+                    duration = time.perf_counter() - start
+                    if self.AD.sched.realtime is True and duration >= self.AD.thread_duration_warning_threshold:
+                        self.logger.warning(
+                            f"Excessive time spent in callback {callback} - now complete after {utils.format_timedelta(duration)} "
+                            f"(limit={utils.format_timedelta(self.AD.thread_duration_warning_threshold)})"
+                        )
 
     # noinspection PyBroadException
     def worker(self):  # noqa: C901
@@ -1012,7 +1290,6 @@ class Threading:
         while True:
             args = q.get()
             _type = args["type"]
-            funcref = args["function"]
             _id = args["id"]
             objectid = args["objectid"]
             name = args["name"]
@@ -1026,47 +1303,7 @@ class Threading:
             app = self.AD.app_management.get_app_instance(name, objectid)
             if app is not None:
                 try:
-                    pos_args = tuple()
-                    kwargs = dict()
-                    match args["type"]:
-                        case "scheduler":
-                            kwargs = self.AD.sched.sanitize_timer_kwargs(app, args["kwargs"])
-
-                        case "state":
-                            pos_args = (
-                                args["entity"],
-                                args["attribute"],
-                                args["old_state"],
-                                args["new_state"],
-                            )
-                            kwargs = self.AD.state.sanitize_state_kwargs(app, args["kwargs"])
-
-                        case "log":
-                            data = args["data"]
-                            pos_args = (
-                                data["app_name"],
-                                data["ts"],
-                                data["level"],
-                                data["log_type"],
-                                data["message"],
-                            )
-                            kwargs = self.AD.logging.sanitize_log_kwargs(app, args["kwargs"])
-
-                        case "event":
-                            pos_args = (args["event"], args["data"])
-                            kwargs = self.AD.events.sanitize_event_kwargs(app, args["kwargs"])
-
-                    use_dictionary_unpacking = utils.has_expanded_kwargs(funcref)
-                    if use_dictionary_unpacking:
-                        funcref = functools.partial(funcref, *pos_args, **kwargs)
-                    else:
-                        if isinstance(funcref, functools.partial):
-                            pos_args += funcref.args
-                            kwargs.update(funcref.keywords)
-                            funcref = functools.partial(funcref.func, kwargs)
-                        else:
-                            funcref = functools.partial(funcref, *pos_args, kwargs)
-
+                    funcref = self.get_callback_partial(app, args)
                     callback = f"{funcref.func.__qualname__} for {name}"
                     update_coro = self.update_thread_info(thread_id, callback, name, _type, _id, silent)
                     utils.run_coroutine_threadsafe(self, update_coro)
@@ -192,9 +192,9 @@ class Utility:
 
                     await self.AD.threading.check_overdue_and_dead_threads()
 
-                    # Save any hybrid namespaces
+                    # Publish the counts of the fast async callbacks
 
-                    self.AD.state.save_hybrid_namespaces()
+                    await self.AD.threading.publish_callback_metrics()
 
                     # Run utility for each plugin
 
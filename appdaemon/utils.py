@@ -8,15 +8,17 @@ import inspect
 import io
 import json
 import os
+import pickle
 import platform
 import pstats
 import re
 import shelve
+import sqlite3
 import sys
 import threading
 import time
 import traceback
-from collections.abc import Awaitable, Generator, Iterable
+from collections.abc import Awaitable, Generator, Iterable, Iterator, Mapping
 from datetime import timedelta, tzinfo
 from functools import wraps
 from logging import Logger
@@ -35,6 +37,7 @@ from appdaemon.version import (
 )
 
 from . import exceptions as ade
+from . import json_codec
 
 if TYPE_CHECKING:
     from .adbase import ADBase
@@ -148,6 +151,188 @@ class PersistentDict(shelve.DbfilenameShelf):
                     self.sync()
 
 
+class SQLitePersistentDict(dict):
+    """Dictionary that persists its entries as individual rows in a SQLite database.
+
+    All the entries are kept in memory, so reading never touches the disk. The keys that change are tracked, and only
+    those are written by :meth:`write`, in a single transaction. The database uses write-ahead logging, so a crash can
+    only lose the changes that hadn't been written yet.
+
+    Writing is split in two steps, so that the disk I/O can happen in an executor: :meth:`take_dirty` pickles the
+    changed entries and has to be called from the thread that modifies the dictionary, then :meth:`write` commits them.
+    """
+
+    filename: Path
+    safe: bool
+    """Whether the changes should be saved as soon as possible, rather than periodically"""
+    dirty: set[str]
+    """Keys that have changed since the last time they were written"""
+    on_change: Callable[[], None] | None
+    """Called whenever the dictionary changes"""
+    commit_lock: asyncio.Lock
+    """Used to keep the asynchronous writes in order"""
+
+    def __init__(self, filename: str | Path, safe: bool, logger: Logger | None = None):
+        super().__init__()
+        self.filename = Path(filename).resolve()
+        self.safe = safe
+        self.logger = logger
+        self.dirty = set()
+        self.on_change = None
+        self.commit_lock = asyncio.Lock()
+        self.lock = threading.Lock()
+        self.conn = self._connect()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            conn = self._open_database()
+        except sqlite3.DatabaseError:
+            # The file is damaged beyond what SQLite can recover from the write-ahead log, so set it aside and start over
+            corrupt = self.filename.with_name(f"{self.filename.name}.corrupt-{int(time.time())}")
+            if self.logger is not None:
+                self.logger.error("Database %s is corrupt, moving it to %s", self.filename, corrupt)
+            self.filename.rename(corrupt)
+            conn = self._open_database()
+        return conn
+
+    def _open_database(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.filename, check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+            if (result := conn.execute("PRAGMA quick_check").fetchone()[0]) != "ok":
+                raise sqlite3.DatabaseError(result)
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _load(self) -> None:
+        for key, value in self.conn.execute("SELECT key, value FROM entries"):
+            try:
+                super().__setitem__(key, pickle.loads(value))
+            except Exception:
+                if self.logger is not None:
+                    self.logger.warning("Unable to load '%s' from %s, discarding it", key, self.filename)
+
+    def _changed(self, *keys: str) -> None:
+        self.dirty.update(keys)
+        if self.on_change is not None:
+            self.on_change()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed(key)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo=memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, dict(self))
+
+    def clear(self):
+        keys = list(self)
+        super().clear()
+        self._changed(*keys)
+
+    def pop(self, key, *args):
+        existed = key in self
+        result = super().pop(key, *args)
+        if existed:
+            self._changed(key)
+        return result
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._changed(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        for key, value in items.items():
+            super().__setitem__(key, value)
+        if items:
+            self._changed(*items)
+
+    def take_dirty(self) -> list[tuple[str, bytes | None]]:
+        """Pickles the entries that have changed and resets the tracking. Deleted entries have a value of ``None``."""
+        batch = []
+        for key in self.dirty:
+            if key in self:
+                batch.append((key, pickle.dumps(super().__getitem__(key), protocol=pickle.HIGHEST_PROTOCOL)))
+            else:
+                batch.append((key, None))
+        self.dirty.clear()
+        return batch
+
+    def write(self, batch: list[tuple[str, bytes | None]]) -> None:
+        """Writes a batch from :meth:`take_dirty` to the database in a single transaction"""
+        if not batch:
+            return
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)",
+                    [(key, value) for key, value in batch if value is not None],
+                )
+                self.conn.executemany(
+                    "DELETE FROM entries WHERE key = ?",
+                    [(key,) for key, value in batch if value is None],
+                )
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+
+    def commit(self) -> None:
+        """Writes the entries that have changed"""
+        self.write(self.take_dirty())
+
+    def sync(self) -> None:
+        """Writes all the entries, which also catches any values that were modified in place"""
+        self.dirty.update(self.keys())
+        self.commit()
+
+    def migrate_shelf(self, filename: str | Path) -> int:
+        """Copies all the entries from a database file created by :class:`PersistentDict`
+
+        Returns:
+            The number of entries that were copied
+        """
+        with shelve.open(Path(filename).as_posix(), flag="r") as shelf:
+            items = {key: shelf[key] for key in shelf.keys()}
+        self.update(items)
+        self.commit()
+        return len(items)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
 class AttrDict(dict):
     """Dictionary subclass whose entries can be accessed by attributes
     (as well as normally).
@@ -186,6 +371,162 @@ class StateAttrs(dict):
         self.__dict__ = device_dict
 
 
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only, use copy() to get a mutable version")
+
+
+class FrozenDict(dict):
+    """Read-only dictionary used to share a callback payload between all the callbacks for an event.
+
+    It's still a ``dict``, so it can be read, serialized and compared as normal. Both ``copy()`` and
+    :func:`~appdaemon.utils.deepcopy` return regular, mutable dictionaries.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list used alongside :class:`FrozenDict`"""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def copy(self) -> list:
+        return list(self)
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo) -> list:
+        return copy.deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(data):
+    """Recursively converts dictionaries and lists into their read-only versions. Data that is already frozen is
+    returned as-is."""
+    match data:
+        case FrozenDict() | FrozenList():
+            return data
+        case dict():
+            return FrozenDict((key, freeze(value)) for key, value in data.items())
+        case list():
+            return FrozenList(freeze(item) for item in data)
+        case tuple():
+            return tuple(freeze(item) for item in data)
+        case _:
+            return data
+
+
+class _Schema:
+    """Keys shared by all the compact mappings that have the same keys in the same order"""
+
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys: tuple[str, ...]):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+
+
+_schemas: dict[tuple[str, ...], _Schema] = {}
+
+
+def _get_schema(keys: tuple[str, ...]) -> _Schema:
+    if (schema := _schemas.get(keys)) is None:
+        keys = tuple(sys.intern(key) if isinstance(key, str) else key for key in keys)
+        schema = _schemas.setdefault(keys, _Schema(keys))
+    return schema
+
+
+class CompactMapping(Mapping):
+    """Read-only mapping that stores its values in a tuple and shares its keys with every other compact mapping that
+    has the same keys.
+
+    Entities of the same kind have the same attributes, so an installation with thousands of entities only has a
+    handful of key sets. Nested dictionaries are compacted as well. Copying it, with ``copy()``,
+    :func:`copy.deepcopy` or pickle, gives regular dictionaries.
+    """
+
+    __slots__ = ("_schema", "_values")
+
+    def __init__(self, data: dict[str, Any]):
+        self._schema = _get_schema(tuple(data))
+        self._values = tuple(CompactMapping(v) if isinstance(v, dict) else v for v in data.values())
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._schema.index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._schema.keys)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._schema.index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if (i := self._schema.index.get(key)) is not None:
+            return self._values[i]
+        return default
+
+    def to_dict(self) -> dict[str, Any]:
+        """Recursively converts the mapping back into regular dictionaries"""
+        return {
+            key: value.to_dict() if isinstance(value, CompactMapping) else value
+            for key, value in zip(self._schema.keys, self._values)
+        }  # fmt: skip
+
+    def copy(self) -> dict[str, Any]:
+        return self.to_dict()
+
+    def __copy__(self) -> dict[str, Any]:
+        return self.to_dict()
+
+    def __deepcopy__(self, memo) -> dict[str, Any]:
+        return copy.deepcopy(self.to_dict(), memo)
+
+    def __reduce__(self):
+        return (dict, (self.to_dict(),))
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+
+def compact_state(state: Any) -> Any:
+    """Converts the state dictionary of an entity into a :class:`CompactMapping`. Anything else is returned as-is.
+
+    Short string states like ``on`` are interned, and ``last_updated`` shares the string of ``last_changed`` when they
+    are the same.
+    """
+    if not isinstance(state, dict):
+        return state
+    if isinstance(value := state.get("state"), str) and len(value) <= 32:
+        state = state | {"state": sys.intern(value)}
+    if "last_updated" in state and state["last_updated"] == state.get("last_changed"):
+        state = state | {"last_updated": state["last_changed"]}
+    return CompactMapping(state)
+
+
 def check_state(logger, new_state, callback_state, name) -> bool:
     passed = False
 
@@ -786,7 +1127,9 @@ def dt_to_str(dt: datetime, tz: tzinfo | None = None, *, round: bool = False) ->
 
 
 def convert_json(data, **kwargs):
-    return json.dumps(data, default=str, **kwargs)
+    if kwargs:
+        return json.dumps(data, default=str, **kwargs)
+    return json_codec.dumps(data)
 
 
 def get_object_size(obj, seen=None):
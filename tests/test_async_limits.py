@@ -0,0 +1,54 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon.models.config.app import AppConfig
+from appdaemon.threads import Threading
+
+
+def make_threading(**app_args) -> Threading:
+    threading = Threading(MagicMock())
+    app_cfg = AppConfig(name="app", module="app", **{"class": "App"}, **app_args)
+    threading.AD.app_management.app_config.root = {"app": app_cfg}
+    return threading
+
+
+def state_args(entity: str) -> dict:
+    return {"type": "state", "entity": entity}
+
+
+async def run_callbacks(threading: Threading, entities: list[str]) -> tuple[list[str], int]:
+    order = []
+    running = peak = 0
+
+    async def callback(i: int, entity: str):
+        nonlocal running, peak
+        async with threading.async_callback_limits("app", state_args(entity)):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * (len(entities) - i))
+            order.append(f"{entity}-{i}")
+            running -= 1
+
+    await asyncio.gather(*(callback(i, entity) for i, entity in enumerate(entities)))
+    return order, peak
+
+
+def test_max_concurrency():
+    threading = make_threading(async_max_concurrency=2)
+    _, peak = asyncio.run(run_callbacks(threading, ["light.a", "light.b", "light.c", "light.d"]))
+    assert peak == 2
+
+
+def test_serialize_by_entity():
+    threading = make_threading(async_serialize_by_entity=True)
+    order, peak = asyncio.run(run_callbacks(threading, ["light.a", "light.b", "light.a", "light.a"]))
+    assert [item for item in order if item.startswith("light.a")] == ["light.a-0", "light.a-2", "light.a-3"]
+    assert peak == 2
+    assert not threading.async_locks
+
+
+def test_no_limits():
+    threading = make_threading()
+    _, peak = asyncio.run(run_callbacks(threading, ["light.a", "light.a", "light.a"]))
+    assert peak == 3
+    assert not threading.async_semaphores
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytz
+
+from appdaemon.state import State
+
+
+def make_state() -> State:
+    state = State.__new__(State)
+    state.AD = MagicMock()
+    state.AD.tz = pytz.utc
+    state.AD.compact_entities = False
+    state.AD.state_history_size = 0
+    state.AD.sched.get_now = AsyncMock(return_value=datetime(2024, 1, 1, tzinfo=pytz.utc))
+    state.logger = MagicMock()
+    state.indexes = {}
+    state.state = {
+        "default": {
+            "light.a": {"entity_id": "light.a", "state": "on", "attributes": {"brightness": 10}},
+            "light.b": {"entity_id": "light.b", "state": "off", "attributes": {}},
+        }
+    }
+    return state
+
+
+def test_get_states():
+    state = make_state()
+    entities = ["light.a", "light.b", "light.missing"]
+    result = asyncio.run(state.get_states("app", "default", entities))
+    assert result == {"light.a": "on", "light.b": "off", "light.missing": None}
+
+    result = asyncio.run(state.get_states("app", "default", entities, attribute="brightness", default=0))
+    assert result == {"light.a": 10, "light.b": 0, "light.missing": 0}
+
+    result = asyncio.run(state.get_states("app", "default", ["light.a"], attribute="all"))
+    result["light.a"]["attributes"]["brightness"] = 0
+    assert state.state["default"]["light.a"]["attributes"]["brightness"] == 10
+
+
+def test_set_states_locally_fires_the_events_in_order():
+    state = make_state()
+    state.AD.plugins.get_plugin_object.return_value = None
+    events = []
+
+    async def main():
+        state.AD.loop = asyncio.get_running_loop()
+        state.process_state_events = AsyncMock(side_effect=lambda ns, evts: events.extend(evts))
+        result = await state.set_states("app", "default", {"light.a": {"state": "off"}, "light.b": {"brightness": 5}})
+        await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(main())
+    assert result["light.a"]["state"] == "off"
+    assert state.state["default"]["light.b"]["attributes"] == {"brightness": 5}
+    assert [(e["data"]["entity_id"], e["data"]["old_state"]["state"]) for e in events] == [("light.a", "on"), ("light.b", "off")]
+
+
+def test_set_states_hands_everything_to_the_plugin_at_once():
+    state = make_state()
+    plugin = state.AD.plugins.get_plugin_object.return_value
+    plugin.set_plugin_states = AsyncMock(return_value={
+        "light.a": {"entity_id": "light.a", "state": "off", "attributes": {"brightness": 0}},
+        "light.b": None,
+    })
+
+    asyncio.run(state.set_states("app", "default", {"light.a": {"state": "off"}, "light.b": {"state": "on"}}))
+    plugin.set_plugin_states.assert_awaited_once_with("default", {
+        "light.a": {"state": "off", "attributes": {"brightness": 10}},
+        "light.b": {"state": "on", "attributes": {}},
+    })
+    assert state.state["default"]["light.a"]["attributes"] == {"brightness": 0}
+    assert state.state["default"]["light.b"]["state"] == "off"
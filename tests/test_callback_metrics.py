@@ -0,0 +1,29 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from appdaemon.threads import Threading
+
+
+def make_threading() -> Threading:
+    ad = MagicMock()
+    ad.state = AsyncMock()
+    return Threading(ad)
+
+
+def test_metrics_are_reset_after_publishing():
+    threading = make_threading()
+    for cycle in range(3):
+        for i in range(100):
+            handle = f"scheduler_callback.{cycle}-{i}"
+            threading.metrics.record_fired(handle)
+            threading.metrics.record_executed("app", handle)
+        assert len(threading.metrics.callback_fired) == 100
+
+        asyncio.run(threading.publish_callback_metrics())
+        assert not threading.metrics.callback_fired
+        assert not threading.metrics.callback_executed
+        assert not threading.metrics.app_executed
+        assert threading.metrics.fired == threading.metrics.executed == 0
+
+    threading.add_to_state.assert_any_await("_threading", "admin", "sensor.callbacks_total_fired", 100)
+    threading.add_to_attr.assert_any_await("_threading", "admin", "scheduler_callback.2-99", "executed", 1)
@@ -0,0 +1,84 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon import json_codec
+from appdaemon.plugins.hass.command import CommandWebsocket
+from appdaemon.plugins.hass.hassplugin import HassPlugin
+from appdaemon.plugins.hass.tracker import RequestTracker
+
+
+class FakeWebsocket:
+    """Answers every request with a successful result that says which connection it came from"""
+
+    def __init__(self, name: str, receive):
+        self.name = name
+        self.receive = receive
+        self.sent = []
+
+    async def send_str(self, payload: str) -> None:
+        request = json_codec.loads(payload)
+        self.sent.append(request)
+        if "id" in request:
+            result = {"type": "result", "id": request["id"], "success": True, "result": self.name}
+            asyncio.get_running_loop().create_task(self.receive(result))
+
+
+def make_plugin() -> HassPlugin:
+    plugin = HassPlugin.__new__(HassPlugin)
+    plugin.AD = MagicMock()
+    plugin.AD.loop = asyncio.get_running_loop()
+    plugin.AD.config.suppress_log_messages = False
+    plugin.config = MagicMock(ws_timeout=5, auth_json={"type": "auth", "access_token": "token"})
+    plugin.logger = plugin.error = MagicMock()
+    plugin.stopping = False
+    plugin.connect_event = asyncio.Event()
+    plugin.connect_event.set()
+    plugin.update_perf = MagicMock()
+    plugin.id = 0
+    plugin.requests = RequestTracker(plugin.AD.loop)
+    plugin.ws = FakeWebsocket("primary", plugin.receive_result)
+    plugin.command_ws = CommandWebsocket(plugin)
+    plugin.command_ws.ws = FakeWebsocket("command", plugin.command_ws.process_message)
+    return plugin
+
+
+def test_accepts_only_commands_once_ready():
+    async def main():
+        command_ws = make_plugin().command_ws
+        assert not command_ws.accepts({"type": "call_service"})
+        command_ws.ready_event.set()
+        assert command_ws.accepts({"type": "call_service"})
+        assert command_ws.accepts({"type": "config/area_registry/list"})
+        assert not command_ws.accepts({"type": "subscribe_events"})
+        assert not command_ws.accepts({"type": "ping"})
+
+    asyncio.run(main())
+
+
+def test_commands_are_routed_to_the_command_connection():
+    async def main():
+        plugin = make_plugin()
+        before = await plugin.websocket_send_json(type="call_service", domain="light", service="turn_on")
+        plugin.command_ws.ready_event.set()
+        command = await plugin.websocket_send_json(type="call_service", domain="light", service="turn_on")
+        subscription = await plugin.websocket_send_json(type="subscribe_events")
+        return plugin, before, command, subscription
+
+    plugin, before, command, subscription = asyncio.run(main())
+    assert (before["result"], command["result"], subscription["result"]) == ("primary", "command", "primary")
+    # Each connection numbers its own requests
+    assert [request["id"] for request in plugin.ws.sent] == [1, 2]
+    assert [request["id"] for request in plugin.command_ws.ws.sent] == [1]
+    assert plugin.requests.in_flight == plugin.command_ws.requests.in_flight == 0
+
+
+def test_authentication():
+    async def main():
+        command_ws = make_plugin().command_ws
+        await command_ws.process_message({"type": "auth_required"})
+        assert command_ws.ws.sent == [{"type": "auth", "access_token": "token"}]
+        assert not command_ws.is_ready
+        await command_ws.process_message({"type": "auth_ok"})
+        assert command_ws.is_ready
+
+    asyncio.run(main())
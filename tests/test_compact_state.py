@@ -0,0 +1,50 @@
+import copy
+import pickle
+
+from appdaemon.utils import CompactMapping, compact_state
+
+TS = "2024-01-01T00:00:00+00:00"
+
+
+def make_state(entity_id: str, state: str, **attributes) -> dict:
+    return {
+        "entity_id": entity_id,
+        "state": state,
+        "attributes": attributes,
+        "last_changed": TS,
+        "last_updated": TS,
+    }
+
+
+def test_reads_like_the_original():
+    original = make_state("light.a", "on", brightness=255, rgb=[255, 0, 0])
+    compact = compact_state(original)
+    assert isinstance(compact, CompactMapping)
+    assert isinstance(compact["attributes"], CompactMapping)
+    assert compact == original
+    assert compact["attributes"]["brightness"] == 255
+    assert compact.get("missing", "default") == "default"
+    assert "state" in compact and "missing" not in compact
+    assert list(compact) == list(original)
+    assert len(compact) == len(original)
+    assert compact_state("on") == "on"
+
+
+def test_key_sets_are_shared():
+    a = compact_state(make_state("light.a", "on", brightness=1))
+    b = compact_state(make_state("light.b", "off", brightness=2))
+    c = compact_state(make_state("sensor.c", "1", unit="W"))
+    assert a._schema is b._schema is c._schema
+    assert a["attributes"]._schema is b["attributes"]._schema
+    assert a["attributes"]._schema is not c["attributes"]._schema
+    assert a["last_updated"] is a["last_changed"]
+
+
+def test_copies_are_regular_dictionaries():
+    original = make_state("light.a", "on", brightness=255)
+    compact = compact_state(original)
+    for copied in (compact.copy(), copy.copy(compact), copy.deepcopy(compact), pickle.loads(pickle.dumps(compact))):
+        assert type(copied) is dict
+        assert type(copied["attributes"]) is dict
+        assert copied == original
+    assert repr(compact) == repr(original)
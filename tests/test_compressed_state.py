@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+from appdaemon.plugins.hass.utils import apply_compressed_diff, expand_compressed_state
+
+TS = 1700000000.0
+ISO = datetime.fromtimestamp(TS, timezone.utc).isoformat()
+LATER = datetime.fromtimestamp(TS + 60, timezone.utc).isoformat()
+
+
+def test_expand_compressed_state():
+    state = expand_compressed_state("light.kitchen", {"s": "on", "a": {"brightness": 255}, "c": "ctx1", "lc": TS})
+    assert state == {
+        "entity_id": "light.kitchen",
+        "state": "on",
+        "attributes": {"brightness": 255},
+        "last_changed": ISO,
+        "last_updated": ISO,
+        "context": {"id": "ctx1", "parent_id": None, "user_id": None},
+    }
+
+
+def test_expand_compressed_state_with_last_updated_and_context_dict():
+    state = expand_compressed_state("sensor.a", {"s": "1", "c": {"id": "ctx", "user_id": "u"}, "lc": TS, "lu": TS + 60})
+    assert state["attributes"] == {}
+    assert state["last_updated"] == LATER
+    assert state["context"] == {"id": "ctx", "parent_id": None, "user_id": "u"}
+
+
+def make_old_state():
+    return expand_compressed_state(
+        "light.kitchen",
+        {"s": "on", "a": {"brightness": 255, "effect": "none"}, "c": {"id": "ctx1", "user_id": "u"}, "lc": TS},
+    )
+
+
+def test_apply_compressed_diff_changes_the_state():
+    old = make_old_state()
+    new = apply_compressed_diff(old, {"+": {"s": "off", "lc": TS + 60, "c": "ctx2", "a": {"brightness": 0}}})
+    assert new["state"] == "off"
+    assert new["last_changed"] == new["last_updated"] == LATER
+    assert new["attributes"] == {"brightness": 0, "effect": "none"}
+    # Only the context ID changed, the rest of it is kept
+    assert new["context"] == {"id": "ctx2", "parent_id": None, "user_id": "u"}
+
+
+def test_apply_compressed_diff_attribute_only_change():
+    old = make_old_state()
+    new = apply_compressed_diff(old, {"+": {"lu": TS + 60, "a": {"brightness": 128}}, "-": {"a": ["effect"]}})
+    assert new["state"] == "on"
+    assert new["last_changed"] == ISO
+    assert new["last_updated"] == LATER
+    assert new["attributes"] == {"brightness": 128}
+
+
+def test_apply_compressed_diff_does_not_modify_the_old_state():
+    old = make_old_state()
+    apply_compressed_diff(old, {"+": {"a": {"brightness": 1}}, "-": {"a": ["effect"]}})
+    assert old == make_old_state()
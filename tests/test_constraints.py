@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon.threads import Threading
+
+
+class FakeApp:
+    name = "app"
+    namespace = "default"
+
+    def __init__(self, depends_on):
+        self.constraints = ["constrain_light"]
+        self.constraint_dependencies = {"constrain_light": depends_on}
+        self.calls = 0
+        self.result = True
+
+    async def constrain_light(self, value):
+        self.calls += 1
+        return self.result
+
+
+def make_threading() -> Threading:
+    return Threading(MagicMock())
+
+
+def check(threading: Threading, app: FakeApp, value=None) -> bool:
+    return asyncio.run(threading.check_constraint("constrain_light", value, app))
+
+
+def test_result_is_cached_until_a_dependency_changes():
+    threading = make_threading()
+    app = FakeApp(lambda value: ["light.kitchen"])
+
+    assert check(threading, app) is True
+    app.result = False
+    assert check(threading, app) is True
+    assert app.calls == 1
+
+    threading.invalidate_constraints("default", "sensor.other")
+    assert check(threading, app) is True
+    assert app.calls == 1
+
+    threading.invalidate_constraints("default", "light.kitchen")
+    assert check(threading, app) is False
+    assert app.calls == 2
+
+
+def test_domain_dependency_is_invalidated_by_any_entity_in_it():
+    threading = make_threading()
+    app = FakeApp(lambda value: ["light"])
+
+    check(threading, app)
+    threading.invalidate_constraints("default", "light.hallway")
+    check(threading, app)
+    assert app.calls == 2
+
+
+def test_result_without_dependencies_is_not_cached():
+    threading = make_threading()
+    app = FakeApp(lambda value: [])
+
+    check(threading, app)
+    check(threading, app)
+    assert app.calls == 2
+    assert not threading.constraint_cache
+
+
+def test_clear_constraint_cache_drops_the_app():
+    threading = make_threading()
+    app = FakeApp(lambda value: ["light.kitchen"])
+
+    check(threading, app, "on")
+    threading.clear_constraint_cache("app")
+    assert not threading.constraint_cache
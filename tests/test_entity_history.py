@@ -0,0 +1,55 @@
+import pytest
+
+from appdaemon.models.internal.state import EntityHistory
+
+
+def make_history(size: int, count: int) -> EntityHistory:
+    history = EntityHistory(size)
+    for i in range(count):
+        history.append(float(i), float(i * 10))
+    return history
+
+
+def test_window_before_the_buffer_is_full():
+    history = make_history(5, 3)
+    times, values = history.window()
+    assert list(times) == [0.0, 1.0, 2.0]
+    assert list(values) == [0.0, 10.0, 20.0]
+    assert history.last == 20.0
+
+
+def test_ring_wraps_around_and_keeps_the_newest():
+    history = make_history(3, 5)
+    assert len(history) == 3
+    times, values = history.window()
+    assert list(times) == [2.0, 3.0, 4.0]
+    assert list(values) == [20.0, 30.0, 40.0]
+    assert history.last == 40.0
+
+    history.append(5.0, 50.0)
+    assert list(history.window()[1]) == [30.0, 40.0, 50.0]
+    assert history.last == 50.0
+
+
+def test_window_since():
+    history = make_history(3, 5)
+    times, values = history.window(since=3.0)
+    assert list(times) == [3.0, 4.0]
+    assert list(values) == [30.0, 40.0]
+
+
+def test_stats():
+    history = make_history(4, 6)
+    stats = history.stats()
+    assert stats["count"] == 4
+    assert stats["mean"] == pytest.approx(35.0)
+    assert stats["min"] == 20.0
+    assert stats["max"] == 50.0
+    assert stats["rate"] == pytest.approx(10.0)
+
+    assert history.stats(since=5.0) == {"count": 1, "mean": 50.0, "min": 50.0, "max": 50.0, "rate": 0.0}
+
+
+def test_stats_when_empty():
+    assert EntityHistory(3).stats() == {"count": 0, "mean": None, "min": None, "max": None, "rate": None}
+    assert EntityHistory(3).last is None
@@ -0,0 +1,37 @@
+from unittest.mock import MagicMock
+
+from appdaemon.threads import Threading
+
+
+def make_threading(thread_count: int, pin_threads: int) -> Threading:
+    threading = Threading(MagicMock())
+    threading.thread_count = thread_count
+    threading.pin_threads = pin_threads
+    return threading
+
+
+def state_args(entity: str) -> dict:
+    return {"type": "state", "entity": entity}
+
+
+ENTITIES = [f"light.light_{i}" for i in range(50)]
+
+
+def test_reserved_threads_are_skipped():
+    threading = make_threading(10, 4)
+    threads = {threading.entity_thread(state_args(entity)) for entity in ENTITIES}
+    assert threads <= set(range(4, 10))
+    assert len(threads) > 1
+
+
+def test_all_threads_are_used_when_all_are_reserved():
+    threading = make_threading(4, 4)
+    threads = {threading.entity_thread(state_args(entity)) for entity in ENTITIES}
+    assert threads == set(range(4))
+
+
+def test_same_entity_same_thread():
+    threading = make_threading(10, 2)
+    first = threading.entity_thread(state_args("sensor.a"))
+    assert all(threading.entity_thread(state_args("sensor.a")) == first for _ in range(5))
+    assert threading.entity_thread({"type": "scheduler"}) is None
@@ -0,0 +1,47 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from appdaemon import utils
+from appdaemon.utils import FrozenDict, FrozenList, freeze
+
+DATA = {"entity_id": "light.a", "attributes": {"rgb": [255, 0, 0], "effects": ("a", ["b"])}}
+
+
+def test_freeze_is_recursive_and_reads_like_the_original():
+    frozen = freeze(DATA)
+    assert isinstance(frozen, FrozenDict)
+    assert isinstance(frozen["attributes"], FrozenDict)
+    assert isinstance(frozen["attributes"]["rgb"], FrozenList)
+    assert isinstance(frozen["attributes"]["effects"][1], FrozenList)
+    assert frozen == DATA
+    assert json.loads(json.dumps(frozen)) == json.loads(json.dumps(DATA))
+    assert freeze(frozen) is frozen
+
+
+def test_frozen_data_cannot_be_changed():
+    frozen = freeze(DATA)
+    with pytest.raises(TypeError):
+        frozen["state"] = "on"
+    with pytest.raises(TypeError):
+        frozen["attributes"].update(brightness=1)
+    with pytest.raises(TypeError):
+        frozen["attributes"]["rgb"].append(0)
+    with pytest.raises(TypeError):
+        frozen["attributes"]["rgb"][0] = 0
+    assert frozen == DATA
+
+
+def test_copies_are_mutable():
+    frozen = freeze(DATA)
+    copies = [frozen.copy(), copy.copy(frozen), copy.deepcopy(frozen), utils.deepcopy(frozen), pickle.loads(pickle.dumps(frozen))]
+    for mutable in copies:
+        assert type(mutable) is dict
+        mutable["state"] = "on"
+
+    deep = copy.deepcopy(frozen)
+    assert type(deep["attributes"]["rgb"]) is list
+    deep["attributes"]["rgb"].append(0)
+    assert frozen["attributes"]["rgb"] == [255, 0, 0]
@@ -0,0 +1,52 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon.futures import Futures
+
+
+def test_cancel_and_wait_finishes_the_app_tasks():
+    async def main():
+        futures = Futures(MagicMock())
+        finished = []
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                finished.append(True)
+
+        tasks = [asyncio.create_task(work()) for _ in range(3)]
+        for task in tasks:
+            futures.add_future("app", task)
+        other = asyncio.create_task(asyncio.sleep(10))
+        futures.add_future("other", other)
+        await asyncio.sleep(0)
+
+        await futures.cancel_and_wait("app")
+        assert finished == [True] * 3
+        assert all(task.cancelled() for task in tasks)
+        assert "app" not in futures.futures
+        assert not other.done()
+        other.cancel()
+
+    asyncio.run(main())
+
+
+def test_failed_task_does_not_cancel_the_group():
+    async def main():
+        futures = Futures(MagicMock())
+
+        async def fail():
+            raise ValueError
+
+        failing = asyncio.create_task(fail())
+        sleeping = asyncio.create_task(asyncio.sleep(10))
+        futures.add_future("app", failing)
+        futures.add_future("app", sleeping)
+        await asyncio.gather(failing, return_exceptions=True)
+
+        assert not sleeping.done()
+        assert len(futures.futures["app"]) == 1
+        futures.cancel_futures("app")
+
+    asyncio.run(main())
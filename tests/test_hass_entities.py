@@ -0,0 +1,50 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon.plugins.hass.hassplugin import HassPlugin
+from appdaemon.plugins.hass.utils import expand_compressed_state
+
+
+def make_plugin() -> HassPlugin:
+    plugin = HassPlugin.__new__(HassPlugin)
+    plugin.AD = MagicMock()
+    plugin.AD.state.state = {"default": {"sensor.a": expand_compressed_state("sensor.a", {"s": "0", "lc": 0.0})}}
+    plugin.config = MagicMock(namespace="default")
+    plugin.logger = plugin.error = MagicMock()
+    plugin._entities_lock = asyncio.Lock()
+    plugin._entities_initialized = True
+    plugin.events = []
+
+    async def receive_event(event):
+        # Like process_event, the state is only updated after yielding to the loop
+        await asyncio.sleep(0)
+        data = event["data"]
+        plugin.AD.state.state["default"][data["entity_id"]] = data["new_state"]
+        plugin.events.append((data["old_state"]["state"], data["new_state"]["state"]))
+
+    plugin.receive_event = receive_event
+    return plugin
+
+
+def test_back_to_back_diffs_are_applied_in_order():
+    async def main():
+        plugin = make_plugin()
+        await asyncio.gather(
+            plugin.receive_entities({"c": {"sensor.a": {"+": {"s": "1", "a": {"unit": "W"}}}}}),
+            plugin.receive_entities({"c": {"sensor.a": {"+": {"s": "2"}}}}),
+        )
+        return plugin
+
+    plugin = asyncio.run(main())
+    assert plugin.events == [("0", "1"), ("1", "2")]
+    state = plugin.AD.state.state["default"]["sensor.a"]
+    assert state["state"] == "2"
+    assert state["attributes"] == {"unit": "W"}
+
+
+def test_the_first_message_is_skipped():
+    plugin = make_plugin()
+    plugin._entities_initialized = False
+    asyncio.run(plugin.receive_entities({"a": {"sensor.a": {"s": "5", "lc": 0.0}}}))
+    assert plugin._entities_initialized
+    assert plugin.events == []
@@ -0,0 +1,94 @@
+import asyncio
+import datetime
+from time import perf_counter
+from unittest.mock import AsyncMock, MagicMock
+
+from appdaemon.plugins.hass.hassplugin import HassPlugin
+from appdaemon.state import State
+
+
+def make_plugin() -> HassPlugin:
+    plugin = HassPlugin.__new__(HassPlugin)
+    plugin.AD = MagicMock()
+    plugin.AD.stopping = False
+    plugin.AD.plugins.refresh_update_time = AsyncMock()
+    plugin.config = MagicMock(namespace="hass", namespaces=[], reconnect_buffer=datetime.timedelta(seconds=0.1))
+    plugin.name = "HASS"
+    plugin.logger = plugin.error = MagicMock()
+    plugin.stopping = False
+    plugin.ready_event = asyncio.Event()
+    plugin.connect_event = asyncio.Event()
+    plugin._disconnected_at = None
+    return plugin
+
+
+def make_state(ad: MagicMock, entities: dict) -> State:
+    state = State.__new__(State)
+    state.AD = ad
+    state.AD.compact_entities = False
+    state.AD.state_history_size = 0
+    state.logger = MagicMock()
+    state.state = {"hass": entities}
+    state.indexes = {}
+    state.history = {}
+    return state
+
+
+def test_resync_fires_events_for_what_was_missed():
+    plugin = make_plugin()
+    plugin.AD.state = make_state(plugin.AD, {
+        "light.same": {"state": "on", "attributes": {}},
+        "light.changed": {"state": "on", "attributes": {}},
+        "light.removed": {"state": "on", "attributes": {}},
+    })
+    events = []
+
+    async def process_event(namespace, data):
+        old_state, new_state = data["data"]["old_state"], data["data"]["new_state"]
+        events.append((data["data"]["entity_id"], old_state and old_state["state"], new_state and new_state["state"]))
+
+    plugin.AD.events.process_event = process_event
+    fresh = {
+        "light.same": {"state": "on", "attributes": {}},
+        "light.changed": {"state": "off", "attributes": {}},
+        "light.added": {"state": "on", "attributes": {}},
+    }
+    asyncio.run(plugin.resync_plugin_state({"version": "2024.1"}, fresh))
+
+    assert sorted(events) == [("light.added", None, "on"), ("light.changed", "on", "off"), ("light.removed", "on", None)]
+    plugin.AD.plugins.process_meta.assert_called_once_with({"version": "2024.1"}, "HASS")
+    plugin.AD.app_management.check_app_updates.assert_not_called()
+
+
+def test_calls_wait_for_the_connection_to_come_back():
+    async def main():
+        plugin = make_plugin()
+        plugin.services = {}
+        plugin.websocket_send_json = AsyncMock(return_value={"success": True})
+        plugin._disconnected_at = perf_counter()
+        call = asyncio.create_task(plugin.call_plugin_service("hass", "light", "turn_on", entity_id="light.a"))
+        await asyncio.sleep(0.01)
+        assert not call.done()
+        plugin.websocket_send_json.assert_not_awaited()
+
+        plugin.connect_event.set()
+        plugin.ready_event.set()
+        plugin._disconnected_at = None
+        await call
+        return plugin
+
+    plugin = asyncio.run(main())
+    request = plugin.websocket_send_json.await_args.kwargs
+    assert request["type"] == "call_service"
+    assert request["target"] == {"entity_id": "light.a"}
+
+
+def test_calls_give_up_after_the_buffer():
+    async def main():
+        plugin = make_plugin()
+        plugin._disconnected_at = perf_counter()
+        start = perf_counter()
+        assert await plugin.call_plugin_service("hass", "light", "turn_on") is None
+        return perf_counter() - start
+
+    assert 0.05 < asyncio.run(main()) < 1
@@ -0,0 +1,93 @@
+import asyncio
+import datetime
+from unittest.mock import MagicMock
+
+from appdaemon.plugins.hass.hassplugin import HassPlugin
+
+
+def make_plugin(ttl: float = 0) -> HassPlugin:
+    plugin = HassPlugin.__new__(HassPlugin)
+    plugin.AD = MagicMock()
+    plugin.config = MagicMock(rest_cache_ttl=datetime.timedelta(seconds=ttl))
+    plugin.logger = plugin.error = MagicMock()
+    plugin.connect_event = asyncio.Event()
+    plugin.connect_event.set()
+    plugin._inflight_gets = {}
+    plugin._get_cache = {}
+    plugin.requests_made = []
+
+    async def http_request(method, endpoint, timeout=10, **kwargs):
+        plugin.requests_made.append((method, endpoint, kwargs))
+        await asyncio.sleep(0.01)
+        return {"endpoint": endpoint, "count": len(plugin.requests_made)}
+
+    plugin.http_request = http_request
+    return plugin
+
+
+def run(plugin: HassPlugin, coro_func):
+    async def main():
+        plugin.AD.loop = asyncio.get_running_loop()
+        return await coro_func()
+
+    return asyncio.run(main())
+
+
+def test_identical_gets_share_one_request():
+    plugin = make_plugin()
+
+    async def requests():
+        return await asyncio.gather(
+            plugin.http_method("get", "/api/states"),
+            plugin.http_method("get", "/api/states"),
+            plugin.http_method("get", "/api/states", entity_id="light.a"),
+        )
+
+    first, second, other = run(plugin, requests)
+    assert len(plugin.requests_made) == 2
+    assert first == second
+    assert first is not second
+    assert other["count"] == 2
+    assert not plugin._inflight_gets
+    # Nothing is cached without a ttl
+    assert not plugin._get_cache
+
+
+def test_cached_until_another_method_uses_the_endpoint():
+    plugin = make_plugin(ttl=60)
+
+    async def requests():
+        await plugin.http_method("get", "/api/states")
+        cached = await plugin.http_method("get", "/api/states")
+        cached["count"] = 100
+        assert (await plugin.http_method("get", "/api/states"))["count"] == 1
+        await plugin.http_method("post", "/api/states")
+        return await plugin.http_method("get", "/api/states")
+
+    assert run(plugin, requests)["count"] == 3
+    assert [method for method, _, _ in plugin.requests_made] == ["get", "post", "get"]
+
+
+def test_expired_responses_are_fetched_again():
+    plugin = make_plugin(ttl=60)
+
+    async def requests():
+        await plugin.http_method("get", "/api/config")
+        key = next(iter(plugin._get_cache))
+        plugin._get_cache[key] = (0.0, plugin._get_cache[key][1])
+        return await plugin.http_method("get", "/api/config")
+
+    assert run(plugin, requests)["count"] == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_request():
+    plugin = make_plugin()
+
+    async def requests():
+        first = asyncio.create_task(plugin.http_method("get", "/api/states"))
+        second = asyncio.create_task(plugin.http_method("get", "/api/states"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert run(plugin, requests)["count"] == 1
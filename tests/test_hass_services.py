@@ -0,0 +1,75 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon.plugins.hass.hassplugin import HassPlugin
+
+
+def make_plugin() -> HassPlugin:
+    plugin = HassPlugin.__new__(HassPlugin)
+    plugin.AD = MagicMock()
+    plugin.config = MagicMock(namespace="default")
+    plugin.logger = plugin.error = MagicMock()
+    plugin.connect_event = asyncio.Event()
+    plugin.connect_event.set()
+    plugin._disconnected_at = None
+    plugin.services = {
+        "light": {"turn_on": {"target": {}}, "toggle": {"target": {}}},
+        "notify": {"mobile": {}},
+    }
+    plugin.sent = []
+
+    async def call_plugin_service(namespace, domain, service, **data):
+        plugin.sent.append((domain, service, data))
+        return len(plugin.sent)
+
+    plugin.call_plugin_service = call_plugin_service
+    return plugin
+
+
+def call_services(plugin: HassPlugin, calls: list[dict]) -> list:
+    return asyncio.run(plugin.call_plugin_services("default", calls))
+
+
+def sent_entities(plugin: HassPlugin) -> list:
+    return [(domain, service, data.get("entity_id")) for domain, service, data in plugin.sent]
+
+
+def test_calls_with_the_same_data_are_merged():
+    plugin = make_plugin()
+    results = call_services(plugin, [
+        {"service": "light/turn_on", "entity_id": "light.a", "brightness": 10},
+        {"service": "light/turn_on", "entity_id": ["light.b", "light.c"], "brightness": 10},
+        {"service": "light/turn_on", "entity_id": "light.d", "brightness": 20},
+    ])
+    assert sent_entities(plugin) == [
+        ("light", "turn_on", ["light.a", "light.b", "light.c"]),
+        ("light", "turn_on", ["light.d"]),
+    ]
+    assert results == [1, 1, 2]
+
+
+def test_an_entity_is_never_merged_twice():
+    plugin = make_plugin()
+    results = call_services(plugin, [
+        {"service": "light/toggle", "entity_id": "light.a"},
+        {"service": "light/toggle", "entity_id": "light.a"},
+        {"service": "light/toggle", "entity_id": "light.b"},
+    ])
+    assert sent_entities(plugin) == [("light", "toggle", ["light.a"]), ("light", "toggle", ["light.a", "light.b"])]
+    assert results == [1, 2, 2]
+
+
+def test_services_without_targets_are_not_merged():
+    plugin = make_plugin()
+    call_services(plugin, [
+        {"service": "notify/mobile", "entity_id": "x", "message": "hi"},
+        {"service": "notify/mobile", "entity_id": "y", "message": "hi"},
+        {"service": "light/turn_on", "entity_id": "light.a", "target": {"area_id": "kitchen"}},
+        {"service": "light/turn_on", "entity_id": "light.b", "target": {"area_id": "kitchen"}},
+    ])
+    assert sent_entities(plugin) == [
+        ("notify", "mobile", "x"),
+        ("notify", "mobile", "y"),
+        ("light", "turn_on", "light.a"),
+        ("light", "turn_on", "light.b"),
+    ]
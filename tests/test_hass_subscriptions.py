@@ -0,0 +1,86 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon.plugins.hass.hassplugin import HassPlugin
+
+
+def make_plugin(listened: set) -> HassPlugin:
+    plugin = HassPlugin.__new__(HassPlugin)
+    plugin.AD = MagicMock()
+    plugin.AD.callbacks.event_types = lambda namespaces: set(listened)
+    plugin.config = MagicMock(
+        namespace="default",
+        namespaces=[],
+        subscribe_all_events=False,
+        subscribe_entities=False,
+        appdaemon_startup_conditions=None,
+        plugin_startup_conditions=None,
+    )
+    plugin.logger = plugin.error = MagicMock()
+    plugin.registry = None
+    plugin.event_subscriptions = {}
+    plugin._retired_subscriptions = set()
+    plugin._subscriptions_lock = asyncio.Lock()
+    plugin._subscriptions_pending = False
+    plugin.sent = []
+
+    async def websocket_send_json(**request):
+        plugin.sent.append(request)
+        return {"success": True, "id": len(plugin.sent), "ad_duration": 0.0}
+
+    plugin.websocket_send_json = websocket_send_json
+    return plugin
+
+
+def test_only_wanted_event_types_are_subscribed():
+    listened = {"my_event"}
+    plugin = make_plugin(listened)
+    asyncio.run(plugin.update_event_subscriptions())
+    assert set(plugin.event_subscriptions) == {"my_event", "state_changed", "homeassistant_started", "service_registered"}
+
+    listened.clear()
+    listened.add("other_event")
+    asyncio.run(plugin.update_event_subscriptions())
+    assert "my_event" not in plugin.event_subscriptions
+    assert "other_event" in plugin.event_subscriptions
+    assert plugin.sent[-1]["type"] == "unsubscribe_events"
+    assert plugin._retired_subscriptions == {plugin.sent[-1]["subscription"]}
+
+
+def test_listening_for_everything_subscribes_to_all_events():
+    plugin = make_plugin({"my_event", None})
+    assert plugin.wanted_event_types() == {None}
+
+    plugin.config.subscribe_all_events = True
+    plugin.AD.callbacks.event_types = lambda namespaces: {"my_event"}
+    assert plugin.wanted_event_types() == {None}
+
+
+def test_events_from_retired_subscriptions_are_dropped():
+    plugin = make_plugin(set())
+    plugin._retired_subscriptions.add(3)
+    plugin.entities_subscription = None
+    received = []
+
+    async def receive_event(event):
+        received.append(event)
+
+    plugin.receive_event = receive_event
+    asyncio.run(plugin.process_websocket_json({"type": "event", "id": 3, "event": {"event_type": "a"}}))
+    asyncio.run(plugin.process_websocket_json({"type": "event", "id": 4, "event": {"event_type": "b"}}))
+    assert received == [{"event_type": "b"}]
+
+
+def test_changes_are_coalesced_into_one_update():
+    async def main():
+        plugin = make_plugin({"my_event"})
+        plugin.AD.loop = asyncio.get_running_loop()
+        plugin.event_subscriptions = {"state_changed": 1}
+        for _ in range(3):
+            plugin.event_listeners_changed()
+        await asyncio.sleep(0.01)
+        return plugin
+
+    plugin = asyncio.run(main())
+    subscribed = [request["event_type"] for request in plugin.sent if request["type"] == "subscribe_events"]
+    assert sorted(subscribed) == ["homeassistant_started", "my_event", "service_registered"]
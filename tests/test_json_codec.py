@@ -0,0 +1,43 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import pytest
+
+from appdaemon import json_codec
+
+
+@dataclass
+class Point:
+    x: int
+
+
+DATA = {"when": datetime(2024, 1, 1, tzinfo=timezone.utc), 1: "int key", "point": Point(1), "list": [1.5, None, True]}
+EXPECTED = {"when": "2024-01-01 00:00:00+00:00", "1": "int key", "point": "Point(x=1)", "list": [1.5, None, True]}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def codec(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(json_codec, "orjson", None)
+    elif json_codec.orjson is None:
+        pytest.skip("orjson isn't installed")
+    return json_codec
+
+
+def test_both_backends_give_the_same_data(codec):
+    assert json.loads(codec.dumps(DATA)) == EXPECTED
+    assert json.loads(codec.dumpb(DATA)) == EXPECTED
+    assert isinstance(codec.dumps(DATA), str)
+    assert isinstance(codec.dumpb(DATA), bytes)
+
+
+def test_round_trip(codec):
+    data = {"text": "héllo", "big": 2**70, "nested": {"a": [1, 2]}}
+    assert codec.loads(codec.dumps(data)) == data
+    assert codec.loads(codec.dumpb(data)) == data
+
+
+def test_invalid_json_raises_json_decode_error(codec):
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads("{not json")
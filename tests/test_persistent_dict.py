@@ -0,0 +1,68 @@
+import shelve
+
+from appdaemon.utils import SQLitePersistentDict
+
+
+def test_changes_are_tracked_until_written(tmp_path):
+    db = SQLitePersistentDict(tmp_path / "ns.sqlite", safe=False)
+    db["light.a"] = {"state": "on"}
+    db.update({"light.b": {"state": "off"}})
+    db.setdefault("light.c", {"state": "on"})
+    assert db.dirty == {"light.a", "light.b", "light.c"}
+
+    db.commit()
+    assert not db.dirty
+
+    del db["light.b"]
+    db.pop("light.missing", None)
+    assert db.dirty == {"light.b"}
+    batch = db.take_dirty()
+    assert batch == [("light.b", None)]
+    db.write(batch)
+    db.close()
+
+    reopened = SQLitePersistentDict(tmp_path / "ns.sqlite", safe=False)
+    assert dict(reopened) == {"light.a": {"state": "on"}, "light.c": {"state": "on"}}
+    assert not reopened.dirty
+    reopened.close()
+
+
+def test_on_change_is_called_for_each_change(tmp_path):
+    db = SQLitePersistentDict(tmp_path / "ns.sqlite", safe=True)
+    changes = []
+    db.on_change = lambda: changes.append(True)
+    db["a"] = 1
+    db.clear()
+    assert len(changes) == 2
+    assert db.dirty == {"a"}
+    db.close()
+
+
+def test_sync_writes_values_modified_in_place(tmp_path):
+    db = SQLitePersistentDict(tmp_path / "ns.sqlite", safe=False)
+    db["sensor.a"] = {"attributes": {}}
+    db.commit()
+    db["sensor.a"]["attributes"]["unit"] = "W"
+    assert not db.dirty
+    db.sync()
+    db.close()
+
+    reopened = SQLitePersistentDict(tmp_path / "ns.sqlite", safe=False)
+    assert reopened["sensor.a"] == {"attributes": {"unit": "W"}}
+    reopened.close()
+
+
+def test_migrate_shelf(tmp_path):
+    shelf_path = tmp_path / "ns.db"
+    with shelve.open(shelf_path.as_posix()) as shelf:
+        shelf["light.a"] = {"state": "on"}
+        shelf["light.b"] = {"state": "off"}
+
+    db = SQLitePersistentDict(tmp_path / "ns.sqlite", safe=False)
+    assert db.migrate_shelf(shelf_path) == 2
+    assert not db.dirty
+    db.close()
+
+    reopened = SQLitePersistentDict(tmp_path / "ns.sqlite", safe=False)
+    assert dict(reopened) == {"light.a": {"state": "on"}, "light.b": {"state": "off"}}
+    reopened.close()
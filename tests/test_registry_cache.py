@@ -0,0 +1,87 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from appdaemon.plugins.hass.registry import RegistryCache
+
+REGISTRIES = {
+    "area": [{"area_id": "kitchen", "name": "Kitchen", "labels": ["downstairs"]}],
+    "device": [{"id": "dev1", "name": "Fridge", "name_by_user": None, "area_id": "kitchen", "labels": []}],
+    "entity": [
+        {"entity_id": "sensor.fridge", "device_id": "dev1", "area_id": None, "labels": ["cold"], "disabled_by": None},
+        {"entity_id": "light.hall", "device_id": None, "area_id": "hall", "labels": [], "disabled_by": None},
+        {"entity_id": "sensor.old", "device_id": "dev1", "area_id": None, "labels": [], "disabled_by": "user"},
+    ],
+    "label": [{"label_id": "cold", "name": "Cold"}, {"label_id": "downstairs", "name": "Down Stairs"}],
+}
+
+
+def make_cache(registries: dict) -> RegistryCache:
+    plugin = MagicMock()
+    plugin.requested = []
+
+    async def websocket_send_json(type, silent):
+        name = type.split("/")[1].removesuffix("_registry")
+        plugin.requested.append(name)
+        if (entries := registries.get(name)) is None:
+            return {"success": False, "error": {"code": "unknown", "message": ""}}
+        return {"success": True, "result": entries}
+
+    plugin.websocket_send_json = websocket_send_json
+    cache = RegistryCache(plugin)
+    cache.RELOAD_DELAY = 0.01
+    return cache
+
+
+def test_lookups():
+    cache = make_cache(REGISTRIES)
+    asyncio.run(cache.load())
+    assert cache.available
+    assert cache.area_id("kitchen") == "kitchen"
+    assert cache.area_id("sensor.fridge") == "kitchen"
+    assert cache.area_name("dev1") == "Kitchen"
+    assert cache.area_entities("Kitchen") == ["sensor.fridge"]
+    assert cache.area_devices("kitchen") == ["dev1"]
+    assert cache.device_id("Fridge") == "dev1"
+    assert cache.device_attr("sensor.fridge", "name") == "Fridge"
+    assert cache.labels() == ["cold", "downstairs"]
+    assert cache.labels("sensor.fridge") == ["cold"]
+    assert cache.label_id("down stairs") == "downstairs"
+    assert cache.label_areas("Down Stairs") == ["kitchen"]
+    assert cache.label_entities("cold") == ["sensor.fridge"]
+
+
+def test_only_the_updated_registries_are_reloaded():
+    registries = {name: list(entries) for name, entries in REGISTRIES.items()}
+    cache = make_cache(registries)
+
+    async def main():
+        cache.plugin.AD.loop = asyncio.get_running_loop()
+        await cache.load()
+        cache.plugin.requested.clear()
+
+        registries["label"].append({"label_id": "new", "name": "New"})
+        before = cache.registries
+        cache.registry_updated("label_registry_updated")
+        cache.registry_updated("label_registry_updated")
+        cache.registry_updated("area_registry_updated")
+        await asyncio.sleep(0.05)
+        return before
+
+    before = asyncio.run(main())
+    assert sorted(cache.plugin.requested) == ["area", "label"]
+    assert "new" in cache.labels()
+    # Replaced rather than modified, so readers in other threads see one version or the other
+    assert "new" not in before["label"]
+
+
+def test_failed_load_keeps_the_previous_registry():
+    registries = dict(REGISTRIES)
+    cache = make_cache(registries)
+    asyncio.run(cache.load())
+    del registries["area"]
+    asyncio.run(cache.load("area"))
+    assert cache.areas() == ["kitchen"]
+
+    empty = make_cache({})
+    asyncio.run(empty.load())
+    assert not empty.available
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from appdaemon.plugins.hass.tracker import RequestTracker
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_result_resolves_the_future():
+    async def main():
+        tracker = RequestTracker(asyncio.get_running_loop())
+        future = tracker.add(1, timeout=5)
+        req = tracker.resolve(1, {"id": 1, "success": True})
+        assert not req.expired
+        assert await future == {"id": 1, "success": True}
+        assert tracker.in_flight == 0
+        return tracker.report()
+
+    report = run(main())
+    assert report["requests_completed"] == 1
+    assert sum(report["latency_histogram"].values()) == 1
+
+
+def test_sweep_expires_requests_past_their_deadline():
+    async def main():
+        tracker = RequestTracker(asyncio.get_running_loop())
+        slow = tracker.add(1, timeout=0.05)
+        fast = tracker.add(2, timeout=5)
+        with pytest.raises(asyncio.TimeoutError):
+            await slow
+        assert 1 not in tracker.pending
+        assert 2 in tracker.pending
+        tracker.resolve(2, {"id": 2})
+        await fast
+        # The sweep stops once there's nothing left to wait for
+        await asyncio.sleep(tracker.SWEEP_INTERVAL * 2)
+        assert tracker._sweeper.done()
+        return tracker.report()
+
+    report = run(main())
+    assert report["requests_timed_out"] == 1
+    assert report["requests_completed"] == 1
+    assert report["requests_in_flight"] == 0
+
+
+def test_expire_only_affects_overdue_requests():
+    async def main():
+        tracker = RequestTracker(asyncio.get_running_loop())
+        tracker.add(1, timeout=10)
+        tracker.add(2, timeout=20)
+        tracker.expire(now=tracker.pending[1].deadline)
+        assert list(tracker.pending) == [2]
+        assert list(tracker.expired) == [1]
+        tracker.discard(2)
+
+    run(main())
+
+
+def test_late_and_unmatched_results():
+    async def main():
+        tracker = RequestTracker(asyncio.get_running_loop())
+        future = tracker.add(1, timeout=10)
+        tracker.expire(now=tracker.pending[1].deadline)
+        with pytest.raises(asyncio.TimeoutError):
+            await future
+        assert tracker.resolve(1, {"id": 1}).expired
+        assert 1 not in tracker.expired
+        assert tracker.resolve(7, {"id": 7}) is None
+        return tracker.report()
+
+    report = run(main())
+    assert report["results_late"] == 1
+    assert report["results_unmatched"] == 1
+
+
+def test_expired_requests_are_bounded():
+    async def main():
+        tracker = RequestTracker(asyncio.get_running_loop())
+        futures = [tracker.add(i, timeout=0) for i in range(tracker.EXPIRED_MAX + 10)]
+        tracker.expire()
+        await asyncio.gather(*futures, return_exceptions=True)
+        assert len(tracker.expired) == tracker.EXPIRED_MAX
+        assert 0 not in tracker.expired
+
+    run(main())
+
+
+def test_drop_all_fails_everything_in_flight():
+    async def main():
+        tracker = RequestTracker(asyncio.get_running_loop())
+        future = tracker.add(1, timeout=10)
+        tracker.drop_all()
+        with pytest.raises(asyncio.TimeoutError):
+            await future
+        assert not tracker.pending and not tracker.expired
+        return tracker.report()
+
+    assert run(main())["requests_dropped"] == 1
+
+
+def test_report_resets_the_counters():
+    async def main():
+        tracker = RequestTracker(asyncio.get_running_loop())
+        tracker.resolve(1, {})
+        tracker.report()
+        return tracker.report()
+
+    assert run(main())["results_unmatched"] == 0
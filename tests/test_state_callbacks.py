@@ -0,0 +1,68 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from appdaemon.callbacks import Callbacks
+from appdaemon.state import State
+
+
+def test_changed_keys():
+    old = {"state": "on", "attributes": {"brightness": 1, "rgb": [1, 2, 3]}, "last_changed": "a"}
+    new = {"state": "on", "attributes": {"brightness": 2, "rgb": [1, 2, 3], "effect": "x"}, "last_changed": "b"}
+    assert State.changed_keys(old, new) == {"brightness", "effect", "last_changed"}
+    assert State.changed_keys(None, {"state": "on", "attributes": {"a": 1}}) == {"state", "a"}
+    assert State.changed_keys(old, old) == set()
+
+
+def make_state() -> State:
+    state = State.__new__(State)
+    state.AD = MagicMock()
+    state.AD.callbacks = Callbacks(MagicMock())
+    state.AD.threading.frozen_payloads.return_value = False
+    state.AD.threading.check_and_dispatch_state = AsyncMock(return_value=False)
+    state.logger = MagicMock()
+    return state
+
+
+def add_callback(state: State, handle: str, entity: str, attribute: str | None = None) -> None:
+    kwargs = {} if attribute is None else {"attribute": attribute}
+    state.AD.callbacks.callbacks.setdefault("app", {})[handle] = {
+        "name": "app",
+        "type": "state",
+        "function": None,
+        "entity": entity,
+        "namespace": "default",
+        "pin_app": True,
+        "pin_thread": None,
+        "kwargs": kwargs,
+    }
+    state.AD.callbacks.add_state_listener("app", handle, attribute)
+
+
+def dispatched(state: State, old: dict, new: dict) -> list[str]:
+    state.AD.threading.check_and_dispatch_state.reset_mock()
+    event = {"data": {"entity_id": "light.a", "old_state": old, "new_state": new}}
+    asyncio.run(state.process_state_callbacks("default", event))
+    return [call.args[9] for call in state.AD.threading.check_and_dispatch_state.await_args_list]
+
+
+def test_only_callbacks_for_changed_attributes_are_dispatched():
+    state = make_state()
+    add_callback(state, "state", "light.a")
+    add_callback(state, "brightness", "light.a", "brightness")
+    add_callback(state, "all", "light", "all")
+    add_callback(state, "other_entity", "light.b")
+
+    old = {"state": "on", "attributes": {"brightness": 1}}
+    assert sorted(dispatched(state, old, {"state": "on", "attributes": {"brightness": 2}})) == ["all", "brightness"]
+    assert sorted(dispatched(state, old, {"state": "off", "attributes": {"brightness": 1}})) == ["all", "state"]
+
+
+def test_listener_index_follows_removals():
+    callbacks = Callbacks(MagicMock())
+    callbacks.add_state_listener("app", "h1", None)
+    callbacks.add_state_listener("app", "h2", "brightness")
+    assert set(callbacks.state_listeners) == {"state", "brightness"}
+
+    callbacks.remove_state_listener("app", "h2", "brightness")
+    callbacks.remove_state_listener("app", "missing", "state")
+    assert dict(callbacks.state_listeners) == {"state": {("app", "h1"): None}}
@@ -0,0 +1,57 @@
+from appdaemon.models.internal.state import StateIndex
+
+
+def entity(**attributes):
+    return {"state": "on", "attributes": attributes}
+
+
+ENTITIES = {
+    "light.kitchen": entity(area="kitchen", color_mode="xy"),
+    "light.hallway": entity(area="hallway", color_mode="xy"),
+    "switch.kitchen": entity(area="kitchen"),
+    "sensor.power": entity(area="kitchen", unit="W"),
+}
+
+
+def make_index() -> StateIndex:
+    return StateIndex(["area"], ENTITIES)
+
+
+def test_query_by_domain():
+    index = make_index()
+    assert index.query(ENTITIES, "light") == ["light.kitchen", "light.hallway"]
+    assert index.query(ENTITIES, "climate") == []
+
+
+def test_query_by_indexed_attribute():
+    index = make_index()
+    assert index.query(ENTITIES, area="kitchen") == ["light.kitchen", "switch.kitchen", "sensor.power"]
+    assert index.query(ENTITIES, "light", area="kitchen") == ["light.kitchen"]
+
+
+def test_query_by_attribute_that_is_not_indexed():
+    index = make_index()
+    assert index.query(ENTITIES, area="kitchen", unit="W") == ["sensor.power"]
+    assert index.query(ENTITIES, color_mode="xy") == ["light.kitchen", "light.hallway"]
+
+
+def test_update_moves_and_removes_entities():
+    index = make_index()
+    index.update("light.kitchen", entity(area="hallway"))
+    assert index.query(ENTITIES, area="hallway") == ["light.hallway", "light.kitchen"]
+    assert "light.kitchen" not in index.query(ENTITIES, area="kitchen")
+
+    index.update("light.kitchen", None)
+    assert index.query(ENTITIES, "light") == ["light.hallway"]
+    assert "light.kitchen" not in index.entity_values
+
+    index.update("switch.kitchen", entity())
+    index.update("sensor.power", entity())
+    assert ("area", "kitchen") not in index.values
+
+
+def test_unhashable_values_are_not_indexed():
+    index = StateIndex(["area", "rgb"], {})
+    index.update("light.a", entity(area=["kitchen"], rgb=(255, [0, 0])))
+    assert "light.a" not in index.entity_values
+    assert index.query({"light.a": entity(area=["kitchen"])}, area=["kitchen"]) == ["light.a"]
@@ -0,0 +1,65 @@
+import asyncio
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from appdaemon import utils
+from appdaemon.state import State
+
+
+def make_state(tmp_path) -> State:
+    state = State.__new__(State)
+    state.AD = MagicMock()
+    state.AD.config_dir = tmp_path
+    state.AD.executor = ThreadPoolExecutor(1)
+    state.AD.state_history_size = 0
+    state.logger = MagicMock()
+    state.state = {"default": {}, "admin": {}}
+    state.indexes = {}
+    state.history = {}
+    state.namespace_path.mkdir()
+    return state
+
+
+def test_persistent_namespace_is_opened_in_the_executor(tmp_path, monkeypatch):
+    state = make_state(tmp_path)
+    with shelve.open(state.legacy_namespace_db_path("ns").as_posix()) as shelf:
+        shelf["light.a"] = {"state": "on"}
+
+    opened_in = []
+
+    class RecordingDict(utils.SQLitePersistentDict):
+        def __init__(self, *args, **kwargs):
+            opened_in.append(threading.current_thread())
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "SQLitePersistentDict", RecordingDict)
+
+    async def main():
+        state.AD.loop = asyncio.get_running_loop()
+        return await state.add_persistent_namespace("ns", "hybrid")
+
+    assert asyncio.run(main()) == state.namespace_db_path("ns")
+    assert opened_in and opened_in[0] is not threading.main_thread()
+    assert dict(state.state["ns"]) == {"light.a": {"state": "on"}}
+    state.state["ns"].close()
+    state.AD.executor.shutdown()
+
+
+def test_reconcile_creates_missing_namespace(tmp_path):
+    state = make_state(tmp_path)
+    state.AD.events = MagicMock()
+    events = []
+
+    async def process_event(namespace, data):
+        if namespace != "admin":
+            events.append((namespace, data["data"]["entity_id"]))
+
+    state.AD.events.process_event = process_event
+
+    count = asyncio.run(state.reconcile_namespace("hass", {"light.a": {"state": "on"}}))
+    assert count == 1
+    assert state.state["hass"] == {"light.a": {"state": "on"}}
+    assert events == [("hass", "light.a")]
+    state.AD.threading.invalidate_constraints.assert_any_call("hass", None)
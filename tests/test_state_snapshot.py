@@ -0,0 +1,69 @@
+import asyncio
+import pickle
+from unittest.mock import MagicMock
+
+from appdaemon import state as state_module
+from appdaemon.state import State
+
+
+def make_state(tmp_path) -> State:
+    state = State.__new__(State)
+    state.AD = MagicMock()
+    state.AD.config_dir = tmp_path
+    state.AD.compact_entities = False
+    state.AD.state_history_size = 0
+    state.AD.namespaces = {"stored": MagicMock(persist=True)}
+    state.logger = MagicMock()
+    state.state = {"default": {}, "admin": {}}
+    state.app_added_namespaces = set()
+    state.indexes = {}
+    state.history = {}
+    state.namespace_path.mkdir(exist_ok=True)
+    return state
+
+
+def test_snapshot_round_trip(tmp_path):
+    state = make_state(tmp_path)
+    state.state["hass"] = {"light.a": {"state": "on"}}
+    state.state["admin"]["sensor.x"] = {"state": 1}
+    state.state["from_app"] = {"sensor.y": {"state": 2}}
+    state.app_added_namespaces.add("from_app")
+    state.write_snapshot(state.snapshot_state())
+
+    restored = make_state(tmp_path)
+    assert restored.load_snapshot() == {"default", "hass"}
+    assert restored.state["hass"] == {"light.a": {"state": "on"}}
+    assert restored.state["admin"] == {}
+    assert "from_app" not in restored.state
+
+
+def test_persisted_namespaces_and_other_versions_are_ignored(tmp_path):
+    state = make_state(tmp_path)
+    state.write_snapshot({"stored": {"sensor.a": {"state": 1}}})
+    assert state.load_snapshot() == set()
+    assert "stored" not in state.state
+
+    data = {"version": state_module.SNAPSHOT_VERSION + 1, "namespaces": {"hass": {}}}
+    state.snapshot_path.write_bytes(pickle.dumps(data))
+    assert state.load_snapshot() == set()
+
+    state.snapshot_path.write_bytes(b"not a pickle")
+    assert state.load_snapshot() == set()
+
+
+def test_plugin_state_is_reconciled_with_the_snapshot(tmp_path):
+    state = make_state(tmp_path)
+    state.write_snapshot({"hass": {"light.a": {"state": "on"}, "light.b": {"state": "off"}}})
+    state.snapshot_namespaces = state.load_snapshot()
+    events = []
+
+    async def process_event(namespace, data):
+        events.append((data["data"]["entity_id"], data["data"]["new_state"]))
+
+    state.AD.events.process_event = process_event
+    state.remove_persistent_namespace = MagicMock(return_value=asyncio.sleep(0))
+
+    fresh = {"light.a": {"state": "on"}, "light.b": {"state": "on"}}
+    asyncio.run(state.set_namespace_state("hass", fresh))
+    assert events == [("light.b", {"state": "on"})]
+    assert "hass" not in state.snapshot_namespaces